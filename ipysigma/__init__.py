@@ -3,6 +3,8 @@
 
 from .sigma import Sigma
 from .grid import SigmaGrid
+from .interfaces import TablesGraph
+from .utils import batched
 from ._version import __version__, version_info
 
 
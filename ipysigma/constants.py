@@ -22,15 +22,32 @@ DEFAULT_EDGE_COLOR = "#ccc"
 DEFAULT_EDGE_SIZE_RANGE = (0.5, 10)
 DEFAULT_EDGE_CURVENESS = 0.25
 DEFAULT_CAMERA_STATE = {"ratio": 1, "x": 0.5, "y": 0.5, "angle": 0}
+KWARG_ATTRIBUTE_PREFIX = "ipysigma_kwarg_"
 if np is None:
     SUPPORTED_NODE_TYPES = (int, str, float)
 else:
     SUPPORTED_NODE_TYPES = (int, str, float, np.integer, np.floating)
 SUPPORTED_RANGE_BOUNDS = (int, str, float)
-SUPPORTED_NODE_METRICS = {"louvain"}
+WIDGET_NODE_METRICS = {"louvain"}
+KERNEL_NODE_METRICS = {
+    "communities",
+    "pagerank",
+    "degree",
+    "weighted_degree",
+    "betweenness",
+    "kcore",
+}
+SUPPORTED_NODE_METRICS = WIDGET_NODE_METRICS | KERNEL_NODE_METRICS
 SUPPORTED_UNDIRECTED_EDGE_TYPES = {"rectangle", "line", "curve"}
 SUPPORTED_DIRECTED_EDGE_TYPES = SUPPORTED_UNDIRECTED_EDGE_TYPES | {"arrow", "triangle"}
 SUPPORTED_SYNC_TARGETS = {"layout", "camera", "selection", "hover"}
+SUPPORTED_KERNEL_SYNC_POLICIES = {"throttle", "debounce", "idle"}
+DEFAULT_KERNEL_SYNC_POLICIES = {
+    "camera": "debounce",
+    "selection": "throttle",
+    "hover": "debounce",
+}
+DEFAULT_KERNEL_SYNC_INTERVAL = 0.5
 SUPPORTED_SCALE_TYPES = {"lin", "log", "log+1", "pow", "sqrt"}
 SUPPORTED_NAMED_PALETTES = {
     "IWantHue",
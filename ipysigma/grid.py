@@ -5,6 +5,7 @@ from collections.abc import Iterable
 
 from ipysigma.sigma import Sigma
 from ipysigma.interfaces import check_graph_is_valid
+from ipysigma.serialization import SharedGraph
 
 GRID_COUNTER = count(1)
 
@@ -14,6 +15,11 @@ class SigmaGrid(object):
     A class that can be used to display a small multiples grid of synchronized
     views of a same graph easily.
 
+    Note that the graph is only serialized once and shared by the views, each
+    view only sending the attributes computed from its own kwargs (unless
+    the view relies on attributes or chunk_size, which requires it to send
+    its own version of the graph).
+
     Args:
         graph (nx.AnyGraph or ig.AnyGraph): networkx or igraph graph instance
             to visualize.
@@ -35,6 +41,7 @@ class SigmaGrid(object):
             raise TypeError("columns should be an int >= 1")
 
         self.__graph = graph
+        self.__shared_graph = SharedGraph()
         self.__views = []
         self.__columns = columns
         self.__sync_key = (
@@ -61,7 +68,14 @@ class SigmaGrid(object):
                 self.add(**view)
 
     def add(self, **kwargs):
-        self.__views.append(Sigma(self.__graph, **self.__default_kwargs, **kwargs))
+        self.__views.append(
+            Sigma(
+                self.__graph,
+                **self.__default_kwargs,
+                **kwargs,
+                _shared_graph=self.__shared_graph
+            )
+        )
         return self
 
     def _ipython_display_(self) -> None:
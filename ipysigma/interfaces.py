@@ -2,8 +2,18 @@
 # ipysigma Abstract Interfaces
 # =============================================================================
 #
-# Abstract interfaces used to deal with networkx or igraph.
+# Abstract interfaces used to deal with networkx or igraph, or with node &
+# edge tables (pandas DataFrames or pyarrow Tables).
 #
+from hashlib import blake2b
+
+from ipysigma.shim import is_pandas_dataframe, is_pyarrow_table
+from ipysigma.table import (
+    MISSING,
+    pandas_series_to_column,
+    pyarrow_array_to_column,
+)
+
 NETWORKX_INSTALLED = False
 IGRAPH_INSTALLED = False
 
@@ -32,13 +42,160 @@ def is_igraph_graph(v):
     return IGRAPH_INSTALLED and isinstance(v, ig.GraphBase)
 
 
+def is_tables_graph(v):
+    return isinstance(v, TablesGraph)
+
+
 def is_valid_graph(v):
-    return is_networkx_graph(v) or is_igraph_graph(v)
+    return is_networkx_graph(v) or is_igraph_graph(v) or is_tables_graph(v)
 
 
 def check_graph_is_valid(v):
     if not is_valid_graph(v):
-        raise TypeError("graph should be a networkx or igraph instance")
+        raise TypeError(
+            "graph should be a networkx or igraph instance, or a TablesGraph"
+        )
+
+
+def is_data_table(v):
+    return is_pandas_dataframe(v) or is_pyarrow_table(v)
+
+
+def read_table_column(table, name):
+    if is_pandas_dataframe(table):
+        if name not in table.columns:
+            raise TypeError('unknown column "%s"' % name)
+
+        return pandas_series_to_column(table[name])
+
+    if name not in table.column_names:
+        raise TypeError('unknown column "%s"' % name)
+
+    return pyarrow_array_to_column(table.column(name))
+
+
+def read_table_key_column(table, name):
+    column = read_table_column(table, name)
+
+    if any(v is MISSING for v in column):
+        raise TypeError('column "%s" cannot contain missing values' % name)
+
+    return column
+
+
+def read_table_columns(table, exclude):
+    names = table.columns if is_pandas_dataframe(table) else table.column_names
+
+    return {
+        str(name): read_table_column(table, name)
+        for name in names
+        if name not in exclude
+    }
+
+
+class TablesGraph(object):
+    """
+    Class wrapping a node table and an edge table (pandas DataFrames or
+    pyarrow Tables), so that they can be displayed without needing to build
+    a networkx graph first. Columns are read in bulk once, and nodes only
+    referenced by the edge table are added automatically.
+
+    Args:
+        nodes (pd.DataFrame or pa.Table, optional): node table. If None,
+            nodes will be inferred from the edge table.
+        edges (pd.DataFrame or pa.Table): edge table.
+        key (str, optional): name of the node key column. Defaults to "key".
+        source (str, optional): name of the edge source column.
+            Defaults to "source".
+        target (str, optional): name of the edge target column.
+            Defaults to "target".
+        directed (bool, optional): whether the graph is directed.
+            Defaults to False.
+        multi (bool, optional): whether the graph can have parallel edges.
+            If None, it will be inferred from the edge table. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        nodes,
+        edges,
+        key="key",
+        source="source",
+        target="target",
+        directed=False,
+        multi=None,
+    ):
+        if nodes is not None and not is_data_table(nodes):
+            raise TypeError("nodes should be a pandas DataFrame or a pyarrow Table")
+
+        if not is_data_table(edges):
+            raise TypeError("edges should be a pandas DataFrame or a pyarrow Table")
+
+        self.directed = bool(directed)
+
+        self.sources = read_table_key_column(edges, source)
+        self.targets = read_table_key_column(edges, target)
+        self.edge_columns = read_table_columns(edges, exclude={source, target})
+
+        if nodes is not None:
+            self.node_keys = read_table_key_column(nodes, key)
+            self.node_columns = read_table_columns(nodes, exclude={key})
+        else:
+            self.node_keys = []
+            self.node_columns = {}
+
+        self.node_set = set(self.node_keys)
+
+        if len(self.node_set) != len(self.node_keys):
+            raise TypeError('column "%s" contains duplicate node keys' % key)
+
+        # Adding nodes only referenced by edges
+        added_nodes = []
+
+        for edge in zip(self.sources, self.targets):
+            for node in edge:
+                if node not in self.node_set:
+                    self.node_set.add(node)
+                    added_nodes.append(node)
+
+        if added_nodes:
+            self.node_keys.extend(added_nodes)
+
+            for column in self.node_columns.values():
+                column.extend(MISSING for _ in added_nodes)
+
+        self.edge_set = None
+
+        if multi is None:
+            multi = len(self.get_edge_set()) != len(self.sources)
+
+        self.multi = bool(multi)
+
+    def __len__(self):
+        return len(self.node_keys)
+
+    def __contains__(self, node):
+        return node in self.node_set
+
+    def __repr__(self):
+        return "<TablesGraph order=%i size=%i>" % (
+            len(self.node_keys),
+            len(self.sources),
+        )
+
+    def get_edge_set(self):
+        if self.edge_set is None:
+            if self.directed:
+                self.edge_set = set(zip(self.sources, self.targets))
+            else:
+                self.edge_set = {
+                    frozenset(edge) for edge in zip(self.sources, self.targets)
+                }
+
+        return self.edge_set
+
+    def has_edge(self, a, b):
+        return ((a, b) if self.directed else frozenset((a, b))) in self.get_edge_set()
 
 
 class IPySigmaGraphInterface(object):
@@ -69,6 +226,36 @@ class IPySigmaGraphInterface(object):
     def has_edge(self, a, b) -> bool:
         raise NotImplementedError
 
+    # NOTE: interfaces able to give their data as columns should return a
+    # (node_keys, node_columns, sources, targets, edge_columns) tuple here
+    def columns(self):
+        return None
+
+    # NOTE: this fingerprint digests the graph's items & attributes, which is
+    # way cheaper than building & serializing its table, so that in-place
+    # edits are noticed. Mutations of attribute values whose repr does not
+    # change (e.g. custom objects) cannot be noticed though.
+    def fingerprint(self):
+        digest = blake2b(digest_size=16)
+
+        for item in self.nodes():
+            digest.update(repr(item).encode())
+
+        digest.update(b"\0")
+
+        for item in self.edges():
+            digest.update(repr(item).encode())
+
+        return (
+            self.name(),
+            id(self.graph),
+            self.is_directed(),
+            self.is_multi(),
+            self.order(),
+            self.size(),
+            digest.hexdigest(),
+        )
+
 
 class NetworkxInterface(IPySigmaGraphInterface):
     def name(self):
@@ -123,6 +310,72 @@ class IGraphInterface(IPySigmaGraphInterface):
     def has_edge(self, a, b):
         return self.graph.are_connected(a, b)
 
+    # NOTE: igraph stores attributes column-wise, so we can read them all at
+    # once instead of building a dict per vertex & edge
+    def columns(self):
+        g = self.graph
+
+        edgelist = g.get_edgelist()
+
+        return (
+            list(range(g.vcount())),
+            {name: g.vs[name] for name in g.vs.attribute_names()},
+            [source for source, _ in edgelist],
+            [target for _, target in edgelist],
+            {name: g.es[name] for name in g.es.attribute_names()},
+        )
+
+
+def iter_table_rows(keys, columns):
+    names = list(columns)
+
+    if not names:
+        for key in keys:
+            yield key, {}
+
+        return
+
+    for key, row in zip(keys, zip(*columns.values())):
+        yield key, {k: v for k, v in zip(names, row) if v is not MISSING}
+
+
+class TablesInterface(IPySigmaGraphInterface):
+    def name(self):
+        return "TablesGraph"
+
+    def is_directed(self):
+        return self.graph.directed
+
+    def is_multi(self):
+        return self.graph.multi
+
+    def nodes(self):
+        yield from iter_table_rows(self.graph.node_keys, self.graph.node_columns)
+
+    def edges(self):
+        for (source, target), attr in iter_table_rows(
+            zip(self.graph.sources, self.graph.targets), self.graph.edge_columns
+        ):
+            yield source, target, attr
+
+    def order(self):
+        return len(self.graph.node_keys)
+
+    def size(self):
+        return len(self.graph.sources)
+
+    def has_edge(self, a, b):
+        return self.graph.has_edge(a, b)
+
+    def columns(self):
+        return (
+            self.graph.node_keys,
+            self.graph.node_columns,
+            self.graph.sources,
+            self.graph.targets,
+            self.graph.edge_columns,
+        )
+
 
 def get_graph_interface(graph):
     if is_networkx_graph(graph):
@@ -131,8 +384,11 @@ def get_graph_interface(graph):
     if is_igraph_graph(graph):
         return IGraphInterface(graph)
 
+    if is_tables_graph(graph):
+        return TablesInterface(graph)
+
     raise TypeError(
-        "unknown graph type. expecting either a networkx or igraph instance."
+        "unknown graph type. expecting either a networkx or igraph instance, or a TablesGraph."
     )
 
 
@@ -0,0 +1,730 @@
+# =============================================================================
+# ipysigma Headless ForceAtlas2 Layout
+# =============================================================================
+#
+# NumPy implementation of the ForceAtlas2 layout algorithm, following the one
+# run by the widget (graphology-layout-forceatlas2), so that layouts can be
+# computed without a live notebook frontend (e.g. for html exports).
+#
+# Every step is vectorized over nodes or edges. The Barnes-Hut approximation
+# of repulsion relies on a quadtree built level by level, which is then walked
+# breadth-first by all the nodes at once, as arrays of (node, cell) pairs.
+#
+import os
+import json
+from math import ceil, log
+from array import array
+from hashlib import blake2b
+from concurrent.futures import ThreadPoolExecutor
+
+from ipysigma.shim import np
+from ipysigma.table import MISSING
+
+DEFAULT_FORCEATLAS2_SETTINGS = {
+    "linLogMode": False,
+    "outboundAttractionDistribution": False,
+    "adjustSizes": False,
+    "edgeWeightInfluence": 1,
+    "scalingRatio": 1,
+    "strongGravityMode": False,
+    "gravity": 1,
+    "slowDown": 1,
+    "barnesHutOptimize": False,
+    "barnesHutTheta": 0.5,
+}
+
+# NOTE: the quadtree is deep enough for its leaves to hold few nodes on average
+BARNES_HUT_LEAF_SIZE = 8
+BARNES_HUT_MAX_DEPTH = 12
+
+# NOTE: max number of node pairs considered at once by exact repulsion
+EXACT_REPULSION_BATCH_SIZE = 2**22
+
+DEFAULT_LAYOUT_CACHE_MAX_SIZE = 256 * 1024 * 1024
+LAYOUT_CACHE_EXTENSION = ".f32"
+
+
+def infer_forceatlas2_settings(order):
+    """
+    Function returning sensible settings for a graph having the given number
+    of nodes, as done by graphology's `forceAtlas2.inferSettings`.
+    """
+    return {
+        "barnesHutOptimize": order > 2000,
+        "strongGravityMode": True,
+        "gravity": 0.05,
+        "scalingRatio": 10,
+        "slowDown": 1 + log(order) if order > 0 else 1,
+    }
+
+
+def resolve_forceatlas2_settings(order, settings=None):
+    resolved = dict(DEFAULT_FORCEATLAS2_SETTINGS)
+    resolved.update(infer_forceatlas2_settings(order))
+
+    if settings is None:
+        return resolved
+
+    if not isinstance(settings, dict):
+        raise TypeError("layout settings should be a dict")
+
+    for k, v in settings.items():
+        if k not in DEFAULT_FORCEATLAS2_SETTINGS:
+            raise TypeError(
+                'unknown layout setting "%s", expecting one of %s'
+                % (k, ", ".join('"%s"' % s for s in DEFAULT_FORCEATLAS2_SETTINGS))
+            )
+
+        if k == "adjustSizes" and v:
+            raise TypeError('the "adjustSizes" layout setting is not supported')
+
+        resolved[k] = v
+
+    return resolved
+
+
+class QuadTree(object):
+    """
+    Class representing a quadtree over node positions, as flat arrays per
+    level. Cells of a level are only the non-empty ones, sorted by their
+    index in the level's grid, and are linked to their children in the
+    next level.
+    """
+
+    def __init__(self, positions, masses, depth):
+        self.depth = depth
+
+        origin = positions.min(axis=0)
+        width = float((positions.max(axis=0) - origin).max())
+        width = width * (1 + 1e-9) if width > 0 else 1.0
+
+        self.widths = [width / 2**level for level in range(depth + 1)]
+
+        # Per level: cell of each node, mass & center of mass of each cell
+        self.node_cells = []
+        self.masses = []
+        self.centers = []
+
+        # Per level (but the last one): children of each cell, as CSR
+        self.child_offsets = []
+        self.children = []
+
+        relative = (positions - origin) / width
+        previous_ids = None
+
+        for level in range(depth + 1):
+            side = 2**level
+            grid = np.minimum((relative * side).astype(np.int64), side - 1)
+            ids = grid[:, 0] * side + grid[:, 1]
+
+            unique_ids, node_cells = np.unique(ids, return_inverse=True)
+            node_cells = node_cells.reshape(-1)
+
+            cell_masses = np.bincount(node_cells, weights=masses)
+            centers = np.empty((len(unique_ids), 2))
+
+            for axis in range(2):
+                centers[:, axis] = (
+                    np.bincount(node_cells, weights=masses * positions[:, axis])
+                    / cell_masses
+                )
+
+            self.node_cells.append(node_cells)
+            self.masses.append(cell_masses)
+            self.centers.append(centers)
+
+            if previous_ids is not None:
+                parent_side = side // 2
+                parent_ids = (unique_ids // side // 2) * parent_side + (
+                    unique_ids % side
+                ) // 2
+                parents = np.searchsorted(previous_ids, parent_ids)
+
+                order = np.argsort(parents, kind="stable")
+                counts = np.bincount(parents, minlength=len(previous_ids))
+
+                offsets = np.zeros(len(previous_ids) + 1, dtype=np.int64)
+                np.cumsum(counts, out=offsets[1:])
+
+                self.child_offsets.append(offsets)
+                self.children.append(order)
+
+            previous_ids = unique_ids
+
+        # Nodes of each leaf, as CSR
+        leaves = self.node_cells[depth]
+        self.leaf_members = np.argsort(leaves, kind="stable")
+        self.leaf_offsets = np.zeros(len(self.masses[depth]) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(leaves), out=self.leaf_offsets[1:])
+
+
+def expand_csr(items, offsets, values):
+    """
+    Function expanding given items into (item, value) pairs, for each of the
+    values associated to the item through the given CSR offsets.
+    """
+    starts = offsets[items]
+    counts = offsets[items + 1] - starts
+
+    repeated = np.repeat(np.arange(len(items)), counts)
+    positions = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    return repeated, values[starts[repeated] + positions]
+
+
+def apply_repulsion(forces, nodes, deltas, masses, other_masses, coefficient):
+    distances = (deltas**2).sum(axis=1)
+    mask = distances > 0
+
+    factors = np.zeros(len(nodes))
+    factors[mask] = (
+        coefficient * masses[nodes[mask]] * other_masses[mask] / distances[mask]
+    )
+
+    for axis in range(2):
+        forces[:, axis] += np.bincount(
+            nodes, weights=deltas[:, axis] * factors, minlength=len(forces)
+        )
+
+
+def barnes_hut_repulsion(tree, positions, masses, nodes, coefficient, theta):
+    forces = np.zeros((len(positions), 2))
+
+    # Every node starts from the root cell
+    pair_nodes = nodes
+    pair_cells = np.zeros(len(nodes), dtype=np.int64)
+
+    for level in range(tree.depth + 1):
+        deltas = positions[pair_nodes] - tree.centers[level][pair_cells]
+        distances = (deltas**2).sum(axis=1)
+
+        # NOTE: a cell is far enough if its width is small enough compared to
+        # its distance, and cannot be far enough if the node lies within it
+        far = (tree.widths[level] ** 2 < theta**2 * distances) & (
+            tree.node_cells[level][pair_nodes] != pair_cells
+        )
+
+        apply_repulsion(
+            forces,
+            pair_nodes[far],
+            deltas[far],
+            masses,
+            tree.masses[level][pair_cells[far]],
+            coefficient,
+        )
+
+        near = ~far
+        pair_nodes = pair_nodes[near]
+        pair_cells = pair_cells[near]
+
+        if level == tree.depth:
+            break
+
+        indices, pair_cells = expand_csr(
+            pair_cells, tree.child_offsets[level], tree.children[level]
+        )
+        pair_nodes = pair_nodes[indices]
+
+    # Exact repulsion with the nodes of near leaves
+    indices, others = expand_csr(pair_cells, tree.leaf_offsets, tree.leaf_members)
+    pair_nodes = pair_nodes[indices]
+
+    mask = pair_nodes != others
+    pair_nodes = pair_nodes[mask]
+    others = others[mask]
+
+    apply_repulsion(
+        forces,
+        pair_nodes,
+        positions[pair_nodes] - positions[others],
+        masses,
+        masses[others],
+        coefficient,
+    )
+
+    return forces
+
+
+def exact_repulsion(positions, masses, nodes, coefficient):
+    forces = np.zeros((len(positions), 2))
+    others = np.arange(len(positions))
+
+    batch = max(1, EXACT_REPULSION_BATCH_SIZE // max(1, len(positions)))
+
+    for i in range(0, len(nodes), batch):
+        batch_nodes = nodes[i : i + batch]
+
+        pair_nodes = np.repeat(batch_nodes, len(others))
+        pair_others = np.tile(others, len(batch_nodes))
+
+        apply_repulsion(
+            forces,
+            pair_nodes,
+            positions[pair_nodes] - positions[pair_others],
+            masses,
+            masses[pair_others],
+            coefficient,
+        )
+
+    return forces
+
+
+def forceatlas2(
+    positions,
+    sources,
+    targets,
+    weights=None,
+    iterations=100,
+    settings=None,
+    barnes_hut=True,
+    workers=1,
+):
+    """
+    Function running the given number of ForceAtlas2 iterations over the
+    given node positions, and returning new positions.
+
+    Args:
+        positions (np.ndarray): (n, 2) array of initial node positions.
+        sources (np.ndarray): array of edge source node indices.
+        targets (np.ndarray): array of edge target node indices.
+        weights (np.ndarray, optional): array of edge weights. Defaults to None.
+        iterations (int, optional): number of iterations. Defaults to 100.
+        settings (dict, optional): ForceAtlas2 settings, with the same keys
+            as graphology's. Defaults to None.
+        barnes_hut (bool, optional): whether to approximate repulsion using
+            Barnes-Hut optimization. Supersedes the "barnesHutOptimize"
+            setting. Defaults to True.
+        workers (int, optional): number of threads among which to split the
+            repulsion computation. Defaults to 1.
+
+    Returns:
+        np.ndarray: (n, 2) array of node positions.
+    """
+    positions = np.array(positions, dtype=np.float64)
+    n = len(positions)
+
+    settings = resolve_forceatlas2_settings(n, settings)
+
+    if n == 0:
+        return positions
+
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+
+    if weights is None:
+        weights = np.ones(len(sources))
+    else:
+        weights = np.asarray(weights, dtype=np.float64)
+
+    influence = settings["edgeWeightInfluence"]
+
+    if influence == 0:
+        weights = np.ones(len(sources))
+    elif influence != 1:
+        weights = weights**influence
+
+    masses = 1 + np.bincount(sources, minlength=n) + np.bincount(targets, minlength=n)
+    masses = masses.astype(np.float64)
+
+    scaling = settings["scalingRatio"]
+    gravity = settings["gravity"]
+    theta = settings["barnesHutTheta"]
+
+    if settings["outboundAttractionDistribution"]:
+        attraction_coefficient = masses.mean()
+    else:
+        attraction_coefficient = 1
+
+    depth = min(
+        BARNES_HUT_MAX_DEPTH,
+        max(1, ceil(log(max(n / BARNES_HUT_LEAF_SIZE, 1), 4))),
+    )
+
+    chunks = np.array_split(np.arange(n), max(1, workers))
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    old_forces = np.zeros((n, 2))
+    convergence = np.ones(n)
+
+    try:
+        for _ in range(iterations):
+            # Repulsion
+            if barnes_hut:
+                tree = QuadTree(positions, masses, depth)
+
+                def repulsion(nodes):
+                    return barnes_hut_repulsion(
+                        tree, positions, masses, nodes, scaling, theta
+                    )
+
+            else:
+
+                def repulsion(nodes):
+                    return exact_repulsion(positions, masses, nodes, scaling)
+
+            if pool is not None:
+                forces = sum(pool.map(repulsion, chunks))
+            else:
+                forces = repulsion(chunks[0])
+
+            # Gravity
+            distances = np.sqrt((positions**2).sum(axis=1))
+
+            if settings["strongGravityMode"]:
+                factors = scaling * masses * gravity
+            else:
+                factors = np.zeros(n)
+                mask = distances > 0
+                factors[mask] = scaling * masses[mask] * gravity / distances[mask]
+
+            forces -= positions * factors[:, None]
+
+            # Attraction
+            deltas = positions[sources] - positions[targets]
+
+            if settings["linLogMode"]:
+                lengths = np.sqrt((deltas**2).sum(axis=1))
+                factors = np.zeros(len(sources))
+                mask = lengths > 0
+                factors[mask] = (
+                    -attraction_coefficient
+                    * weights[mask]
+                    * np.log(1 + lengths[mask])
+                    / lengths[mask]
+                )
+            else:
+                factors = -attraction_coefficient * weights
+
+            if settings["outboundAttractionDistribution"]:
+                factors = factors / masses[sources]
+
+            for axis in range(2):
+                edge_forces = deltas[:, axis] * factors
+                forces[:, axis] += np.bincount(
+                    sources, weights=edge_forces, minlength=n
+                )
+                forces[:, axis] -= np.bincount(
+                    targets, weights=edge_forces, minlength=n
+                )
+
+            # Applying forces, with an adaptive speed per node
+            swinging = masses * np.sqrt(((old_forces - forces) ** 2).sum(axis=1))
+            traction = np.sqrt(((old_forces + forces) ** 2).sum(axis=1)) / 2
+
+            speeds = convergence * np.log1p(traction) / (1 + np.sqrt(swinging))
+            convergence = np.minimum(
+                1,
+                np.sqrt(speeds * (forces**2).sum(axis=1) / (1 + np.sqrt(swinging))),
+            )
+
+            positions = positions + forces * (speeds / settings["slowDown"])[:, None]
+            old_forces = forces
+
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return positions
+
+
+def compute_layout_from_table(
+    table,
+    iterations=100,
+    barnes_hut=True,
+    settings=None,
+    edge_weight=None,
+    layout=None,
+    workers=1,
+    seed=0,
+):
+    """
+    Function computing a ForceAtlas2 layout for the given graph table,
+    starting from the given layout, or from the nodes' x & y attributes,
+    or from random positions otherwise, as the widget would.
+    """
+    if np is None:
+        raise TypeError("computing a layout requires numpy to be installed")
+
+    if not isinstance(iterations, int) or iterations < 0:
+        raise TypeError("iterations should be a non-negative int")
+
+    if not isinstance(workers, int) or workers < 1:
+        raise TypeError("workers should be a positive int")
+
+    nodes = table.nodes
+    n = len(nodes)
+
+    rng = np.random.default_rng(seed)
+    positions = rng.random((n, 2))
+
+    for axis, name in enumerate(("x", "y")):
+        column = nodes.get_column(name)
+
+        if column is None:
+            continue
+
+        for i, v in enumerate(column):
+            if isinstance(v, (int, float)) and not isinstance(v, bool) and v == v:
+                positions[i, axis] = v
+
+    if layout is not None:
+        for i, key in enumerate(nodes.keys):
+            p = layout.get(key)
+
+            if p is not None:
+                positions[i] = (p["x"], p["y"])
+
+    node_index = table.node_index()
+
+    sources = []
+    targets = []
+    weights = [] if edge_weight is not None else None
+    weight_column = (
+        table.edges.get_column(edge_weight) if edge_weight is not None else None
+    )
+
+    for i, (source, target) in enumerate(table.edges.iter_keys()):
+        s = node_index.get(source)
+        t = node_index.get(target)
+
+        if s is None or t is None:
+            continue
+
+        sources.append(s)
+        targets.append(t)
+
+        if weights is not None:
+            w = weight_column[i] if weight_column is not None else MISSING
+
+            if isinstance(w, bool) or not isinstance(w, (int, float)) or w != w:
+                w = 1
+
+            weights.append(w)
+
+    positions = forceatlas2(
+        positions,
+        sources,
+        targets,
+        weights=weights,
+        iterations=iterations,
+        settings=settings,
+        barnes_hut=barnes_hut,
+        workers=workers,
+    )
+
+    return {
+        key: {"x": float(x), "y": float(y)}
+        for key, (x, y) in zip(nodes.keys, positions.tolist())
+    }
+
+
+def pack_layout(nodes, layout):
+    """
+    Function packing the given layout, i.e. a dict mapping node keys, or
+    their string representation (as sent by the widget), to {x, y} positions,
+    as float32 (x, y) pairs aligned with the given nodes. Positions of
+    missing nodes are NaN.
+    """
+    positions = array("f")
+    nan = float("nan")
+
+    for node in nodes:
+        p = layout.get(node)
+
+        if p is None:
+            p = layout.get(str(node))
+
+        if p is None:
+            positions.append(nan)
+            positions.append(nan)
+        else:
+            positions.append(p["x"])
+            positions.append(p["y"])
+
+    return positions
+
+
+def unpack_layout(nodes, data):
+    """
+    Function unpacking float32 (x, y) pairs aligned with the given nodes, as
+    a dict mapping node keys to {x, y} positions. Returns None if the data
+    does not match the number of nodes.
+    """
+    positions = array("f")
+    positions.frombytes(data[: len(data) - len(data) % positions.itemsize])
+
+    if len(positions) != 2 * len(nodes):
+        return None
+
+    layout = {}
+
+    for i, node in enumerate(nodes):
+        x = positions[2 * i]
+        y = positions[2 * i + 1]
+
+        if x != x or y != y:
+            continue
+
+        layout[node] = {"x": x, "y": y}
+
+    return layout
+
+
+def get_default_layout_cache_path():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+
+    return os.path.join(cache_home, "ipysigma", "layouts")
+
+
+class LayoutCache(object):
+    """
+    Class persisting layouts on disk, as float32 arrays of node positions
+    aligned with the nodes of a graph's table, and keyed by a fingerprint of
+    the graph's structure and of the layout's settings. Least recently used
+    layouts are evicted when the total size of the cache exceeds `max_size`.
+
+    Args:
+        path (str, optional): directory where layouts are stored. Defaults to
+            "ipysigma/layouts" in the user's cache directory.
+        max_size (int, optional): max total size of the cache, in bytes.
+            Defaults to 256MB.
+    """
+
+    def __init__(self, path=None, max_size=DEFAULT_LAYOUT_CACHE_MAX_SIZE):
+        if not isinstance(max_size, int) or max_size <= 0:
+            raise TypeError("max_size should be a positive int")
+
+        self.path = (
+            os.fspath(path) if path is not None else get_default_layout_cache_path()
+        )
+        self.max_size = max_size
+
+    def __repr__(self):
+        return "<LayoutCache path=%r max_size=%i>" % (self.path, self.max_size)
+
+    @staticmethod
+    def key(table, settings=None):
+        structure, _ = table.fingerprint()
+
+        h = blake2b(digest_size=16)
+        h.update(structure.encode())
+        h.update(json.dumps(settings, sort_keys=True, default=repr).encode())
+
+        return h.hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.path, key + LAYOUT_CACHE_EXTENSION)
+
+    def get(self, key, nodes):
+        """
+        Method returning the cached layout for the given key, as a dict
+        mapping the given node keys to {x, y} positions, or None if the
+        layout is not in the cache.
+        """
+        path = self.get_path(key)
+
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        layout = unpack_layout(nodes, data)
+
+        if layout is None:
+            return None
+
+        # NOTE: the file's modification time is used to evict the least
+        # recently used layouts
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return layout
+
+    def set(self, key, nodes, layout):
+        """
+        Method persisting the given layout, i.e. a dict mapping node keys,
+        or their string representation (as sent by the widget), to {x, y}
+        positions.
+        """
+        positions = pack_layout(nodes, layout)
+
+        os.makedirs(self.path, exist_ok=True)
+
+        path = self.get_path(key)
+        tmp_path = path + ".tmp"
+
+        # NOTE: writing to a temporary file first, so that concurrent readers
+        # never read a partially written layout
+        with open(tmp_path, "wb") as f:
+            positions.tofile(f)
+
+        os.replace(tmp_path, path)
+
+        self.evict()
+
+    def evict(self):
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return
+
+        entries = []
+
+        for name in names:
+            if not name.endswith(LAYOUT_CACHE_EXTENSION):
+                continue
+
+            path = os.path.join(self.path, name)
+
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+            total_size -= size
+
+    def clear(self):
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return
+
+        for name in names:
+            if name.endswith(LAYOUT_CACHE_EXTENSION):
+                os.remove(os.path.join(self.path, name))
+
+
+def resolve_layout_cache(target):
+    if target is None or target is False:
+        return None
+
+    if target is True:
+        return LayoutCache()
+
+    if isinstance(target, LayoutCache):
+        return target
+
+    if isinstance(target, (str, os.PathLike)):
+        return LayoutCache(target)
+
+    raise TypeError(
+        "layout_cache should be a boolean, a path or a LayoutCache instance"
+    )
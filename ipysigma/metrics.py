@@ -0,0 +1,376 @@
+# =============================================================================
+# ipysigma Kernel-Side Node Metrics
+# =============================================================================
+#
+# Node metrics computed by the kernel rather than by the widget's JavaScript
+# code, using igraph's C implementations when available, and networkx
+# otherwise. Results are added to the graph's table as regular columns, so
+# they are shipped to the widget like any other attribute.
+#
+# Results are cached per graph fingerprint, so that displaying the same graph
+# multiple times does not compute its metrics again, and expensive metrics of
+# large graphs can be computed in a process pool, in parallel, if enabled.
+#
+import atexit
+import random
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from ipysigma.interfaces import IGRAPH_INSTALLED, NETWORKX_INSTALLED, ig, nx
+
+DEFAULT_PAGERANK_ALPHA = 0.85
+DEFAULT_BETWEENNESS_SAMPLES = 500
+DEFAULT_COMMUNITIES_RESOLUTION = 1
+DEFAULT_METRICS_SEED = 0
+
+# NOTE: metrics whose cost is not roughly linear in the size of the graph are
+# computed in a process pool, if the graph is large enough for the pool's
+# overhead to be worth it
+EXPENSIVE_NODE_METRICS = {"betweenness", "communities"}
+PROCESS_POOL_EDGE_THRESHOLD = 100_000
+
+WEIGHTED_NODE_METRICS = {"weighted_degree", "pagerank", "communities"}
+
+METRICS_CACHE_SIZE = 64
+METRICS_CACHE = OrderedDict()
+
+PROCESS_POOL = None
+
+
+def get_process_pool():
+    global PROCESS_POOL
+
+    # NOTE: forking a multi-threaded process, such as a jupyter kernel, may
+    # deadlock, hence the spawn start method
+    if PROCESS_POOL is None:
+        PROCESS_POOL = ProcessPoolExecutor(
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    return PROCESS_POOL
+
+
+def close_process_pool():
+    global PROCESS_POOL
+
+    if PROCESS_POOL is not None:
+        PROCESS_POOL.shutdown()
+        PROCESS_POOL = None
+
+
+atexit.register(close_process_pool)
+
+
+def clear_metrics_cache():
+    METRICS_CACHE.clear()
+
+
+class MetricGraph(object):
+    """
+    Minimal picklable representation of a graph, whose nodes are referenced
+    by their index in the graph's table, used to compute metrics.
+    """
+
+    __slots__ = ("order", "edges", "weights", "is_directed")
+
+    def __init__(self, order, edges, weights=None, is_directed=False):
+        self.order = order
+        self.edges = edges
+        self.weights = weights
+        self.is_directed = is_directed
+
+    def __getstate__(self):
+        return (self.order, self.edges, self.weights, self.is_directed)
+
+    def __setstate__(self, state):
+        self.order, self.edges, self.weights, self.is_directed = state
+
+    def iter_weights(self):
+        if self.weights is None:
+            return (1 for _ in self.edges)
+
+        return iter(self.weights)
+
+    @classmethod
+    def from_table(cls, table, edge_weight=None):
+        node_index = table.node_index()
+        weight_column = (
+            table.edges.get_column(edge_weight) if edge_weight is not None else None
+        )
+
+        edges = []
+        weights = [] if weight_column is not None else None
+
+        for i, (source, target) in enumerate(table.edges.iter_keys()):
+            s = node_index.get(source)
+            t = node_index.get(target)
+
+            if s is None or t is None:
+                continue
+
+            edges.append((s, t))
+
+            if weights is not None:
+                weights.append(sanitize_weight(weight_column[i]))
+
+        return cls(
+            len(table.nodes), edges, weights=weights, is_directed=table.is_directed
+        )
+
+
+def sanitize_weight(v):
+    if isinstance(v, bool) or not isinstance(v, (int, float)) or v != v:
+        return 1
+
+    return v
+
+
+def get_cache_key(fingerprint, spec):
+    structure, weights = fingerprint
+
+    if spec["name"] not in WEIGHTED_NODE_METRICS:
+        weights = None
+
+    key = (structure, weights, tuple(sorted(spec.items())))
+
+    try:
+        hash(key)
+    except TypeError:
+        return None
+
+    return key
+
+
+def get_samples(graph, spec):
+    samples = spec.get("samples", DEFAULT_BETWEENNESS_SAMPLES)
+
+    if samples is None or samples >= graph.order:
+        return None
+
+    rng = random.Random(spec.get("seed", DEFAULT_METRICS_SEED))
+
+    return rng.sample(range(graph.order), samples)
+
+
+def compute_degree(graph, weighted=False):
+    degrees = [0] * graph.order
+    weights = graph.iter_weights() if weighted else (1 for _ in graph.edges)
+
+    for (s, t), w in zip(graph.edges, weights):
+        degrees[s] += w
+        degrees[t] += w
+
+    return degrees
+
+
+def to_igraph(graph):
+    g = ig.Graph(n=graph.order, edges=graph.edges, directed=graph.is_directed)
+
+    if graph.weights is not None:
+        g.es["weight"] = graph.weights
+
+    return g
+
+
+def compute_metric_with_igraph(graph, spec):
+    name = spec["name"]
+    g = to_igraph(graph)
+    weights = "weight" if graph.weights is not None else None
+
+    if name == "pagerank":
+        return g.pagerank(
+            directed=graph.is_directed,
+            damping=spec.get("alpha", DEFAULT_PAGERANK_ALPHA),
+            weights=weights,
+        )
+
+    if name == "kcore":
+        return g.coreness(mode="all")
+
+    if name == "betweenness":
+        sources = get_samples(graph, spec)
+
+        if sources is None:
+            return g.betweenness(directed=graph.is_directed)
+
+        scale = graph.order / len(sources)
+
+        return [
+            v * scale
+            for v in g.betweenness(directed=graph.is_directed, sources=sources)
+        ]
+
+    if name == "communities":
+        if graph.is_directed:
+            g = g.as_undirected(
+                mode="collapse",
+                combine_edges="sum" if weights is not None else None,
+            )
+
+        # NOTE: igraph relies on the random module by default, which is
+        # seeded locally so that results are reproducible
+        ig.set_random_number_generator(
+            random.Random(spec.get("seed", DEFAULT_METRICS_SEED))
+        )
+
+        try:
+            clustering = g.community_multilevel(
+                weights=weights,
+                resolution=spec.get("resolution", DEFAULT_COMMUNITIES_RESOLUTION),
+            )
+        finally:
+            ig.set_random_number_generator(random)
+
+        return clustering.membership
+
+    raise TypeError('unknown metric "%s"' % name)
+
+
+def to_networkx(graph):
+    g = nx.DiGraph() if graph.is_directed else nx.Graph()
+    g.add_nodes_from(range(graph.order))
+
+    # NOTE: parallel edges are merged, summing their weights
+    for (s, t), w in zip(graph.edges, graph.iter_weights()):
+        if g.has_edge(s, t):
+            g[s][t]["weight"] += w
+        else:
+            g.add_edge(s, t, weight=w)
+
+    return g
+
+
+def compute_metric_with_networkx(graph, spec):
+    name = spec["name"]
+    g = to_networkx(graph)
+    weight = "weight" if graph.weights is not None else None
+
+    if name == "pagerank":
+        result = nx.pagerank(
+            g, alpha=spec.get("alpha", DEFAULT_PAGERANK_ALPHA), weight=weight
+        )
+
+    elif name == "kcore":
+        g.remove_edges_from(list(nx.selfloop_edges(g)))
+        result = nx.core_number(g)
+
+    elif name == "betweenness":
+        samples = spec.get("samples", DEFAULT_BETWEENNESS_SAMPLES)
+
+        result = nx.betweenness_centrality(
+            g,
+            k=samples if samples is not None and samples < graph.order else None,
+            normalized=False,
+            seed=spec.get("seed", DEFAULT_METRICS_SEED),
+        )
+
+    elif name == "communities":
+        communities = nx.community.louvain_communities(
+            g,
+            weight=weight,
+            resolution=spec.get("resolution", DEFAULT_COMMUNITIES_RESOLUTION),
+            seed=spec.get("seed", DEFAULT_METRICS_SEED),
+        )
+
+        result = {}
+
+        for i, community in enumerate(communities):
+            for node in community:
+                result[node] = i
+
+    else:
+        raise TypeError('unknown metric "%s"' % name)
+
+    return [result[i] for i in range(graph.order)]
+
+
+def compute_metric(graph, spec):
+    """
+    Function computing a single node metric over the given MetricGraph,
+    returning a list of values aligned with the graph's nodes. This function
+    is run by the process pool's workers.
+    """
+    name = spec["name"]
+
+    if name == "degree":
+        return compute_degree(graph)
+
+    if name == "weighted_degree":
+        return compute_degree(graph, weighted=True)
+
+    if IGRAPH_INSTALLED:
+        return compute_metric_with_igraph(graph, spec)
+
+    if NETWORKX_INSTALLED:
+        return compute_metric_with_networkx(graph, spec)
+
+    raise TypeError(
+        'computing the "%s" node metric requires either igraph or networkx to be installed'
+        % name
+    )
+
+
+def compute_node_metrics(table, metrics, edge_weight=None, process_pool=False):
+    """
+    Function computing the given node metrics on the kernel's side, and
+    adding their results to the table's nodes as columns named after the
+    attribute each metric targets.
+
+    Args:
+        table (GraphTable): the graph's table.
+        metrics (dict): mapping from attribute names to metric specs, as
+            returned by `resolve_metrics`.
+        edge_weight (str, optional): name of the edge attribute holding the
+            weights used by weighted metrics. Defaults to None.
+        process_pool (bool, optional): whether to compute expensive metrics
+            of large graphs in a process pool. Defaults to False.
+    """
+    if not metrics:
+        return
+
+    fingerprint = table.fingerprint(edge_weight)
+    graph = None
+
+    results = {}
+    futures = {}
+
+    for attr_name, spec in metrics.items():
+        cache_key = get_cache_key(fingerprint, spec)
+
+        if cache_key is not None and cache_key in METRICS_CACHE:
+            METRICS_CACHE.move_to_end(cache_key)
+            results[attr_name] = METRICS_CACHE[cache_key]
+            continue
+
+        if graph is None:
+            graph = MetricGraph.from_table(table, edge_weight)
+
+        if (
+            process_pool
+            and spec["name"] in EXPENSIVE_NODE_METRICS
+            and len(graph.edges) >= PROCESS_POOL_EDGE_THRESHOLD
+        ):
+            futures[attr_name] = (
+                cache_key,
+                get_process_pool().submit(compute_metric, graph, spec),
+            )
+            continue
+
+        results[attr_name] = compute_metric(graph, spec)
+
+        if cache_key is not None:
+            METRICS_CACHE[cache_key] = results[attr_name]
+
+    for attr_name, (cache_key, future) in futures.items():
+        results[attr_name] = future.result()
+
+        if cache_key is not None:
+            METRICS_CACHE[cache_key] = results[attr_name]
+
+    while len(METRICS_CACHE) > METRICS_CACHE_SIZE:
+        METRICS_CACHE.popitem(last=False)
+
+    # NOTE: results are never mutated, so cached lists can be shared
+    for attr_name, column in results.items():
+        table.nodes.set_column(attr_name, column)
@@ -0,0 +1,660 @@
+# =============================================================================
+# ipysigma Graph Serialization
+# =============================================================================
+#
+# Functions used to serialize the graph's data before sending it to the
+# widget's JavaScript code, either as JSON or in a columnar fashion, so that
+# it can be sent as compact binary buffers rather than as a large list of
+# JSON objects.
+#
+# Note that, in both formats, edges reference their source & target using
+# the index of the related node in the serialized nodes, rather than
+# repeating their keys.
+#
+# Very large graphs can also be sent progressively, in chunks requested by
+# the widget, after an initial header describing the graph.
+#
+# Finally, widgets displaying a same graph (e.g. the views of a SigmaGrid)
+# can share a base serialization of the graph, each widget then only sending
+# an overlay of its own attributes.
+#
+import sys
+import weakref
+from math import ceil
+from uuid import uuid4
+from collections import OrderedDict
+from array import array
+from numbers import Number, Integral
+from datetime import date, datetime
+
+from ipysigma.shim import np, pd, is_nan
+from ipysigma.table import MISSING, MissingType
+from ipysigma.constants import KWARG_ATTRIBUTE_PREFIX
+
+INT32_BOUNDS = (-(2**31), 2**31 - 1)
+INT8_BOUNDS = (-(2**7), 2**7 - 1)
+INT16_BOUNDS = (-(2**15), 2**15 - 1)
+
+DEFAULT_GRAPH_CACHE_MAX_SIZE = 512 * 1024 * 1024
+
+# NOTE: rough estimate, in bytes, of the memory taken by a single value held
+# by a table, i.e. a list slot pointing to a boxed python object
+TABLE_VALUE_SIZE_ESTIMATE = 40
+
+
+# NOTE: values of those types never need to be sanitized
+CLEAN_TYPES = (str, bool, int, type(None))
+
+
+def identity(v):
+    return v
+
+
+def sanitize_float(v):
+    return None if v != v else v
+
+
+def sanitize_number(v):
+    return None if is_nan(v) else v
+
+
+def sanitize_date(v):
+    return v.isoformat()
+
+
+def sanitize_missing(v):
+    return None
+
+
+def sanitize_numpy_scalar(v):
+    return sanitize_value(v.item())
+
+
+def sanitize_numpy_datetime(v):
+    if np.isnat(v):
+        return None
+
+    # NOTE: nanosecond datetimes cannot be converted to python datetimes
+    return v.astype("datetime64[us]").item().isoformat()
+
+
+def get_type_sanitizer(t):
+    """
+    Function returning the function able to sanitize values of the given type
+    so they can be serialized as JSON, or None if values of this type never
+    need to be sanitized.
+    """
+    if t is MissingType:
+        return sanitize_missing
+
+    if issubclass(t, CLEAN_TYPES) and not (
+        np is not None and issubclass(t, np.generic)
+    ):
+        return None
+
+    if pd is not None and (t is type(pd.NA) or t is type(pd.NaT)):
+        return sanitize_missing
+
+    if np is not None and issubclass(t, np.generic):
+        if issubclass(t, np.datetime64):
+            return sanitize_numpy_datetime
+
+        return sanitize_numpy_scalar
+
+    if t is float:
+        return sanitize_float
+
+    if issubclass(t, Number):
+        return sanitize_number
+
+    if issubclass(t, (date, datetime)):
+        return sanitize_date
+
+    return None
+
+
+TYPE_SANITIZERS = {}
+
+
+def get_cached_type_sanitizer(t):
+    try:
+        return TYPE_SANITIZERS[t]
+    except KeyError:
+        sanitizer = get_type_sanitizer(t)
+        TYPE_SANITIZERS[t] = sanitizer
+        return sanitizer
+
+
+def sanitize_value(v):
+    sanitizer = get_cached_type_sanitizer(type(v))
+
+    return v if sanitizer is None else sanitizer(v)
+
+
+def get_value_kind(v) -> str:
+    if isinstance(v, bool):
+        return "boolean"
+
+    if isinstance(v, Number) and not isinstance(v, complex):
+        return "number"
+
+    if isinstance(v, str):
+        return "string"
+
+    return "json"
+
+
+def infer_column_kind(values) -> str:
+    kind = None
+
+    for v in values:
+        if v is None:
+            continue
+
+        value_kind = get_value_kind(v)
+
+        if kind is None:
+            kind = value_kind
+        elif kind != value_kind:
+            return "json"
+
+    return kind if kind is not None else "json"
+
+
+def to_buffer(typecode, values):
+    data = array(typecode, values)
+
+    # NOTE: JavaScript typed arrays use the platform's endianness, which is
+    # little endian for virtually every browser out there
+    if sys.byteorder == "big":
+        data.byteswap()
+
+    return memoryview(data).cast("B")
+
+
+def smallest_int_dtype(low, high):
+    if low >= INT8_BOUNDS[0] and high <= INT8_BOUNDS[1]:
+        return "int8", "b"
+
+    if low >= INT16_BOUNDS[0] and high <= INT16_BOUNDS[1]:
+        return "int16", "h"
+
+    return "int32", "i"
+
+
+def encode_column(name, values):
+    """
+    Function encoding a list of attribute values (where None, NaN or MISSING
+    mean the value is missing) into a serialized column.
+
+    Numbers are sent as typed arrays, booleans as int8 arrays (-1 meaning
+    missing), strings are dictionary encoded and anything else is kept
+    as a JSON list.
+    """
+    values = sanitize_column(values, keep_missing=False)
+    kind = infer_column_kind(values)
+
+    column = {"name": name, "type": kind}
+
+    if kind == "number":
+        if all(
+            isinstance(v, Integral) and INT32_BOUNDS[0] <= v <= INT32_BOUNDS[1]
+            for v in values
+        ):
+            column["dtype"] = "int32"
+            column["data"] = to_buffer("i", (int(v) for v in values))
+        else:
+            column["dtype"] = "float64"
+            column["data"] = to_buffer(
+                "d", (float("nan") if v is None else float(v) for v in values)
+            )
+
+    elif kind == "boolean":
+        column["dtype"] = "int8"
+        column["data"] = to_buffer("b", (-1 if v is None else int(v) for v in values))
+
+    elif kind == "string":
+        categories = {}
+        codes = []
+
+        for v in values:
+            if v is None:
+                codes.append(-1)
+                continue
+
+            code = categories.get(v)
+
+            if code is None:
+                code = len(categories)
+                categories[v] = code
+
+            codes.append(code)
+
+        dtype, typecode = smallest_int_dtype(-1, len(categories))
+
+        column["dtype"] = dtype
+        column["categories"] = list(categories)
+        column["data"] = to_buffer(typecode, codes)
+
+    else:
+        column["data"] = values
+
+    return column
+
+
+def sanitize_column(values, keep_missing=True):
+    """
+    Function sanitizing a column of attribute values so they can be
+    serialized as JSON. NaN & NA values become None, dates are converted to
+    ISO strings and numpy scalars to their python counterpart.
+
+    Values are dispatched on their type, so that columns whose types never
+    need to be sanitized (e.g. strings or integers), or float columns without
+    any NaN, are returned as-is without being copied.
+
+    MISSING values are kept as-is, unless `keep_missing` is False, in which
+    case they become None.
+    """
+    sanitizers = {}
+
+    for t in set(map(type, values)):
+        sanitizer = get_cached_type_sanitizer(t)
+
+        if sanitizer is not None and not (keep_missing and t is MissingType):
+            sanitizers[t] = sanitizer
+
+    if not sanitizers:
+        return values
+
+    # NOTE: float columns very rarely contain NaN values
+    if sanitizers.keys() == {float} and not any(v != v for v in values):
+        return values
+
+    # NOTE: types that do not need sanitizing fall back to identity
+    get = sanitizers.get
+
+    return [get(type(v), identity)(v) for v in values]
+
+
+def sanitize_attributes(attr):
+    return {k: sanitize_value(v) for k, v in attr.items()}
+
+
+def encode_items_columns(items):
+    # NOTE: columns without any value would not produce attributes anyway
+    return [
+        encode_column(name, column)
+        for name, column in items.columns.items()
+        if any(v is not MISSING for v in column)
+    ]
+
+
+def serialize_options(is_directed, is_multi):
+    return {
+        "type": "directed" if is_directed else "undirected",
+        "multi": is_multi,
+    }
+
+
+def serialize_attributes_json(items):
+    return list(items.map_columns(sanitize_column).iter_attributes())
+
+
+def serialize_nodes_json(nodes):
+    return [
+        {"key": key, "attributes": attr}
+        for key, attr in zip(nodes.keys, serialize_attributes_json(nodes))
+    ]
+
+
+def serialize_edges_json(node_index, edges):
+    return [
+        {
+            "source": node_index[source],
+            "target": node_index[target],
+            "attributes": attr,
+        }
+        for source, target, attr in zip(
+            edges.sources, edges.targets, serialize_attributes_json(edges)
+        )
+    ]
+
+
+def encode_order(order):
+    dtype, typecode = smallest_int_dtype(0, len(order))
+
+    return {"dtype": dtype, "data": to_buffer(typecode, order)}
+
+
+def serialize_order(table):
+    """
+    Function serializing the permutations in which the nodes & edges of the
+    given graph table should be added to the graph by the widget (e.g. to
+    follow their zindex), so that the table itself does not need to be
+    reordered. Returns None if items should be added in their current order.
+    """
+    order = {}
+
+    if table.nodes.order is not None:
+        order["nodes"] = encode_order(table.nodes.order)
+
+    if table.edges.order is not None:
+        order["edges"] = encode_order(table.edges.order)
+
+    return order or None
+
+
+def serialize_graph_json(table):
+    """
+    Function serializing the given graph table into a JSON format, close to
+    graphology's JSON serialization, that the widget knows how to decode.
+    """
+    node_index = table.node_index()
+
+    data = {
+        "format": "json",
+        "options": serialize_options(table.is_directed, table.is_multi),
+        "nodes": serialize_nodes_json(table.nodes),
+        "edges": serialize_edges_json(node_index, table.edges),
+    }
+
+    order = serialize_order(table)
+
+    if order is not None:
+        data["order"] = order
+
+    return data
+
+
+def encode_endpoints(node_index, endpoints):
+    dtype, typecode = smallest_int_dtype(0, len(node_index))
+
+    return {
+        "dtype": dtype,
+        "data": to_buffer(typecode, (node_index[key] for key in endpoints)),
+    }
+
+
+def encode_nodes_columns(nodes):
+    return {
+        "keys": list(nodes.keys),
+        "columns": encode_items_columns(nodes),
+    }
+
+
+def encode_edges_columns(node_index, edges):
+    return {
+        "sources": encode_endpoints(node_index, edges.sources),
+        "targets": encode_endpoints(node_index, edges.targets),
+        "columns": encode_items_columns(edges),
+    }
+
+
+def serialize_graph_columns(table):
+    """
+    Function serializing the given graph table into a columnar format that
+    the widget knows how to decode.
+
+    Note that, in this format, None & NaN values are considered as missing,
+    and the related attributes will therefore not be set on the JavaScript
+    side.
+    """
+    node_index = table.node_index()
+
+    data = {
+        "format": "columnar",
+        "options": serialize_options(table.is_directed, table.is_multi),
+        "nodes": encode_nodes_columns(table.nodes),
+        "edges": encode_edges_columns(node_index, table.edges),
+    }
+
+    order = serialize_order(table)
+
+    if order is not None:
+        data["order"] = order
+
+    return data
+
+
+class GraphChunker(object):
+    """
+    Class holding a graph table so that it can be serialized lazily, in
+    chunks of at most `chunk_size` items, nodes first, then edges. Each chunk
+    is encoded using the same format (JSON or columnar) as the one that would
+    be used to serialize the whole graph.
+    """
+
+    def __init__(self, table, chunk_size, columnar=False):
+        self.table = table
+        self.chunk_size = chunk_size
+        self.columnar = columnar
+
+        self.node_index = table.node_index()
+        self.node_chunks = ceil(len(table.nodes) / chunk_size)
+        self.edge_chunks = ceil(len(table.edges) / chunk_size)
+
+    def __len__(self):
+        return self.node_chunks + self.edge_chunks
+
+    def header(self):
+        return {
+            "format": "chunked",
+            "encoding": "columnar" if self.columnar else "json",
+            "options": serialize_options(self.table.is_directed, self.table.is_multi),
+            "chunks": len(self),
+            "order": len(self.table.nodes),
+            "size": len(self.table.edges),
+        }
+
+    def chunk(self, index):
+        if index < 0 or index >= len(self):
+            raise IndexError("chunk index out of range")
+
+        if index < self.node_chunks:
+            start = index * self.chunk_size
+            nodes = self.table.nodes.slice(start, start + self.chunk_size)
+
+            if self.columnar:
+                return {"nodes": encode_nodes_columns(nodes)}
+
+            return {"nodes": serialize_nodes_json(nodes)}
+
+        start = (index - self.node_chunks) * self.chunk_size
+        edges = self.table.edges.slice(start, start + self.chunk_size)
+
+        if self.columnar:
+            return {"edges": encode_edges_columns(self.node_index, edges)}
+
+        return {"edges": serialize_edges_json(self.node_index, edges)}
+
+    def serialize(self):
+        serialize = serialize_graph_columns if self.columnar else serialize_graph_json
+
+        return serialize(self.table)
+
+
+def project_overlay_columns(items, base_items=None):
+    items = items.copy()
+    items.project(
+        [
+            k
+            for k in items.columns
+            if k.startswith(KWARG_ATTRIBUTE_PREFIX)
+            or (base_items is not None and k not in base_items.columns)
+        ]
+    )
+
+    return items
+
+
+def serialize_graph_overlay(key, table, columnar=False, base=None):
+    """
+    Function serializing the attributes computed from the kwargs of a widget
+    for the given graph table, whose items must follow the order of the
+    shared graph having the given key. Items can still be reordered by the
+    widget (e.g. to follow their zindex) if the table has an order.
+
+    If the shared graph's own table is given as `base`, the columns it does
+    not have (e.g. kernel-side node metrics) are also serialized.
+    """
+    base_nodes = base.nodes if base is not None else None
+    base_edges = base.edges if base is not None else None
+
+    nodes = project_overlay_columns(table.nodes, base_nodes)
+    edges = project_overlay_columns(table.edges, base_edges)
+
+    if columnar:
+        data = {
+            "format": "overlay",
+            "key": key,
+            "encoding": "columnar",
+            "nodes": {"columns": encode_items_columns(nodes)},
+            "edges": {"columns": encode_items_columns(edges)},
+        }
+    else:
+        data = {
+            "format": "overlay",
+            "key": key,
+            "encoding": "json",
+            "nodes": serialize_attributes_json(nodes),
+            "edges": serialize_attributes_json(edges),
+        }
+
+    order = serialize_order(table)
+
+    if order is not None:
+        data["order"] = order
+
+    return data
+
+
+class SharedGraph(object):
+    """
+    Class holding the table of a graph displayed by multiple widgets
+    (typically the views of a SigmaGrid), so that the graph only needs to be
+    walked & serialized once. The serialized graph is then registered on the
+    JavaScript side under a unique key, and each widget only needs to send an
+    overlay of its own attributes.
+    """
+
+    def __init__(self):
+        self.key = "SharedGraph_" + uuid4().hex
+        self.table = None
+        self.node_type = None
+        self.process_gexf_viz = None
+        self.registered = False
+        self.payloads = {}
+
+    def is_ready(self):
+        return self.table is not None
+
+    def set_table(self, table, node_type, process_gexf_viz):
+        self.table = table.copy()
+        self.node_type = node_type
+        self.process_gexf_viz = process_gexf_viz
+
+    def get_table(self):
+        return self.table.copy()
+
+    def serialize(self, columnar=False):
+        payload = self.payloads.get(columnar)
+
+        if payload is None:
+            serialize = serialize_graph_columns if columnar else serialize_graph_json
+            payload = serialize(self.table)
+            self.payloads[columnar] = payload
+
+        return payload
+
+    def estimate_size(self):
+        """
+        Method returning a rough estimate of the memory taken by the shared
+        graph's table and serialized payloads, in bytes.
+        """
+        if self.table is None:
+            return 0
+
+        size = 0
+
+        for items in (self.table.nodes, self.table.edges):
+            size += len(items) * (len(items.columns) + 1) * TABLE_VALUE_SIZE_ESTIMATE
+
+        # NOTE: payloads take roughly as much memory as the table itself
+        return size * (1 + len(self.payloads))
+
+
+class GraphCache(object):
+    """
+    Class holding an in-process LRU cache of SharedGraph instances, so that
+    widgets repeatedly built on a same unchanged graph do not need to walk &
+    serialize it again, and only need to resolve their visual variables.
+    Least recently used graphs are evicted when the estimated memory taken by
+    the cache exceeds `max_size`.
+
+    Args:
+        max_size (int, optional): memory budget of the cache, in bytes.
+            Defaults to 512MB.
+    """
+
+    def __init__(self, max_size=DEFAULT_GRAPH_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, graph=None):
+        """
+        Method returning the SharedGraph cached under the given key, or None.
+        If a graph is given, the entry must have been cached for this very
+        graph object, since fingerprints relying on ids can be reused once
+        the original graph has been garbage collected.
+        """
+        entry = self.entries.get(key)
+
+        if entry is None:
+            return None
+
+        shared_graph, ref = entry
+
+        if ref is not None and ref() is not graph:
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+
+        return shared_graph
+
+    def set(self, key, shared_graph, graph=None):
+        ref = None
+
+        if graph is not None:
+            try:
+                ref = weakref.ref(graph)
+            except TypeError:
+                return
+
+        self.entries[key] = (shared_graph, ref)
+        self.entries.move_to_end(key)
+
+        self.evict()
+
+    def evict(self):
+        total_size = sum(
+            shared_graph.estimate_size() for shared_graph, _ in self.entries.values()
+        )
+
+        # NOTE: the most recently used graph is always kept
+        while total_size > self.max_size and len(self.entries) > 1:
+            _, (shared_graph, _) = self.entries.popitem(last=False)
+            total_size -= shared_graph.estimate_size()
+
+    def clear(self):
+        self.entries.clear()
+
+
+GRAPH_CACHE = GraphCache()
+
+
+def clear_graph_cache():
+    GRAPH_CACHE.clear()
@@ -8,6 +8,11 @@ try:
 except ImportError:
     pd = None
 
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
 import math
 from numbers import Number
 
@@ -26,3 +31,23 @@ def is_nan(v) -> bool:
         return True
 
     return False
+
+
+def is_numpy_array(v) -> bool:
+    return np is not None and isinstance(v, np.ndarray)
+
+
+def is_pandas_series(v) -> bool:
+    return pd is not None and isinstance(v, pd.Series)
+
+
+def is_pandas_categorical(v) -> bool:
+    return pd is not None and isinstance(v, pd.Categorical)
+
+
+def is_pandas_dataframe(v) -> bool:
+    return pd is not None and isinstance(v, pd.DataFrame)
+
+
+def is_pyarrow_table(v) -> bool:
+    return pa is not None and isinstance(v, pa.Table)
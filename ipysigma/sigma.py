@@ -5,24 +5,52 @@
 # =============================================================================
 #
 #
+import asyncio
+from uuid import uuid4
+from base64 import standard_b64encode
 from ipywidgets import DOMWidget, Output
 from ipywidgets.embed import embed_minimal_html
+from ipywidgets.widgets.widget import _remove_buffers
 from IPython.display import Image, display
-from traitlets import Unicode, Dict, Int, Bool, Tuple, List, Float
-from collections.abc import Iterable
+from traitlets import Unicode, Dict, Int, Bool, Tuple, List, Float, Any
+from collections.abc import Iterable, Mapping
 from ._frontend import module_name, module_version
 
-from ipysigma.interfaces import get_graph_interface, check_graph_is_valid
+from ipysigma.interfaces import (
+    get_graph_interface,
+    check_graph_is_valid,
+    TablesGraph,
+)
 from ipysigma.utils import (
-    fix_items_for_json_serialization,
     pretty_print_int,
     pretty_print_type_name,
+    resolve_attributes,
     resolve_metrics,
-    resolve_variable,
-    sort_items_per_zindex,
+    resolve_kernel_sync,
+    compute_order_per_attribute,
     VisualVariableBuilder,
 )
 from ipysigma.gexf import process_node_gexf_viz, process_edge_gexf_viz
+from ipysigma.metrics import compute_node_metrics, close_process_pool
+from ipysigma.layout import (
+    compute_layout_from_table,
+    resolve_layout_cache,
+    pack_layout,
+    unpack_layout,
+    LayoutCache,
+)
+from ipysigma.shim import np
+from ipysigma.table import GraphTable
+from ipysigma.serialization import (
+    serialize_graph_json,
+    serialize_graph_columns,
+    serialize_graph_overlay,
+    sanitize_attributes,
+    encode_column,
+    GraphChunker,
+    SharedGraph,
+    GRAPH_CACHE,
+)
 from ipysigma.constants import (
     DEFAULT_MAX_CATEGORICAL_COLORS,
     DEFAULT_HEIGHT,
@@ -47,12 +75,184 @@ from ipysigma.constants import (
     DEFAULT_CAMERA_STATE,
     SUPPORTED_NODE_TYPES,
     SUPPORTED_NODE_METRICS,
+    WIDGET_NODE_METRICS,
+    KERNEL_NODE_METRICS,
     SUPPORTED_UNDIRECTED_EDGE_TYPES,
     SUPPORTED_DIRECTED_EDGE_TYPES,
     SUPPORTED_SYNC_TARGETS,
+    DEFAULT_KERNEL_SYNC_INTERVAL,
+    KWARG_ATTRIBUTE_PREFIX,
 )
 
 
+# NOTE: kwargs related to visual variables, which can be changed afterwards
+# using Sigma.restyle
+VISUAL_VARIABLE_KWARGS = (
+    "node_color",
+    "raw_node_color",
+    "node_color_gradient",
+    "node_color_scale",
+    "node_color_palette",
+    "default_node_color",
+    "node_color_saturation",
+    "raw_node_color_saturation",
+    "node_color_saturation_scale",
+    "node_color_saturation_range",
+    "default_node_color_saturation",
+    "node_border_color",
+    "raw_node_border_color",
+    "node_border_color_gradient",
+    "node_border_color_palette",
+    "default_node_border_color",
+    "node_border_color_from",
+    "node_border_ratio",
+    "raw_node_border_ratio",
+    "node_border_ratio_range",
+    "default_node_border_ratio",
+    "node_border_size",
+    "raw_node_border_size",
+    "node_border_size_range",
+    "default_node_border_size",
+    "node_pictogram",
+    "raw_node_pictogram",
+    "node_pictogram_mapping",
+    "default_node_pictogram",
+    "node_pictogram_color",
+    "raw_node_pictogram_color",
+    "node_pictogram_color_palette",
+    "default_node_pictogram_color",
+    "node_shape",
+    "raw_node_shape",
+    "node_shape_mapping",
+    "default_node_shape",
+    "node_halo_size",
+    "raw_node_halo_size",
+    "node_halo_size_range",
+    "node_halo_size_scale",
+    "default_node_halo_size",
+    "node_halo_color",
+    "raw_node_halo_color",
+    "node_halo_color_gradient",
+    "node_halo_color_scale",
+    "node_halo_color_palette",
+    "default_node_halo_color",
+    "node_size",
+    "raw_node_size",
+    "node_size_range",
+    "node_size_scale",
+    "default_node_size",
+    "raw_node_label",
+    "node_label",
+    "default_node_label",
+    "node_label_size",
+    "raw_node_label_size",
+    "node_label_size_range",
+    "default_node_label_size",
+    "node_label_color",
+    "raw_node_label_color",
+    "node_label_color_palette",
+    "default_node_label_color",
+    "edge_color",
+    "raw_edge_color",
+    "edge_color_palette",
+    "edge_color_gradient",
+    "edge_color_scale",
+    "edge_color_from",
+    "default_edge_color",
+    "edge_size",
+    "raw_edge_size",
+    "edge_size_range",
+    "edge_size_scale",
+    "default_edge_size",
+    "default_edge_curveness",
+    "raw_edge_label",
+    "edge_label",
+    "default_edge_label",
+)
+
+
+# =============================================================================
+# Helpers
+# =============================================================================
+def resolve_default_node_type(visual_variables):
+    """
+    Function returning the default node type (i.e. the webgl program) the
+    widget should use to render the given visual variables, after checking
+    that they can be used together.
+    """
+    must_render_node_borders = visual_variables["nodeBorderColor"][
+        "type"
+    ] != "disabled" and (
+        visual_variables["nodeBorderSize"]["type"] != "disabled"
+        or visual_variables["nodeBorderRatio"]["type"] != "disabled"
+    )
+
+    must_render_node_halos = (
+        visual_variables["nodeHaloColor"]["type"] != "disabled"
+        and visual_variables["nodeHaloSize"]["type"] != "disabled"
+    )
+
+    if visual_variables["nodeShape"]["type"] != "disabled":
+        if must_render_node_borders:
+            raise TypeError("cannot use node borders with node shapes together")
+
+        if must_render_node_halos:
+            raise TypeError("cannot use node halos and node shapes together")
+
+        if visual_variables["nodePictogram"]["type"] != "disabled":
+            raise TypeError("cannot use node pictograms and node shapes together")
+
+    need_to_render_pictograms = (
+        visual_variables["nodePictogram"]["type"] != "disabled"
+    )
+
+    need_to_render_shapes = visual_variables["nodeShape"]["type"] != "disabled"
+
+    default_node_type = "point"
+
+    if must_render_node_borders:
+        default_node_type = "border"
+
+        if need_to_render_pictograms:
+            default_node_type = "border+picto"
+
+            if must_render_node_halos:
+                default_node_type = "border+halo+picto"
+
+        elif must_render_node_halos:
+            default_node_type = "border+halo"
+
+    elif need_to_render_pictograms:
+        default_node_type = "picto"
+
+        if must_render_node_halos:
+            default_node_type = "halo+picto"
+
+    elif need_to_render_shapes:
+        default_node_type = "shape"
+
+    elif must_render_node_halos:
+        default_node_type = "halo"
+
+    return default_node_type
+
+
+def embed_state_value(state, name, value):
+    value_state, buffer_paths, buffers = _remove_buffers({name: value})
+
+    state["state"][name] = value_state[name]
+
+    if buffers:
+        state.setdefault("buffers", []).extend(
+            {
+                "encoding": "base64",
+                "path": path,
+                "data": standard_b64encode(buffer).decode("ascii"),
+            }
+            for path, buffer in zip(buffer_paths, buffers)
+        )
+
+
 # =============================================================================
 # Widget definition
 # =============================================================================
@@ -76,18 +276,65 @@ class Sigma(DOMWidget):
             the layout algorithm when mounting the widget. If a number is given
             instead, the layout algorithm will start and automatically stop
             after this many seconds. Defaults to False.
+        stream_layout_interval (float, optional): if given, the layout will
+            be sent to the kernel every this many seconds while the layout
+            algorithm is running, rather than only when it stops.
+            Defaults to None.
         node_metrics (Iterable or Mapping, optional): node metrics to be
-            computed by graphology by the widget's JavaScript code. Currently
-            only supports "louvain" for community detection.
+            computed, either as a list of metric names, or as a dict mapping
+            target attribute names to a metric name or spec, e.g.
+            {"community": {"name": "communities", "resolution": 1.5}}.
+            "louvain" is computed by the widget's JavaScript code, in a web
+            worker, while "communities" (louvain, with "resolution" & "seed"),
+            "pagerank" (with "alpha"), "degree", "weighted_degree",
+            "betweenness" (sampled from "samples" sources, with "seed") and
+            "kcore" are computed by the kernel using igraph, or networkx if
+            igraph is not installed, and cached per graph.
             Defaults to None.
         layout_settings (dict, optional): settings for the ForceAtlas2 layout
             (listed here: https://graphology.github.io/standard-library/layout-forceatlas2#settings)
             Defaults to None.
+        layout_cache (bool or str or LayoutCache, optional): whether to
+            persist the layouts computed by the widget on disk, so that they
+            can be loaded automatically the next time a widget is built on
+            the same graph with the same layout settings (unless `layout` is
+            given). Can be a path to the directory where layouts should be
+            stored, a LayoutCache instance, or True to use the default cache
+            directory. Defaults to None.
         clickable_edges (bool, optional): whether to allow user to click on edges
             to display their information. This can have a performance cost on
             larger graphs. Defaults to False.
         process_gexf_viz (bool, optional): whether to process gexf files viz
             data for node & edges. Defaults to True.
+        columnar_data (bool, optional): whether to send the graph's data to the
+            widget as compact binary columns rather than as JSON. This is
+            way faster and lighter for larger graphs, but note that None and
+            NaN attribute values will be considered as missing.
+            Defaults to False.
+        attributes (Iterable or str, optional): names of the node & edge
+            attributes to send to the widget. If "minimal" is given, only the
+            attributes actually used by the widget (visual variables, edge
+            weight, zindex and node positions) will be kept. If an iterable is
+            given, its attributes will be kept along with the minimal ones.
+            Can be useful to drop heavy attributes (e.g. long texts) that would
+            needlessly bloat the widget's data. If None, all attributes will
+            be kept. Defaults to None.
+        chunk_size (int, optional): if given, the graph's data will not be
+            sent to the widget all at once but progressively, in chunks
+            containing at most this number of nodes or edges, nodes first.
+            The widget will then be able to display the graph while it is
+            still loading. This is useful for very large graphs whose data
+            would otherwise exceed the kernel's message size limits or freeze
+            the browser. Note that patches will only be applied once every
+            chunk has been received. Defaults to None.
+        cache_key (Hashable, optional): key under which the graph's data, once
+            walked & serialized, is cached in memory, so that subsequent
+            widgets built with the same key only need to resolve their visual
+            variables. Make sure to use another key if the graph is modified.
+            If None, the graph is only cached when enabled through
+            `Sigma.set_defaults(graph_cache=True)`, keyed by a fingerprint of
+            the graph (its identity and a digest of its nodes, edges &
+            attributes). Defaults to None.
         max_categorical_colors (int, optional): max number of colors to be
             generated for a categorical palette. Categories, ordered by
             frequency, over this maximum will use the default color.
@@ -106,6 +353,17 @@ class Sigma(DOMWidget):
         sync_targets (Iterable, optional): Names of targets to synchronize
             through the `sync_key` kwarg. Targets include "layout", "camera",
             "selection" and "hover". Defaults to ("layout", "camera", "selection", "hover").
+        kernel_sync_policy (str or dict, optional): policy used by the widget
+            to sync its camera state, selection & hovered node back to the
+            kernel, either as a policy name applied to every target, or as a
+            dict mapping "camera", "selection" or "hover" to a policy name.
+            "throttle" syncs at most once per interval, "debounce" only syncs
+            once no change happened during an interval, and "idle" does the
+            same but waits for the browser to be idle. Messages are always
+            coalesced per animation frame. Defaults to "debounce" for the
+            camera & hover and "throttle" for the selection.
+        kernel_sync_interval (float, optional): interval in seconds used by
+            the kernel sync policies. Defaults to 0.5.
         camera_state (dict, optional): Initial state for the widget's camera (which can be
             retrieved using the `#.get_camera_state` method).
             Defaults to {"x": 0.5, "y": 0.5, "ratio": 1, "angle": 0}.
@@ -348,16 +606,21 @@ class Sigma(DOMWidget):
     default_max_categorical_colors = DEFAULT_MAX_CATEGORICAL_COLORS
     default_node_size_range = DEFAULT_NODE_SIZE_RANGE
     default_edge_size_range = DEFAULT_EDGE_SIZE_RANGE
+    default_layout_cache = None
+    default_graph_cache = False
+    default_metrics_process_pool = False
 
     data = Dict({"nodes": [], "edges": []}).tag(sync=True)
+    shared_data = Dict(allow_none=True).tag(sync=True)
     height = Unicode(str(DEFAULT_HEIGHT) + "px").tag(sync=True)
     background_color = Unicode(DEFAULT_BACKGROUND_COLOR).tag(sync=True)
     name = Unicode(allow_none=True).tag(sync=True)
     start_layout = Bool(False).tag(sync=True)
     start_layout_for_seconds = Float(allow_none=True).tag(sync=True)
     clickable_edges = Bool(False).tag(sync=True)
-    snapshot = Unicode(allow_none=True).tag(sync=True)
     layout = Dict(allow_none=True).tag(sync=True)
+    layout_buffer = Any(None, allow_none=True).tag(sync=True)
+    stream_layout_interval = Float(allow_none=True).tag(sync=True)
     camera_state = Dict(DEFAULT_CAMERA_STATE).tag(sync=True)
     layout_settings = Dict(allow_none=True).tag(sync=True)
     node_metrics = Dict({}).tag(sync=True)
@@ -368,6 +631,10 @@ class Sigma(DOMWidget):
     selected_edge_category_values = List(allow_none=True).tag(sync=True)
     sync_key = Unicode(allow_none=True).tag(sync=True)
     sync_targets = List(SUPPORTED_SYNC_TARGETS).tag(sync=True)
+    kernel_sync = Dict(
+        resolve_kernel_sync(None, DEFAULT_KERNEL_SYNC_INTERVAL)
+    ).tag(sync=True)
+    hovered_node = Unicode(allow_none=True).tag(sync=True)
     ui_settings = Dict({"hideInfoPanel": False, "hideSearch": False}).tag(sync=True)
     renderer_settings = Dict(
         {
@@ -387,6 +654,10 @@ class Sigma(DOMWidget):
         max_categorical_colors=None,
         node_size_range=None,
         edge_size_range=None,
+        layout_cache=None,
+        graph_cache=None,
+        graph_cache_max_size=None,
+        metrics_process_pool=None,
     ):
         if height is not None:
             if height < MIN_HEIGHT:
@@ -417,6 +688,32 @@ class Sigma(DOMWidget):
         if edge_size_range is not None:
             cls.default_edge_size_range = edge_size_range
 
+        if layout_cache is not None:
+            cls.default_layout_cache = resolve_layout_cache(layout_cache)
+
+        if graph_cache is not None:
+            if not isinstance(graph_cache, bool):
+                raise TypeError("graph_cache should be a boolean")
+
+            cls.default_graph_cache = graph_cache
+
+        if graph_cache_max_size is not None:
+            if not isinstance(graph_cache_max_size, int) or graph_cache_max_size < 0:
+                raise TypeError("graph_cache_max_size should be a positive integer")
+
+            GRAPH_CACHE.max_size = graph_cache_max_size
+            GRAPH_CACHE.evict()
+
+        if metrics_process_pool is not None:
+            if not isinstance(metrics_process_pool, bool):
+                raise TypeError("metrics_process_pool should be a boolean")
+
+            cls.default_metrics_process_pool = metrics_process_pool
+
+            # NOTE: worker processes are not kept alive once disabled
+            if not metrics_process_pool:
+                close_process_pool()
+
     def __init__(
         self,
         graph,
@@ -427,16 +724,24 @@ class Sigma(DOMWidget):
         background_color=None,
         raw_height=None,
         start_layout=False,
+        stream_layout_interval=None,
         node_metrics=None,
         layout_settings=None,
+        layout_cache=None,
         clickable_edges=False,
         process_gexf_viz=True,
+        columnar_data=False,
+        attributes=None,
+        chunk_size=None,
+        cache_key=None,
         max_categorical_colors=None,
         hide_info_panel=False,
         hide_search=False,
         hide_edges_on_move=False,
         sync_key=None,
         sync_targets=SUPPORTED_SYNC_TARGETS,
+        kernel_sync_policy=None,
+        kernel_sync_interval=DEFAULT_KERNEL_SYNC_INTERVAL,
         # Widget state
         camera_state=DEFAULT_CAMERA_STATE,
         selected_node=None,
@@ -553,9 +858,15 @@ class Sigma(DOMWidget):
         edge_weight="weight",
         # Edge z index
         edge_zindex=None,
+        # Internal
+        _shared_graph=None,
     ):
         super(Sigma, self).__init__()
 
+        # NOTE: visual variables kwargs are kept so the widget can be restyled
+        arguments = locals()
+        self.__visual_kwargs = {name: arguments[name] for name in VISUAL_VARIABLE_KWARGS}
+
         check_graph_is_valid(graph)
 
         # Resolving overridable defaults
@@ -568,12 +879,6 @@ class Sigma(DOMWidget):
         if max_categorical_colors is None:
             max_categorical_colors = self.default_max_categorical_colors
 
-        if node_size_range is None:
-            node_size_range = self.default_node_size_range
-
-        if edge_size_range is None:
-            edge_size_range = self.default_edge_size_range
-
         # Validation
         if height < MIN_HEIGHT:
             raise TypeError("Sigma widget cannot have a height < %i px" % MIN_HEIGHT)
@@ -614,7 +919,7 @@ class Sigma(DOMWidget):
             ):
                 raise TypeError("selected_edge should be a (source, target) tuple")
 
-            if not self.graph_interface.has_edge(*selected_edge):
+            if not get_graph_interface(graph).has_edge(*selected_edge):
                 raise KeyError("selected_edge does not exist in the graph")
 
         if selected_node_category_values is not None and not isinstance(
@@ -634,6 +939,7 @@ class Sigma(DOMWidget):
         # Own
         self.graph = graph
         self.graph_interface = get_graph_interface(self.graph)
+        self.process_gexf_viz = process_gexf_viz
 
         # Traits
         self.height = raw_height if raw_height is not None else str(height) + "px"
@@ -646,9 +952,22 @@ class Sigma(DOMWidget):
         if type(start_layout) in (int, float):
             self.start_layout_for_seconds = float(start_layout)
 
-        self.snapshot = None
+        if stream_layout_interval is not None:
+            if (
+                not isinstance(stream_layout_interval, (int, float))
+                or stream_layout_interval <= 0
+            ):
+                raise TypeError("stream_layout_interval should be a positive number")
+
+            self.stream_layout_interval = float(stream_layout_interval)
+
         self.layout = None
         self.layout_settings = layout_settings
+
+        # NOTE: pending requests to the widget, keyed by their id
+        self.__requests = {}
+        self.on_msg(self.__handle_response)
+
         self.ui_settings = {"hideInfoPanel": hide_info_panel, "hideSearch": hide_search}
         self.clickable_edges = clickable_edges
         self.camera_state = camera_state
@@ -668,10 +987,17 @@ class Sigma(DOMWidget):
             if selected_edge_category_values
             else None
         )
-        self.node_metrics = resolve_metrics(
+        node_metrics = resolve_metrics(
             "node_metrics", node_metrics, SUPPORTED_NODE_METRICS
         )
 
+        # NOTE: only metrics computed by the widget itself are synced
+        self.node_metrics = {
+            k: v for k, v in node_metrics.items() if v["name"] in WIDGET_NODE_METRICS
+        }
+
+        kept_attributes = resolve_attributes("attributes", attributes)
+
         if layout is not None:
             if not isinstance(layout, dict):
                 raise TypeError(
@@ -681,62 +1007,371 @@ class Sigma(DOMWidget):
             self.layout = layout
 
         is_directed = self.graph_interface.is_directed()
-        is_multi = self.graph_interface.is_multi()
-
-        # Serializing graph as per graphology's JSON format
-        nodes = []
-        self.node_type = None
-
-        for node, attr in self.graph_interface.nodes():
-            if self.node_type is None:
-                self.node_type = type(node)
-
-                if not isinstance(node, SUPPORTED_NODE_TYPES):
-                    raise TypeError(
-                        "ipysigma only supports node keys that have one of the following types: %s (found a %s key)"
-                        % (
-                            ", ".join(
-                                pretty_print_type_name(node_type)
-                                for node_type in SUPPORTED_NODE_TYPES
-                            ),
-                            pretty_print_type_name(self.node_type),
-                        )
-                    )
-            elif type(node) is not self.node_type:
-                raise TypeError(
-                    "ipysigma does not support mixed types for node keys (found %s and %s)"
-                    % (
-                        pretty_print_type_name(self.node_type),
-                        pretty_print_type_name(type(node)),
-                    )
+
+        # NOTE: a graph shared by multiple widgets only needs to be walked once
+        shared_graph = _shared_graph
+
+        if (
+            shared_graph is not None
+            and shared_graph.is_ready()
+            and shared_graph.process_gexf_viz != process_gexf_viz
+        ):
+            shared_graph = None
+
+        # NOTE: graphs can also be cached in memory across widgets
+        graph_cache_key = None
+        graph_cache_ref = None
+
+        if shared_graph is None:
+            if cache_key is not None:
+                graph_cache_key = ("key", cache_key, process_gexf_viz)
+
+            elif self.default_graph_cache:
+                graph_cache_key = (
+                    "graph",
+                    self.graph_interface.fingerprint(),
+                    process_gexf_viz,
                 )
+                graph_cache_ref = self.graph
 
-            attr = attr.copy()
+        if graph_cache_key is not None:
+            shared_graph = GRAPH_CACHE.get(graph_cache_key, graph_cache_ref)
 
-            if process_gexf_viz:
-                process_node_gexf_viz(attr)
+            if shared_graph is None:
+                shared_graph = SharedGraph()
 
-            serialized_node = {"key": node, "attributes": attr}
+        if shared_graph is not None and shared_graph.is_ready():
+            table = shared_graph.get_table()
+            self.node_type = shared_graph.node_type
 
-            nodes.append(serialized_node)
+        else:
+            self.node_type = None
 
-        edges = []
+            table = GraphTable.from_interface(
+                self.graph_interface,
+                process_gexf_viz=process_gexf_viz,
+                on_node=self.__check_node_key,
+            )
 
-        for source, target, attr in self.graph_interface.edges():
-            attr = attr.copy()
+            if shared_graph is not None:
+                shared_graph.set_table(table, self.node_type, process_gexf_viz)
 
-            if process_gexf_viz:
-                process_edge_gexf_viz(attr)
+        # Loading cached layout
+        self.__layout_cache = (
+            resolve_layout_cache(layout_cache)
+            if layout_cache is not None
+            else self.default_layout_cache
+        )
+
+        if self.__layout_cache is not None:
+            self.__layout_cache_key = LayoutCache.key(table, layout_settings)
+            self.__layout_cache_nodes = table.nodes.keys
 
-            # NOTE: networkx multigraph can have keys on edges, but they
-            # are not required to be unique across the graph, which makes
-            # them pointless for graphology, gexf etc.
-            serialized_edge = {"source": source, "target": target, "attributes": attr}
+            if layout is None:
+                self.layout = self.__layout_cache.get(
+                    self.__layout_cache_key, self.__layout_cache_nodes
+                )
 
-            edges.append(serialized_edge)
+            # NOTE: the first layout sent by the widget is only its initial
+            # one, unless the widget was given a layout to begin with
+            self.__layout_was_synced = self.layout is not None
+            self.observe(self.__persist_layout, ["layout", "layout_buffer"])
 
         # Serializing visual variables
-        visual_variables_builder = VisualVariableBuilder(nodes, edges, is_directed)
+        visual_variables_builder = self.__build_visual_variables(
+            table, **self.__visual_kwargs
+        )
+
+        # Handling edge weight
+        self.edge_weight = None
+
+        if edge_weight is not None:
+            self.edge_weight = visual_variables_builder.resolve(
+                "edge_weight", edge_weight, item_type="edge"
+            )
+
+        # Handling z-index
+        node_zindex_attribute = None
+        edge_zindex_attribute = None
+
+        if node_zindex is not None:
+            node_zindex_attribute = visual_variables_builder.resolve(
+                "node_zindex", node_zindex
+            )
+
+        if edge_zindex is not None:
+            edge_zindex_attribute = visual_variables_builder.resolve(
+                "edge_zindex", edge_zindex, item_type="edge"
+            )
+
+        # Computing node metrics on the kernel's side
+        # NOTE: pending variables are resolved first since edge weights may
+        # be given as a kwarg
+        kernel_node_metrics = {
+            k: v for k, v in node_metrics.items() if v["name"] in KERNEL_NODE_METRICS
+        }
+
+        if kernel_node_metrics:
+            visual_variables_builder.resolve_pending()
+            compute_node_metrics(
+                table,
+                kernel_node_metrics,
+                edge_weight=self.edge_weight,
+                process_pool=self.default_metrics_process_pool,
+            )
+
+        # NOTE: every variable requiring to visit the items is resolved here,
+        # in a single pass per item type. Node metrics computed by the widget
+        # cannot be summarized beforehand.
+        self.visual_variables = visual_variables_builder.build(
+            max_categorical_colors=max_categorical_colors,
+            skip_statistics=self.node_metrics.keys(),
+        )
+
+        # Ordering items per z-index
+        # NOTE: items are not reordered here, the widget being given the order
+        # in which to add them to the graph instead. This means the computed
+        # z-index does not need to be sent along with the items.
+        for items, zindex_attribute in [
+            (table.nodes, node_zindex_attribute),
+            (table.edges, edge_zindex_attribute),
+        ]:
+            if zindex_attribute is None:
+                continue
+
+            items.order = compute_order_per_attribute(items, zindex_attribute)
+
+            if zindex_attribute.startswith(KWARG_ATTRIBUTE_PREFIX):
+                items.project([k for k in items.columns if k != zindex_attribute])
+
+            # NOTE: chunks are added to the graph as they arrive, so items
+            # must be sent in order
+            if chunk_size is not None:
+                items.permute(items.order)
+                items.order = None
+
+        # NOTE: the table, before projection, is kept so that the widget can
+        # be restyled, and items follow the order in which they are serialized
+        self.__table = table.copy()
+
+        # Projecting attributes
+        if kept_attributes is not None:
+            kept_node_attributes = {"x", "y"}
+            kept_node_attributes.update(kept_attributes)
+            kept_node_attributes.update(visual_variables_builder.get_attributes("node"))
+
+            kept_edge_attributes = set(kept_attributes)
+            kept_edge_attributes.update(visual_variables_builder.get_attributes("edge"))
+
+            if self.edge_weight is not None:
+                kept_edge_attributes.add(self.edge_weight)
+
+            table.nodes.project(kept_node_attributes)
+            table.edges.project(kept_edge_attributes)
+
+        if show_all_labels:
+            label_rendered_size_threshold = 0
+            label_density = 10_000
+
+        # Building renderer settings
+        renderer_settings = {
+            "zIndex": True,
+            "enableEdgeClickEvents": clickable_edges,
+            "enableEdgeHoverEvents": clickable_edges,
+            "labelDensity": label_density,
+            "labelGridCellSize": label_grid_cell_size,
+            "renderEdgeLabels": True,
+            "labelFont": label_font,
+            "hideEdgesOnMove": hide_edges_on_move,
+        }
+
+        if label_rendered_size_threshold is not None:
+            renderer_settings[
+                "labelRenderedSizeThreshold"
+            ] = label_rendered_size_threshold
+
+        renderer_settings["defaultNodeType"] = resolve_default_node_type(
+            self.visual_variables
+        )
+
+        if default_edge_type is not None:
+            if is_directed and default_edge_type not in SUPPORTED_DIRECTED_EDGE_TYPES:
+                raise TypeError(
+                    'unsupported edge type "%s" for directed graphs' % default_edge_type
+                )
+
+            if (
+                not is_directed
+                and default_edge_type not in SUPPORTED_UNDIRECTED_EDGE_TYPES
+            ):
+                raise TypeError(
+                    'unsupported edge type "%s" for undirected graphs'
+                    % default_edge_type
+                )
+
+            renderer_settings["defaultEdgeType"] = default_edge_type
+
+        else:
+            renderer_settings["defaultEdgeType"] = (
+                "arrow" if is_directed else "rectangle"
+            )
+
+        self.renderer_settings = renderer_settings
+
+        # Building webgl program settings
+        self.program_settings = {}
+
+        self.__chunker = None
+        self.__shared_graph = None
+        self.shared_data = None
+
+        # NOTE: projecting attributes would make items diverge from the
+        # shared graph
+        if (
+            shared_graph is not None
+            and chunk_size is None
+            and kept_attributes is None
+        ):
+            self.__shared_graph = shared_graph
+            self.data = serialize_graph_overlay(
+                shared_graph.key,
+                table,
+                columnar=columnar_data,
+                base=shared_graph.table,
+            )
+
+            # NOTE: the first widget is responsible for sending the shared
+            # graph, except for cached graphs, since the widgets that were
+            # previously displaying them may have been closed since
+            if graph_cache_key is not None or not shared_graph.registered:
+                self.shared_data = shared_graph.serialize(columnar=columnar_data)
+                shared_graph.registered = True
+
+        elif chunk_size is not None:
+            if not isinstance(chunk_size, int) or chunk_size <= 0:
+                raise TypeError("chunk_size should be a positive int")
+
+            self.__chunker = GraphChunker(table, chunk_size, columnar=columnar_data)
+            self.data = self.__chunker.header()
+            self.on_msg(self.__handle_chunk_request)
+
+        elif columnar_data:
+            self.data = serialize_graph_columns(table)
+        else:
+            self.data = serialize_graph_json(table)
+
+        if graph_cache_key is not None:
+            GRAPH_CACHE.set(graph_cache_key, shared_graph, graph_cache_ref)
+
+        # NOTE: attributes currently known to the widget
+        self.__serialized_table = table
+        self.__columnar_data = columnar_data
+        self.__restyled = False
+
+        self.sync_key = sync_key
+        self.sync_targets = list(sync_targets)
+
+        for target in self.sync_targets:
+            if target not in SUPPORTED_SYNC_TARGETS:
+                raise TypeError('unsupported sync target "%s"' % target)
+
+        self.kernel_sync = resolve_kernel_sync(kernel_sync_policy, kernel_sync_interval)
+
+    def __build_visual_variables(
+        self,
+        table,
+        *,
+        node_color,
+        raw_node_color,
+        node_color_gradient,
+        node_color_scale,
+        node_color_palette,
+        default_node_color,
+        node_color_saturation,
+        raw_node_color_saturation,
+        node_color_saturation_scale,
+        node_color_saturation_range,
+        default_node_color_saturation,
+        node_border_color,
+        raw_node_border_color,
+        node_border_color_gradient,
+        node_border_color_palette,
+        default_node_border_color,
+        node_border_color_from,
+        node_border_ratio,
+        raw_node_border_ratio,
+        node_border_ratio_range,
+        default_node_border_ratio,
+        node_border_size,
+        raw_node_border_size,
+        node_border_size_range,
+        default_node_border_size,
+        node_pictogram,
+        raw_node_pictogram,
+        node_pictogram_mapping,
+        default_node_pictogram,
+        node_pictogram_color,
+        raw_node_pictogram_color,
+        node_pictogram_color_palette,
+        default_node_pictogram_color,
+        node_shape,
+        raw_node_shape,
+        node_shape_mapping,
+        default_node_shape,
+        node_halo_size,
+        raw_node_halo_size,
+        node_halo_size_range,
+        node_halo_size_scale,
+        default_node_halo_size,
+        node_halo_color,
+        raw_node_halo_color,
+        node_halo_color_gradient,
+        node_halo_color_scale,
+        node_halo_color_palette,
+        default_node_halo_color,
+        node_size,
+        raw_node_size,
+        node_size_range,
+        node_size_scale,
+        default_node_size,
+        raw_node_label,
+        node_label,
+        default_node_label,
+        node_label_size,
+        raw_node_label_size,
+        node_label_size_range,
+        default_node_label_size,
+        node_label_color,
+        raw_node_label_color,
+        node_label_color_palette,
+        default_node_label_color,
+        edge_color,
+        raw_edge_color,
+        edge_color_palette,
+        edge_color_gradient,
+        edge_color_scale,
+        edge_color_from,
+        default_edge_color,
+        edge_size,
+        raw_edge_size,
+        edge_size_range,
+        edge_size_scale,
+        default_edge_size,
+        default_edge_curveness,
+        raw_edge_label,
+        edge_label,
+        default_edge_label,
+    ):
+        is_directed = table.is_directed
+
+        # Resolving overridable defaults
+        if node_size_range is None:
+            node_size_range = self.default_node_size_range
+
+        if edge_size_range is None:
+            edge_size_range = self.default_edge_size_range
+
+        visual_variables_builder = VisualVariableBuilder(table)
 
         # Nodes
         visual_variables_builder.build_categorical_or_continuous(
@@ -899,155 +1534,321 @@ class Sigma(DOMWidget):
             "edgeCurveness", None, None, default=default_edge_curveness
         )
 
-        self.visual_variables = visual_variables_builder.build()
+        return visual_variables_builder
 
-        must_render_node_borders = self.visual_variables["nodeBorderColor"][
-            "type"
-        ] != "disabled" and (
-            self.visual_variables["nodeBorderSize"]["type"] != "disabled"
-            or self.visual_variables["nodeBorderRatio"]["type"] != "disabled"
-        )
+    def restyle(self, **kwargs):
+        """
+        Method changing the visual variables of the widget, without needing
+        to serialize the whole graph again. Only the attributes required by
+        the new visual variables, that the widget does not already know,
+        are sent.
+
+        Note that nodes & edges added to the widget since it was created
+        will not be restyled.
+
+        Args:
+            **kwargs: any kwarg related to visual variables accepted by the
+                widget, e.g. node_color, node_size_range, edge_size etc.
+
+        Example:
+            sigma = Sigma(g, node_color="lang")
+            sigma.restyle(node_color="party", node_size_range=(2, 10))
+        """
+        for name in kwargs:
+            if name not in VISUAL_VARIABLE_KWARGS:
+                raise TypeError('"%s" is not a visual variable kwarg' % name)
+
+        visual_kwargs = dict(self.__visual_kwargs)
+        visual_kwargs.update(kwargs)
+
+        table = self.__table.copy()
 
-        must_render_node_halos = (
-            self.visual_variables["nodeHaloColor"]["type"] != "disabled"
-            and self.visual_variables["nodeHaloSize"]["type"] != "disabled"
+        visual_variables_builder = self.__build_visual_variables(
+            table, **visual_kwargs
         )
+        visual_variables = visual_variables_builder.build(
+            max_categorical_colors=self.max_categorical_colors,
+            skip_statistics=self.node_metrics.keys(),
+        )
+        default_node_type = resolve_default_node_type(visual_variables)
 
-        if self.visual_variables["nodeShape"]["type"] != "disabled":
-            if must_render_node_borders:
-                raise TypeError("cannot use node borders with node shapes together")
+        # Finding the columns the widget does not know yet
+        serialized_table = self.__serialized_table.copy()
+        patch = {"type": "updateColumns"}
 
-            if must_render_node_halos:
-                raise TypeError("cannot use node halos and node shapes together")
+        for item_type in ("node", "edge"):
+            items = table.get_items(item_type)
+            serialized_items = serialized_table.get_items(item_type)
+            columns = []
 
-            if self.visual_variables["nodePictogram"]["type"] != "disabled":
-                raise TypeError("cannot use node pictograms and node shapes together")
+            for name in sorted(visual_variables_builder.get_attributes(item_type)):
+                column = items.get_column(name)
+                serialized_column = serialized_items.get_column(name)
 
-        # Handling edge weight
-        self.edge_weight = None
+                if column is None or column is serialized_column:
+                    continue
 
-        if edge_weight is not None:
-            self.edge_weight = resolve_variable(
-                "edge_weight",
-                edges,
-                edge_weight,
-                item_type="edge",
-                is_directed=is_directed,
-            )
+                if column == serialized_column:
+                    continue
 
-        # Handling z-index
-        if node_zindex is not None:
-            sort_items_per_zindex("node_zindex", nodes, node_zindex)
+                serialized_items.set_column(name, column)
+                columns.append(encode_column(name, column))
 
-        if edge_zindex is not None:
-            sort_items_per_zindex(
-                "edge_zindex",
-                edges,
-                edge_zindex,
-                item_type="edge",
-                is_directed=is_directed,
+            patch[item_type + "s"] = {"columns": columns}
+
+        if patch["nodes"]["columns"] or patch["edges"]["columns"]:
+            patch, buffer_paths, buffers = _remove_buffers(patch)
+
+            self.send(
+                {"msg": "patch", "patch": patch, "buffer_paths": buffer_paths},
+                buffers,
             )
 
-        if show_all_labels:
-            label_rendered_size_threshold = 0
-            label_density = 10_000
+            self.__restyled = True
 
-        # Building renderer settings
-        renderer_settings = {
-            "zIndex": True,
-            "enableEdgeClickEvents": clickable_edges,
-            "enableEdgeHoverEvents": clickable_edges,
-            "labelDensity": label_density,
-            "labelGridCellSize": label_grid_cell_size,
-            "renderEdgeLabels": True,
-            "labelFont": label_font,
-            "hideEdgesOnMove": hide_edges_on_move,
-        }
+        self.__visual_kwargs = visual_kwargs
+        self.__serialized_table = serialized_table
 
-        if label_rendered_size_threshold is not None:
-            renderer_settings[
-                "labelRenderedSizeThreshold"
-            ] = label_rendered_size_threshold
+        # NOTE: the widget restyles itself when its visual variables change
+        with self.hold_sync():
+            self.renderer_settings = {
+                **self.renderer_settings,
+                "defaultNodeType": default_node_type,
+            }
+            self.visual_variables = visual_variables
 
-        need_to_render_pictograms = (
-            self.visual_variables["nodePictogram"]["type"] != "disabled"
+    def __persist_layout(self, change):
+        if change["new"] is None:
+            return
+
+        if not self.__layout_was_synced:
+            self.__layout_was_synced = True
+            return
+
+        self.__layout_cache.set(
+            self.__layout_cache_key, self.__layout_cache_nodes, self.get_layout()
         )
 
-        need_to_render_shapes = self.visual_variables["nodeShape"]["type"] != "disabled"
+    def __handle_chunk_request(self, _, content, buffers):
+        if content.get("msg") != "request_chunk":
+            return
 
-        default_node_type = "point"
+        index = content["index"]
+        chunk, buffer_paths, buffers = _remove_buffers(self.__chunker.chunk(index))
 
-        if must_render_node_borders:
-            default_node_type = "border"
+        self.send(
+            {
+                "msg": "chunk",
+                "index": index,
+                "chunk": chunk,
+                "buffer_paths": buffer_paths,
+            },
+            buffers,
+        )
 
-            if need_to_render_pictograms:
-                default_node_type = "border+picto"
+    def _get_embed_state(self, drop_defaults=False):
+        state = super()._get_embed_state(drop_defaults=drop_defaults)
+
+        # NOTE: a static embed cannot replay the columns sent when the widget
+        # was restyled, so the graph must be embedded as it is now known by
+        # the widget
+        if self.__restyled:
+            serialize = (
+                serialize_graph_columns
+                if self.__columnar_data
+                else serialize_graph_json
+            )
+            embed_state_value(state, "data", serialize(self.__serialized_table))
+
+        # NOTE: chunks cannot be requested from a static embed, so the whole
+        # graph must be embedded instead of the chunked header
+        elif self.__chunker is not None:
+            embed_state_value(state, "data", self.__chunker.serialize())
+
+        # NOTE: a static embed may not contain the widget that was
+        # responsible for sending the shared graph
+        if self.__shared_graph is not None and not self.shared_data:
+            embed_state_value(
+                state,
+                "shared_data",
+                self.__shared_graph.serialize(
+                    columnar=self.data["encoding"] == "columnar"
+                ),
+            )
 
-                if must_render_node_halos:
-                    default_node_type = "border+halo+picto"
+        return state
 
-            elif must_render_node_halos:
-                default_node_type = "border+halo"
+    def __check_node_key(self, node):
+        if self.node_type is None:
+            self.node_type = type(node)
 
-        elif need_to_render_pictograms:
-            default_node_type = "picto"
+            if not isinstance(node, SUPPORTED_NODE_TYPES):
+                raise TypeError(
+                    "ipysigma only supports node keys that have one of the following types: %s (found a %s key)"
+                    % (
+                        ", ".join(
+                            pretty_print_type_name(node_type)
+                            for node_type in SUPPORTED_NODE_TYPES
+                        ),
+                        pretty_print_type_name(self.node_type),
+                    )
+                )
+        elif type(node) is not self.node_type:
+            raise TypeError(
+                "ipysigma does not support mixed types for node keys (found %s and %s)"
+                % (
+                    pretty_print_type_name(self.node_type),
+                    pretty_print_type_name(type(node)),
+                )
+            )
 
-            if must_render_node_halos:
-                default_node_type = "halo+picto"
+    def __send_patch(self, patch):
+        self.send({"msg": "patch", "patch": patch})
 
-        elif need_to_render_shapes:
-            default_node_type = "shape"
+    def __serialize_patch_nodes(self, nodes):
+        serialized_nodes = []
 
-        elif must_render_node_halos:
-            default_node_type = "halo"
+        for node in nodes:
+            if isinstance(node, tuple):
+                if len(node) != 2:
+                    raise TypeError("nodes should be keys or (key, attributes) tuples")
 
-        renderer_settings["defaultNodeType"] = default_node_type
+                node, attr = node
+                attr = dict(attr)
+            else:
+                attr = {}
 
-        if default_edge_type is not None:
-            if is_directed and default_edge_type not in SUPPORTED_DIRECTED_EDGE_TYPES:
-                raise TypeError(
-                    'unsupported edge type "%s" for directed graphs' % default_edge_type
-                )
+            self.__check_node_key(node)
 
-            if (
-                not is_directed
-                and default_edge_type not in SUPPORTED_UNDIRECTED_EDGE_TYPES
-            ):
+            if self.process_gexf_viz:
+                process_node_gexf_viz(attr)
+
+            serialized_nodes.append(
+                {"key": node, "attributes": sanitize_attributes(attr)}
+            )
+
+        return serialized_nodes
+
+    def __serialize_patch_edges(self, edges):
+        serialized_edges = []
+
+        for edge in edges:
+            if not isinstance(edge, tuple) or len(edge) not in (2, 3):
                 raise TypeError(
-                    'unsupported edge type "%s" for undirected graphs'
-                    % default_edge_type
+                    "edges should be (source, target) or (source, target, attributes) tuples"
                 )
 
-            renderer_settings["defaultEdgeType"] = default_edge_type
+            source, target = edge[0], edge[1]
+            attr = dict(edge[2]) if len(edge) == 3 else {}
 
-        else:
-            renderer_settings["defaultEdgeType"] = (
-                "arrow" if is_directed else "rectangle"
+            self.__check_node_key(source)
+            self.__check_node_key(target)
+
+            if self.process_gexf_viz:
+                process_edge_gexf_viz(attr)
+
+            serialized_edges.append(
+                {
+                    "source": source,
+                    "target": target,
+                    "attributes": sanitize_attributes(attr),
+                }
             )
 
-        self.renderer_settings = renderer_settings
+        return serialized_edges
 
-        # Building webgl program settings
-        self.program_settings = {}
+    def add_nodes(self, nodes):
+        """
+        Method adding nodes to the graph displayed by the widget, without
+        needing to serialize the whole graph again. Nodes already existing
+        in the widget will have their attributes updated instead.
 
-        fix_items_for_json_serialization(nodes)
-        fix_items_for_json_serialization(edges)
+        Note that this only updates the widget, not your own graph.
 
-        self.data = {
-            "nodes": nodes,
-            "edges": edges,
-            "options": {
-                "type": "directed" if is_directed else "undirected",
-                "multi": is_multi,
-            },
-        }
+        Args:
+            nodes (Iterable): node keys, or (key, attributes) tuples.
+        """
+        self.__send_patch(
+            {"type": "addNodes", "nodes": self.__serialize_patch_nodes(nodes)}
+        )
 
-        self.sync_key = sync_key
-        self.sync_targets = list(sync_targets)
+    def remove_nodes(self, nodes):
+        """
+        Method removing nodes, along with their edges, from the graph displayed
+        by the widget.
 
-        for target in self.sync_targets:
-            if target not in SUPPORTED_SYNC_TARGETS:
-                raise TypeError('unsupported sync target "%s"' % target)
+        Note that this only updates the widget, not your own graph.
+
+        Args:
+            nodes (Iterable): node keys.
+        """
+        nodes = list(nodes)
+
+        for node in nodes:
+            self.__check_node_key(node)
+
+        self.__send_patch({"type": "dropNodes", "nodes": nodes})
+
+    def add_edges(self, edges):
+        """
+        Method adding edges to the graph displayed by the widget, without
+        needing to serialize the whole graph again. Missing nodes will be
+        created on the fly.
+
+        Note that this only updates the widget, not your own graph.
+
+        Args:
+            edges (Iterable): (source, target) or (source, target, attributes)
+                tuples.
+        """
+        self.__send_patch(
+            {"type": "addEdges", "edges": self.__serialize_patch_edges(edges)}
+        )
+
+    def remove_edges(self, edges):
+        """
+        Method removing edges from the graph displayed by the widget. In a
+        multi graph, all the edges between given source & target will be
+        removed.
+
+        Note that this only updates the widget, not your own graph.
+
+        Args:
+            edges (Iterable): (source, target) tuples.
+        """
+        serialized_edges = self.__serialize_patch_edges(edges)
+
+        self.__send_patch(
+            {
+                "type": "dropEdges",
+                "edges": [
+                    (edge["source"], edge["target"]) for edge in serialized_edges
+                ],
+            }
+        )
+
+    def update_node_attributes(self, attributes):
+        """
+        Method merging the given attributes into the ones of nodes already
+        displayed by the widget. Unknown nodes will be ignored.
+
+        Note that this only updates the widget, not your own graph.
+
+        Args:
+            attributes (Mapping): mapping from node keys to a dict of
+                attributes to merge.
+        """
+        if not isinstance(attributes, Mapping):
+            raise TypeError(
+                "attributes should be a mapping from node keys to attributes"
+            )
+
+        self.__send_patch(
+            {
+                "type": "updateNodeAttributes",
+                "nodes": self.__serialize_patch_nodes(attributes.items()),
+            }
+        )
 
     def __repr__(self):
         return "Sigma(%s with %s nodes and %s edges)" % (
@@ -1069,11 +1870,47 @@ class Sigma(DOMWidget):
         Returns:
             dict: a dictionary mapping node keys to {x, y} positions.
         """
+        if self.layout_buffer is not None:
+            return unpack_layout(
+                self.__serialized_table.nodes.keys, self.layout_buffer
+            )
+
         if self.layout is None:
             return None
 
         return {self.node_type(n): p for n, p in self.layout.items()}
 
+    def get_layout_array(self):
+        """
+        Method returning the layout computed by ForceAtlas2 in the widget, as
+        a (n, 2) float32 numpy array of node positions, whose rows follow the
+        order of the graph's nodes (or their zindex, if both `chunk_size` and
+        `node_zindex` were given). Positions of nodes missing from the widget
+        are NaN.
+
+        Since the widget sends its layout to the kernel as a binary buffer,
+        the array is a read-only view over this buffer, without any copy,
+        unless nodes were added to the widget afterwards, in which case the
+        layout has to be sent as JSON.
+
+        Note that if the layout was never displayed, this method will return None.
+
+        Returns:
+            np.ndarray: a (n, 2) array of x & y positions.
+        """
+        if np is None:
+            raise TypeError("get_layout_array requires numpy to be installed")
+
+        if self.layout_buffer is not None:
+            return np.frombuffer(self.layout_buffer, dtype=np.float32).reshape(-1, 2)
+
+        if self.layout is None:
+            return None
+
+        positions = pack_layout(self.__serialized_table.nodes.keys, self.layout)
+
+        return np.frombuffer(positions, dtype=np.float32).reshape(-1, 2)
+
     def get_camera_state(self):
         """
         Method returning the current camera state of the widget.
@@ -1084,6 +1921,10 @@ class Sigma(DOMWidget):
         if self.selected_node is not None:
             return self.node_type(self.selected_node)
 
+    def get_hovered_node(self):
+        if self.hovered_node is not None:
+            return self.node_type(self.hovered_node)
+
     def get_selected_edge(self):
         if self.selected_edge is not None:
             return (
@@ -1106,7 +1947,8 @@ class Sigma(DOMWidget):
         for instance, or when reading the notebook on GitHub).
 
         Returns:
-            Ipython.display.HTML: the snasphot as a data url in an img tag.
+            ipywidgets.Output: an output widget displaying the snapshot as a
+                PNG image, once rendered.
         """
 
         out = Output()
@@ -1114,31 +1956,239 @@ class Sigma(DOMWidget):
             "Rendering snapshot from widget (are you sure the widget is currently displayed?)..."
         )
 
-        def on_update(change):
-            if change.new is None:
-                return
-
+        def on_response(content, buffers):
             out.clear_output()
 
             with out:
-                display(Image(url=change.new))
-
-            self.unobserve(on_update, "snapshot")
+                if "error" in content:
+                    print("Could not render snapshot: %s" % content["error"])
+                else:
+                    display(Image(data=bytes(buffers[0]), format="png"))
 
-        self.observe(on_update, "snapshot")
-        self.send({"msg": "render_snapshot"})
+        self.__send_request("snapshot", on_response)
 
         return out
 
-    def to_html(self, path):
+    async def snapshot_async(self, timeout=None):
+        """
+        Coroutine rendering a snapshot of the widget, sent by the widget as a
+        binary PNG image.
+
+        Note that the widget must be displayed, and that Jupyter kernels only
+        process widget messages in between cell executions, so this coroutine
+        should run in a task (e.g. using `asyncio.create_task`) rather than
+        be awaited at the top level of the cell displaying the widget.
 
-        # Snapshot data unnecessarily adds weight here, let's drop it
-        current_snapshot = self.snapshot
-        self.snapshot = None
+        Args:
+            timeout (float, optional): max number of seconds to wait for the
+                widget. Defaults to None.
 
+        Returns:
+            IPython.display.Image: the snapshot, whose PNG bytes can be
+                found in its `data` attribute.
+        """
+        _, buffers = await self.__request("snapshot", timeout)
+
+        return Image(data=bytes(buffers[0]), format="png")
+
+    async def layout_async(self, until_converged=True, duration=None, timeout=None):
+        """
+        Coroutine running the widget's layout algorithm until it converges,
+        or for the given duration, before returning the resulting layout.
+
+        The same notes as for `#.snapshot_async` apply.
+
+        Args:
+            until_converged (bool, optional): whether to stop the layout once
+                nodes have almost stopped moving. Defaults to True.
+            duration (float, optional): max number of seconds the layout
+                should run for. Defaults to None.
+            timeout (float, optional): max number of seconds to wait for the
+                widget, after which the layout is stopped. Defaults to None.
+
+        Returns:
+            dict: a dictionary mapping node keys to {x, y} positions.
+        """
+        if not until_converged and duration is None:
+            raise TypeError(
+                "layout_async requires either until_converged or a duration"
+            )
+
+        if duration is not None and (
+            not isinstance(duration, (int, float)) or duration <= 0
+        ):
+            raise TypeError("duration should be a positive number")
+
+        await self.__request(
+            "layout", timeout, until_converged=until_converged, duration=duration
+        )
+
+        return self.get_layout()
+
+    async def metrics_async(self, timeout=None):
+        """
+        Coroutine waiting for the widget to compute the node metrics given to
+        the `node_metrics` kwarg that must be computed by the widget, and
+        returning their results.
+
+        The same notes as for `#.snapshot_async` apply.
+
+        Args:
+            timeout (float, optional): max number of seconds to wait for the
+                widget. Defaults to None.
+
+        Returns:
+            dict: a dictionary mapping each metric's target attribute name to
+                a dictionary mapping node keys to their values.
+        """
+        content, _ = await self.__request("metrics", timeout)
+
+        return {
+            attr_name: {self.node_type(n): v for n, v in spec["result"].items()}
+            for attr_name, spec in content.get("node_metrics", {}).items()
+            if "result" in spec
+        }
+
+    def __send_request(self, kind, callback, **params):
+        request_id = uuid4().hex
+        self.__requests[request_id] = callback
+
+        self.send({"msg": "request", "id": request_id, "kind": kind, "params": params})
+
+        return request_id
+
+    def __handle_response(self, _, content, buffers):
+        if content.get("msg") != "response":
+            return
+
+        # NOTE: every view of the widget answers, only the first one counts
+        callback = self.__requests.pop(content.get("id"), None)
+
+        if callback is not None:
+            callback(content, buffers)
+
+    async def __request(self, kind, timeout=None, **params):
+        future = asyncio.get_running_loop().create_future()
+
+        def on_response(content, buffers):
+            if future.done():
+                return
+
+            if "error" in content:
+                future.set_exception(RuntimeError(content["error"]))
+            else:
+                future.set_result((content, buffers))
+
+        request_id = self.__send_request(kind, on_response, **params)
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            # NOTE: the widget is told to give up on timeout or cancellation
+            if self.__requests.pop(request_id, None) is not None:
+                self.send({"msg": "cancel_request", "id": request_id})
+
+    def to_html(self, path):
         embed_minimal_html(path, views=[self])
 
-        self.snapshot = current_snapshot
+    @classmethod
+    def from_tables(
+        cls,
+        nodes,
+        edges,
+        key="key",
+        source="source",
+        target="target",
+        directed=False,
+        multi=None,
+        **kwargs
+    ):
+        """
+        Method building a widget directly from node & edge tables (pandas
+        DataFrames or pyarrow Tables), without needing to build a networkx
+        graph first. Every other column of the tables will be used as node or
+        edge attributes.
+
+        Args:
+            nodes (pd.DataFrame or pa.Table, optional): node table. If None,
+                nodes will be inferred from the edge table.
+            edges (pd.DataFrame or pa.Table): edge table.
+            key (str, optional): name of the node key column.
+                Defaults to "key".
+            source (str, optional): name of the edge source column.
+                Defaults to "source".
+            target (str, optional): name of the edge target column.
+                Defaults to "target".
+            directed (bool, optional): whether the graph is directed.
+                Defaults to False.
+            multi (bool, optional): whether the graph can have parallel edges.
+                If None, it will be inferred from the edge table.
+                Defaults to None.
+            **kwargs: any other kwarg will be passed as-is to the widget.
+
+        Returns:
+            Sigma: the widget.
+        """
+        graph = TablesGraph(
+            nodes,
+            edges,
+            key=key,
+            source=source,
+            target=target,
+            directed=directed,
+            multi=multi,
+        )
+
+        return cls(graph, **kwargs)
+
+    @classmethod
+    def compute_layout(
+        cls,
+        graph,
+        iterations=100,
+        barnes_hut=True,
+        settings=None,
+        edge_weight=None,
+        layout=None,
+        workers=1,
+    ):
+        """
+        Method computing a ForceAtlas2 layout for the given graph in python,
+        without needing a widget to be displayed, e.g. to export the graph as
+        html later on. Its result can be given as the `layout` kwarg.
+
+        Note that the "adjustSizes" setting is not supported and will raise.
+
+        Args:
+            graph (nx.AnyGraph or ig.AnyGraph): graph to lay out.
+            iterations (int, optional): number of iterations of the layout
+                algorithm. Defaults to 100.
+            barnes_hut (bool, optional): whether to approximate repulsion
+                using the Barnes-Hut optimization. Defaults to True.
+            settings (dict, optional): settings for the ForceAtlas2 layout,
+                with the same keys as `layout_settings`. Defaults to None.
+            edge_weight (str, optional): name of the edge attribute holding
+                edge weights. Defaults to None.
+            layout (dict, optional): initial node positions. Nodes not found
+                in this dict will start from their x & y attributes, or from
+                random positions. Defaults to None.
+            workers (int, optional): number of threads among which to split
+                the computation of repulsion. Defaults to 1.
+
+        Returns:
+            dict: a dictionary mapping node keys to {x, y} positions.
+        """
+        table = GraphTable.from_interface(get_graph_interface(graph))
+
+        return compute_layout_from_table(
+            table,
+            iterations=iterations,
+            barnes_hut=barnes_hut,
+            settings=settings,
+            edge_weight=edge_weight,
+            layout=layout,
+            workers=workers,
+        )
 
     @classmethod
     def write_html(cls, graph, path, fullscreen=False, **kwargs):
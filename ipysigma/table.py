@@ -0,0 +1,461 @@
+# =============================================================================
+# ipysigma Graph Table
+# =============================================================================
+#
+# Columnar in-memory representation of a graph's nodes & edges, used by the
+# widget's Python pipeline instead of lists of per-item attribute dicts.
+#
+# Node keys, edge sources & edge targets are stored as flat lists, while
+# attributes are stored as one list of values per attribute name, missing
+# values being represented by the MISSING sentinel.
+#
+# Note that columns are never mutated in place: they are replaced as a whole
+# instead, which means tables can be copied cheaply by sharing their columns.
+#
+from hashlib import blake2b
+
+from ipysigma.shim import np, pd, pa, is_nan
+from ipysigma.gexf import process_node_gexf_viz, process_edge_gexf_viz
+
+
+class MissingType(object):
+    def __repr__(self):
+        return "MISSING"
+
+    def __bool__(self):
+        return False
+
+
+MISSING = MissingType()
+
+# NOTE: attributes that can be derived from gexf viz data
+GEXF_VIZ_ATTRIBUTES = ("size", "x", "y", "color")
+
+
+def fit_column(column, length):
+    if len(column) > length:
+        return column[:length]
+
+    if len(column) < length:
+        return column + [MISSING] * (length - len(column))
+
+    return column
+
+
+def mask_column(column, mask):
+    for i in np.flatnonzero(mask).tolist():
+        column[i] = MISSING
+
+    return column
+
+
+def numpy_array_to_column(array):
+    if array.ndim != 1:
+        raise TypeError("only 1-dimensional arrays can be used as visual variables")
+
+    kind = array.dtype.kind
+
+    # NOTE: nanosecond datetimes cannot be converted to python datetimes
+    if kind == "M":
+        array = array.astype("datetime64[us]")
+
+    column = array.tolist()
+
+    if kind == "f":
+        return mask_column(column, np.isnan(array))
+
+    if kind in "OMm":
+        return [MISSING if v is None or is_nan(v) else v for v in column]
+
+    return column
+
+
+def pandas_categorical_to_column(categorical):
+    categories = categorical.categories.tolist()
+
+    return [
+        categories[code] if code >= 0 else MISSING
+        for code in categorical.codes.tolist()
+    ]
+
+
+def pandas_series_to_column(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return pandas_categorical_to_column(series.array)
+
+    if isinstance(series.dtype, np.dtype):
+        return numpy_array_to_column(series.to_numpy())
+
+    # NOTE: extension dtypes (nullable ints, tz-aware datetimes etc.)
+    return mask_column(series.to_numpy(dtype=object).tolist(), series.isna().to_numpy())
+
+
+def pyarrow_array_to_column(array):
+    column = array.to_pylist()
+
+    if array.null_count == 0 and not pa.types.is_floating(array.type):
+        return column
+
+    return [MISSING if v is None or is_nan(v) else v for v in column]
+
+
+class ItemTable(object):
+    item_type = None
+
+    def __init__(self):
+        self.length = 0
+        self.columns = {}
+
+        # NOTE: optional permutation in which items should be added to the
+        # graph on the JavaScript side, e.g. to follow their zindex
+        self.order = None
+
+    def __len__(self):
+        return self.length
+
+    def __repr__(self):
+        return "<%s items=%i columns=%r>" % (
+            self.__class__.__name__,
+            self.length,
+            list(self.columns),
+        )
+
+    def append_attributes(self, attr):
+        i = self.length
+        columns = self.columns
+
+        for k, v in attr.items():
+            column = columns.get(k)
+
+            if column is None:
+                column = [MISSING] * i
+                columns[k] = column
+
+            column.append(v)
+
+        self.length = i + 1
+
+        # Padding columns that were not part of the given attributes
+        if len(attr) != len(columns):
+            for column in columns.values():
+                if len(column) == i:
+                    column.append(MISSING)
+
+    def get_column(self, name):
+        return self.columns.get(name)
+
+    def set_column(self, name, values):
+        if not isinstance(values, list):
+            values = list(values)
+
+        if len(values) != self.length:
+            raise TypeError(
+                "column %s has %i values but the table has %i items"
+                % (name, len(values), self.length)
+            )
+
+        self.columns[name] = values
+
+    def get_attributes(self, i):
+        attr = {}
+
+        for k, column in self.columns.items():
+            v = column[i]
+
+            if v is not MISSING:
+                attr[k] = v
+
+        return attr
+
+    def iter_attributes(self):
+        if not self.columns:
+            for _ in range(self.length):
+                yield {}
+
+            return
+
+        names = list(self.columns)
+
+        for row in zip(*self.columns.values()):
+            yield {k: v for k, v in zip(names, row) if v is not MISSING}
+
+    def project(self, names):
+        self.columns = {k: v for k, v in self.columns.items() if k in names}
+
+    def permute(self, permutation):
+        self.columns = {
+            k: [column[i] for i in permutation] for k, column in self.columns.items()
+        }
+
+    def process_gexf_viz(self, process):
+        """
+        Method processing the "viz" column of the table, as found in gexf
+        files, by rewriting the columns it affects. Only the values derived
+        from viz data are written, in copies of the affected columns, so that
+        the original attributes are never copied nor mutated.
+        """
+        viz_column = self.columns.get("viz")
+
+        if viz_column is None:
+            return
+
+        self.columns = {k: v for k, v in self.columns.items() if k != "viz"}
+
+        written = {}
+
+        for i, viz in enumerate(viz_column):
+            if viz is MISSING:
+                continue
+
+            attr = {"viz": viz}
+
+            for name in GEXF_VIZ_ATTRIBUTES:
+                column = self.columns.get(name)
+
+                if column is not None and column[i] is not MISSING:
+                    attr[name] = column[i]
+
+            process(attr)
+
+            for name, v in attr.items():
+                column = written.get(name)
+
+                if column is None:
+                    column = self.columns.get(name)
+                    column = (
+                        list(column) if column is not None else [MISSING] * self.length
+                    )
+                    written[name] = column
+
+                column[i] = v
+
+        self.columns.update(written)
+
+    def map_columns(self, fn):
+        table = self.copy()
+        table.columns = {k: fn(column) for k, column in self.columns.items()}
+
+        return table
+
+    def copy_into(self, table):
+        table.length = self.length
+        table.columns = dict(self.columns)
+        table.order = self.order
+
+        return table
+
+    def slice_into(self, table, start, stop):
+        table.columns = {k: column[start:stop] for k, column in self.columns.items()}
+        table.length = len(range(start, min(stop, self.length)))
+
+        return table
+
+
+class NodeTable(ItemTable):
+    item_type = "node"
+
+    def __init__(self):
+        super().__init__()
+        self.keys = []
+
+    def append(self, key, attr):
+        self.keys.append(key)
+        self.append_attributes(attr)
+
+    def iter_keys(self):
+        return iter(self.keys)
+
+    def permute(self, permutation):
+        super().permute(permutation)
+        self.keys = [self.keys[i] for i in permutation]
+
+    def copy(self):
+        table = self.copy_into(NodeTable())
+        table.keys = self.keys
+
+        return table
+
+    def slice(self, start, stop):
+        table = self.slice_into(NodeTable(), start, stop)
+        table.keys = self.keys[start:stop]
+
+        return table
+
+    def to_items(self):
+        return [
+            {"key": key, "attributes": attr}
+            for key, attr in zip(self.keys, self.iter_attributes())
+        ]
+
+    @classmethod
+    def from_items(cls, items):
+        table = cls()
+
+        for item in items:
+            table.append(item["key"], item.get("attributes", {}))
+
+        return table
+
+
+class EdgeTable(ItemTable):
+    item_type = "edge"
+
+    def __init__(self):
+        super().__init__()
+        self.sources = []
+        self.targets = []
+
+    def append(self, source, target, attr):
+        self.sources.append(source)
+        self.targets.append(target)
+        self.append_attributes(attr)
+
+    def iter_keys(self):
+        return zip(self.sources, self.targets)
+
+    def permute(self, permutation):
+        super().permute(permutation)
+        self.sources = [self.sources[i] for i in permutation]
+        self.targets = [self.targets[i] for i in permutation]
+
+    def copy(self):
+        table = self.copy_into(EdgeTable())
+        table.sources = self.sources
+        table.targets = self.targets
+
+        return table
+
+    def slice(self, start, stop):
+        table = self.slice_into(EdgeTable(), start, stop)
+        table.sources = self.sources[start:stop]
+        table.targets = self.targets[start:stop]
+
+        return table
+
+    def to_items(self):
+        return [
+            {"source": source, "target": target, "attributes": attr}
+            for source, target, attr in zip(
+                self.sources, self.targets, self.iter_attributes()
+            )
+        ]
+
+    @classmethod
+    def from_items(cls, items):
+        table = cls()
+
+        for item in items:
+            table.append(item["source"], item["target"], item.get("attributes", {}))
+
+        return table
+
+
+class GraphTable(object):
+    """
+    Class holding the nodes & edges of a graph as columnar tables.
+    """
+
+    def __init__(self, is_directed=False, is_multi=False):
+        self.is_directed = is_directed
+        self.is_multi = is_multi
+        self.nodes = NodeTable()
+        self.edges = EdgeTable()
+
+    def __repr__(self):
+        return "<GraphTable nodes=%r edges=%r>" % (self.nodes, self.edges)
+
+    def get_items(self, item_type):
+        return self.nodes if item_type == "node" else self.edges
+
+    def node_index(self):
+        return {key: i for i, key in enumerate(self.nodes.keys)}
+
+    def fingerprint(self, edge_weight=None):
+        """
+        Method returning a tuple of digests identifying the table's structure,
+        i.e. its nodes & edges, and the weights of its edges if `edge_weight`
+        is given (None otherwise).
+        """
+        structure = blake2b(digest_size=16)
+        structure.update(repr(self.is_directed).encode())
+        structure.update(repr(self.nodes.keys).encode())
+        structure.update(repr(self.edges.sources).encode())
+        structure.update(repr(self.edges.targets).encode())
+
+        if edge_weight is None:
+            return structure.hexdigest(), None
+
+        weights = blake2b(digest_size=16)
+        weights.update(repr(self.edges.get_column(edge_weight)).encode())
+
+        return structure.hexdigest(), weights.hexdigest()
+
+    def copy(self):
+        table = GraphTable(is_directed=self.is_directed, is_multi=self.is_multi)
+        table.nodes = self.nodes.copy()
+        table.edges = self.edges.copy()
+
+        return table
+
+    @classmethod
+    def from_items(cls, nodes, edges, is_directed=False, is_multi=False):
+        table = cls(is_directed=is_directed, is_multi=is_multi)
+        table.nodes = NodeTable.from_items(nodes)
+        table.edges = EdgeTable.from_items(edges)
+
+        return table
+
+    @classmethod
+    def from_interface(cls, graph_interface, process_gexf_viz=True, on_node=None):
+        """
+        Function building a table from the given graph interface, processing
+        gexf viz data if needed. The `on_node` callback, if given, will be
+        called with each node key (e.g. to validate it).
+        """
+        table = cls(
+            is_directed=graph_interface.is_directed(),
+            is_multi=graph_interface.is_multi(),
+        )
+
+        # NOTE: columnar interfaces (e.g. igraph, or node & edge tables) are
+        # read as-is, without walking their items
+        columns = graph_interface.columns()
+
+        if columns is not None:
+            node_keys, node_columns, sources, targets, edge_columns = columns
+
+            if on_node is not None:
+                for node in node_keys:
+                    on_node(node)
+
+            table.nodes.keys = list(node_keys)
+            table.nodes.columns = dict(node_columns)
+            table.nodes.length = len(node_keys)
+
+            table.edges.sources = list(sources)
+            table.edges.targets = list(targets)
+            table.edges.columns = dict(edge_columns)
+            table.edges.length = len(sources)
+
+        else:
+            nodes = table.nodes
+
+            for node, attr in graph_interface.nodes():
+                if on_node is not None:
+                    on_node(node)
+
+                nodes.append(node, attr)
+
+            edges = table.edges
+
+            # NOTE: networkx multigraph can have keys on edges, but they
+            # are not required to be unique across the graph, which makes
+            # them pointless for graphology, gexf etc.
+            for source, target, attr in graph_interface.edges():
+                edges.append(source, target, attr)
+
+        if process_gexf_viz:
+            table.nodes.process_gexf_viz(process_node_gexf_viz)
+            table.edges.process_gexf_viz(process_edge_gexf_viz)
+
+        return table
@@ -0,0 +1,111 @@
+import os
+import pytest
+import numpy as np
+import networkx as nx
+
+from ipysigma import Sigma
+from ipysigma.interfaces import get_graph_interface
+from ipysigma.table import GraphTable
+from ipysigma.layout import (
+    LayoutCache,
+    QuadTree,
+    barnes_hut_repulsion,
+    exact_repulsion,
+)
+
+
+class TestLayout(object):
+    def test_barnes_hut_repulsion(self):
+        rng = np.random.default_rng(0)
+        positions = rng.random((500, 2)) * 100
+        masses = rng.integers(1, 5, 500).astype(np.float64)
+        nodes = np.arange(500)
+
+        exact = exact_repulsion(positions, masses, nodes, 1)
+        tree = QuadTree(positions, masses, 3)
+
+        approximated = barnes_hut_repulsion(tree, positions, masses, nodes, 1, 0.5)
+        assert np.abs(approximated - exact).sum() / np.abs(exact).sum() < 0.01
+
+        # NOTE: a null theta means every cell must be visited
+        approximated = barnes_hut_repulsion(tree, positions, masses, nodes, 1, 0)
+        assert np.allclose(approximated, exact)
+
+    def test_compute_layout(self):
+        g = nx.karate_club_graph()
+
+        layout = Sigma.compute_layout(g, iterations=10)
+
+        assert set(layout) == set(g)
+        assert set(layout[0]) == {"x", "y"}
+        assert layout == Sigma.compute_layout(g, iterations=10)
+
+        threaded_layout = Sigma.compute_layout(g, iterations=10, workers=2)
+
+        for node, p in layout.items():
+            assert threaded_layout[node]["x"] == pytest.approx(p["x"])
+
+        exact_layout = Sigma.compute_layout(g, iterations=0, barnes_hut=False)
+        assert exact_layout == Sigma.compute_layout(g, iterations=0)
+
+        with pytest.raises(TypeError):
+            Sigma.compute_layout(g, settings={"unknown": True})
+
+        with pytest.raises(TypeError):
+            Sigma.compute_layout(g, settings={"adjustSizes": True})
+
+        # NOTE: zero iterations is valid and leaves the initial layout as-is
+        with pytest.raises(TypeError):
+            Sigma.compute_layout(g, iterations=-1)
+
+        initial = {n: {"x": float(n), "y": 0.0} for n in g}
+        assert Sigma.compute_layout(g, iterations=0, layout=initial) == initial
+
+        assert layout == Sigma.compute_layout(
+            g, iterations=10, settings={"adjustSizes": False}
+        )
+
+    def test_layout_cache(self, tmp_path):
+        g = nx.path_graph(3)
+        table = GraphTable.from_interface(get_graph_interface(g))
+        cache = LayoutCache(tmp_path, max_size=48)
+
+        key = LayoutCache.key(table)
+
+        assert key != LayoutCache.key(table, {"gravity": 2})
+        assert cache.get(key, table.nodes.keys) is None
+
+        cache.set(key, table.nodes.keys, {0: {"x": 1, "y": 2}, "1": {"x": 3, "y": 4}})
+
+        assert cache.get(key, table.nodes.keys) == {
+            0: {"x": 1, "y": 2},
+            1: {"x": 3, "y": 4},
+        }
+
+        # NOTE: a 3-node layout takes 24 bytes
+        other_key = LayoutCache.key(table, {"gravity": 2})
+        cache.set(other_key, table.nodes.keys, {})
+
+        # NOTE: backdating files, since mtime resolution can be coarse
+        os.utime(cache.get_path(key), (0, 0))
+        os.utime(cache.get_path(other_key), (1, 1))
+
+        cache.get(key, table.nodes.keys)
+        cache.set(LayoutCache.key(table, {"gravity": 3}), table.nodes.keys, {})
+
+        assert cache.get(key, table.nodes.keys) is not None
+        assert cache.get(other_key, table.nodes.keys) is None
+
+    def test_widget_layout_cache(self, tmp_path):
+        g = nx.path_graph(3)
+        layout = {n: {"x": n, "y": -n} for n in g}
+
+        w = Sigma(g, layout_cache=tmp_path)
+        assert w.get_layout() is None
+
+        # NOTE: the first layout sent by the widget is its initial one
+        w.layout = {str(n): {"x": 0, "y": 0} for n in g}
+        w.layout = {str(n): p for n, p in layout.items()}
+
+        assert Sigma(g, layout_cache=tmp_path).get_layout() == layout
+        assert Sigma(g).get_layout() is None
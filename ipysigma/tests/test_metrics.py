@@ -0,0 +1,111 @@
+import networkx as nx
+
+import ipysigma.metrics
+
+from ipysigma import Sigma
+from ipysigma.interfaces import get_graph_interface
+from ipysigma.table import GraphTable
+from ipysigma.metrics import (
+    MetricGraph,
+    METRICS_CACHE,
+    clear_metrics_cache,
+    close_process_pool,
+    compute_metric_with_igraph,
+    compute_metric_with_networkx,
+    compute_node_metrics,
+)
+
+
+def get_table(g):
+    return GraphTable.from_interface(get_graph_interface(g))
+
+
+class TestMetrics(object):
+    def test_compute_node_metrics(self):
+        clear_metrics_cache()
+
+        g = nx.Graph()
+        g.add_edge("one", "two", weight=2)
+        g.add_edge("two", "three", weight=3)
+
+        table = get_table(g)
+
+        compute_node_metrics(
+            table,
+            {
+                "degree": {"name": "degree"},
+                "strength": {"name": "weighted_degree"},
+                "core": {"name": "kcore"},
+            },
+            edge_weight="weight",
+        )
+
+        assert table.nodes.columns["degree"] == [1, 2, 1]
+        assert table.nodes.columns["strength"] == [2, 5, 3]
+        assert table.nodes.columns["core"] == [1, 1, 1]
+        assert len(METRICS_CACHE) == 3
+
+        # NOTE: the same graph's metrics are taken from the cache
+        other_table = get_table(g)
+        compute_node_metrics(other_table, {"degree": {"name": "degree"}})
+
+        assert other_table.nodes.columns["degree"] is table.nodes.columns["degree"]
+        assert len(METRICS_CACHE) == 3
+
+    def test_process_pool(self, monkeypatch):
+        clear_metrics_cache()
+        monkeypatch.setattr(ipysigma.metrics, "PROCESS_POOL_EDGE_THRESHOLD", 0)
+
+        g = nx.karate_club_graph()
+        spec = {"name": "betweenness", "samples": None}
+
+        table = get_table(g)
+        compute_node_metrics(table, {"b": spec})
+
+        # NOTE: the pool is opt-in
+        assert ipysigma.metrics.PROCESS_POOL is None
+
+        clear_metrics_cache()
+        pooled_table = get_table(g)
+
+        try:
+            compute_node_metrics(pooled_table, {"b": spec}, process_pool=True)
+            assert ipysigma.metrics.PROCESS_POOL is not None
+        finally:
+            close_process_pool()
+
+        assert ipysigma.metrics.PROCESS_POOL is None
+        assert pooled_table.nodes.columns["b"] == table.nodes.columns["b"]
+
+    def test_backends(self):
+        g = nx.karate_club_graph()
+        graph = MetricGraph.from_table(get_table(g))
+
+        for spec in [
+            {"name": "kcore"},
+            {"name": "betweenness", "samples": None},
+        ]:
+            assert compute_metric_with_igraph(
+                graph, spec
+            ) == compute_metric_with_networkx(graph, spec)
+
+        # NOTE: results are reproducible
+        for compute in (compute_metric_with_igraph, compute_metric_with_networkx):
+            spec = {"name": "communities", "seed": 1}
+            assert compute(graph, spec) == compute(graph, spec)
+
+            spec = {"name": "betweenness", "samples": 5}
+            assert compute(graph, spec) == compute(graph, spec)
+
+    def test_widget(self):
+        g = nx.karate_club_graph()
+
+        w = Sigma(
+            g,
+            node_metrics={"community": "communities", "louvain": "louvain"},
+            node_color="community",
+        )
+
+        assert w.node_metrics == {"louvain": {"name": "louvain"}}
+        assert "community" in w.data["nodes"][0]["attributes"]
+        assert "categories" in w.visual_variables["nodeColor"]
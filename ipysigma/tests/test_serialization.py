@@ -0,0 +1,176 @@
+from array import array
+from datetime import date
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from ipysigma.serialization import (
+    encode_column,
+    sanitize_column,
+    serialize_graph_json,
+    serialize_graph_columns,
+    GraphChunker,
+)
+from ipysigma.table import MISSING, GraphTable
+
+
+def decode(column):
+    if column.get("type") == "json":
+        return column["data"]
+
+    typecode = {"float64": "d", "int32": "i", "int16": "h", "int8": "b"}[
+        column["dtype"]
+    ]
+
+    return array(typecode, column["data"].tobytes()).tolist()
+
+
+class TestEncodeColumn(object):
+    def test_int(self):
+        column = encode_column("age", [1, 2, 3])
+
+        assert column["type"] == "number"
+        assert column["dtype"] == "int32"
+        assert decode(column) == [1, 2, 3]
+
+    def test_float_with_missing(self):
+        column = encode_column("size", [1.5, None, float("nan"), 3])
+
+        assert column["type"] == "number"
+        assert column["dtype"] == "float64"
+
+        values = decode(column)
+
+        assert values[0] == 1.5
+        assert values[1] != values[1]
+        assert values[2] != values[2]
+        assert values[3] == 3.0
+
+    def test_boolean(self):
+        column = encode_column("flag", [True, None, False])
+
+        assert column["type"] == "boolean"
+        assert decode(column) == [1, -1, 0]
+
+    def test_string(self):
+        column = encode_column("lang", ["fr", "en", None, "fr", date(2022, 1, 1)])
+
+        assert column["type"] == "string"
+        assert column["dtype"] == "int8"
+        assert column["categories"] == ["fr", "en", "2022-01-01"]
+        assert decode(column) == [0, 1, -1, 0, 2]
+
+    def test_json(self):
+        column = encode_column("misc", [1, "test", [1, 2], None])
+
+        assert column["type"] == "json"
+        assert column["data"] == [1, "test", [1, 2], None]
+
+
+class TestSanitizeColumn(object):
+    def test_clean(self):
+        values = ["one", 2, True, None, 3.5, MISSING]
+
+        assert sanitize_column(values) is values
+
+    def test_dirty(self):
+        values = [
+            float("nan"),
+            np.float32(1.5),
+            np.int64(2),
+            pd.NA,
+            pd.NaT,
+            np.datetime64("2022-01-01"),
+            date(2022, 1, 1),
+            MISSING,
+        ]
+
+        sanitized = sanitize_column(values)
+
+        assert sanitized == [
+            None,
+            1.5,
+            2,
+            None,
+            None,
+            "2022-01-01T00:00:00",
+            "2022-01-01",
+            MISSING,
+        ]
+        assert type(sanitized[2]) is int
+
+        assert sanitize_column([1.5, MISSING], keep_missing=False) == [1.5, None]
+
+
+NODES = [
+    {"key": "one", "attributes": {"size": 1}},
+    {"key": "two", "attributes": {"label": "Two"}},
+]
+EDGES = [
+    {"source": "one", "target": "two", "attributes": {}},
+    {"source": "two", "target": "two", "attributes": {"weight": float("nan")}},
+]
+
+
+class TestSerializeGraphJSON(object):
+    def test_basics(self):
+        data = serialize_graph_json(GraphTable.from_items(NODES, EDGES))
+
+        assert data["format"] == "json"
+        assert data["options"] == {"type": "undirected", "multi": False}
+        assert data["nodes"] == NODES
+        assert data["edges"] == [
+            {"source": 0, "target": 1, "attributes": {}},
+            {"source": 1, "target": 1, "attributes": {"weight": None}},
+        ]
+
+
+class TestSerializeGraphColumns(object):
+    def test_basics(self):
+        data = serialize_graph_columns(
+            GraphTable.from_items(NODES, EDGES, is_directed=True)
+        )
+
+        assert data["format"] == "columnar"
+        assert data["options"] == {"type": "directed", "multi": False}
+        assert data["nodes"]["keys"] == ["one", "two"]
+        assert [c["name"] for c in data["nodes"]["columns"]] == ["size", "label"]
+        assert decode(data["edges"]["sources"]) == [0, 1]
+        assert decode(data["edges"]["targets"]) == [1, 1]
+        assert [c["name"] for c in data["edges"]["columns"]] == ["weight"]
+
+
+class TestGraphChunker(object):
+    def test_basics(self):
+        chunker = GraphChunker(GraphTable.from_items(NODES, EDGES), 1)
+
+        assert len(chunker) == 4
+        assert chunker.header() == {
+            "format": "chunked",
+            "encoding": "json",
+            "options": {"type": "undirected", "multi": False},
+            "chunks": 4,
+            "order": 2,
+            "size": 2,
+        }
+
+        assert chunker.chunk(1) == {"nodes": [NODES[1]]}
+        assert chunker.chunk(3) == {
+            "edges": [{"source": 1, "target": 1, "attributes": {"weight": None}}]
+        }
+
+        with pytest.raises(IndexError):
+            chunker.chunk(4)
+
+    def test_columnar(self):
+        chunker = GraphChunker(GraphTable.from_items(NODES, EDGES), 3, columnar=True)
+
+        assert len(chunker) == 2
+        assert chunker.chunk(0)["nodes"]["keys"] == ["one", "two"]
+
+        edges = chunker.chunk(1)["edges"]
+
+        assert decode(edges["sources"]) == [0, 1]
+        assert decode(edges["targets"]) == [1, 1]
+        assert chunker.serialize()["format"] == "columnar"
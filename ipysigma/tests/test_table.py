@@ -0,0 +1,85 @@
+import networkx as nx
+import igraph as ig
+
+from ipysigma.interfaces import get_graph_interface
+from ipysigma.table import MISSING, NodeTable, GraphTable, fit_column
+
+NODES = [
+    {"key": "one", "attributes": {"size": 1}},
+    {"key": "two", "attributes": {"label": "Two"}},
+    {"key": "three", "attributes": {}},
+]
+
+
+class TestGraphTable(object):
+    def test_item_table(self):
+        table = NodeTable.from_items(NODES)
+
+        assert len(table) == 3
+        assert table.columns == {
+            "size": [1, MISSING, MISSING],
+            "label": [MISSING, "Two", MISSING],
+        }
+        assert table.to_items() == NODES
+        assert table.get_attributes(1) == {"label": "Two"}
+
+        table.permute([2, 0, 1])
+
+        assert table.keys == ["three", "one", "two"]
+        assert table.columns["size"] == [MISSING, 1, MISSING]
+
+        sliced = table.slice(1, 5)
+
+        assert len(sliced) == 2
+        assert sliced.to_items() == NODES[:2]
+
+        copy = table.copy()
+        copy.project({"label"})
+
+        assert list(copy.columns) == ["label"]
+        assert list(table.columns) == ["size", "label"]
+
+    def test_fit_column(self):
+        column = [1, 2]
+
+        assert fit_column(column, 1) == [1]
+        assert fit_column(column, 4) == [1, 2, MISSING, MISSING]
+
+        # NOTE: columns can be shared by copied tables
+        assert column == [1, 2]
+
+    def test_from_interface(self):
+        g = nx.DiGraph()
+        g.add_node("one", viz={"color": {"r": 0, "g": 0, "b": 0}})
+        g.add_node("two", color="red", viz={"color": {"r": 0, "g": 0, "b": 0}})
+        g.add_node("three", size=4)
+        g.add_edge("one", "two", weight=3)
+
+        table = GraphTable.from_interface(get_graph_interface(g))
+
+        assert table.is_directed
+        assert not table.is_multi
+        assert table.nodes.to_items() == [
+            {"key": "one", "attributes": {"color": "rgba(0, 0, 0)"}},
+            {"key": "two", "attributes": {"color": "red"}},
+            {"key": "three", "attributes": {"size": 4}},
+        ]
+        assert table.edges.sources == ["one"]
+        assert table.edges.targets == ["two"]
+        assert table.edges.columns == {"weight": [3]}
+
+        # NOTE: the graph's own attributes must not be mutated
+        assert "viz" in g.nodes["one"]
+
+    def test_from_igraph_interface(self):
+        g = ig.Graph(n=3, edges=[(0, 1), (1, 2)])
+        g.vs["label"] = ["a", "b", "c"]
+        g.es["weight"] = [1, 2]
+
+        table = GraphTable.from_interface(get_graph_interface(g))
+
+        assert table.nodes.keys == [0, 1, 2]
+        assert table.nodes.columns == {"label": ["a", "b", "c"]}
+        assert table.edges.sources == [0, 1]
+        assert table.edges.targets == [1, 2]
+        assert table.edges.columns == {"weight": [1, 2]}
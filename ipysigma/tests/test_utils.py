@@ -1,8 +1,18 @@
+import pytest
 import networkx as nx
 import igraph as ig
-from copy import deepcopy
+import numpy as np
+import pandas as pd
 
-from ipysigma.utils import is_partition, resolve_variable, sort_items_per_zindex
+from ipysigma.table import MISSING, NodeTable, EdgeTable, GraphTable
+from ipysigma.utils import (
+    is_partition,
+    compute_order_per_attribute,
+    batched,
+    resolve_variable,
+    resolve_kernel_sync,
+    VisualVariableBuilder,
+)
 
 
 class TestMiscUtils(object):
@@ -12,17 +22,44 @@ class TestMiscUtils(object):
         assert is_partition([[0, 1], [2, 3]])
         assert is_partition([{0, 1}, {2, 3}])
 
+    def test_resolve_kernel_sync(self):
+        assert resolve_kernel_sync(None, 0.5) == {
+            "camera": {"policy": "debounce", "interval": 0.5},
+            "selection": {"policy": "throttle", "interval": 0.5},
+            "hover": {"policy": "debounce", "interval": 0.5},
+        }
+
+        resolved = resolve_kernel_sync({"hover": "idle"}, 1)
+        assert resolved["hover"] == {"policy": "idle", "interval": 1.0}
+        assert resolved["camera"]["policy"] == "debounce"
+
+        resolved = resolve_kernel_sync("throttle", 0)
+        assert {v["policy"] for v in resolved.values()} == {"throttle"}
+
+        with pytest.raises(TypeError):
+            resolve_kernel_sync("whenever", 0.5)
+
+        with pytest.raises(TypeError):
+            resolve_kernel_sync({"layout": "idle"}, 0.5)
+
+        with pytest.raises(TypeError):
+            resolve_kernel_sync(None, -1)
+
 
 class TestResolveVariable(object):
     NODES = [{"key": "one", "attributes": {}}, {"key": "two", "attributes": {}}]
     EDGES = [{"source": "one", "target": "two"}]
 
     def resolve_variable(self, name, target, item_type="node", is_directed=False):
-        items = deepcopy(self.NODES if item_type == "node" else self.EDGES)
+        if item_type == "node":
+            table = NodeTable.from_items(self.NODES)
+        else:
+            table = EdgeTable.from_items(self.EDGES)
+
         attr_name = resolve_variable(
-            name, items, target, item_type=item_type, is_directed=is_directed
+            name, table, target, item_type=item_type, is_directed=is_directed
         )
-        return attr_name, items
+        return attr_name, table.to_items()
 
     def test_node_attribute(self):
         name, _ = self.resolve_variable("node_color", "lang")
@@ -88,13 +125,15 @@ class TestResolveVariable(object):
         g.add_vertex(1)
         g.add_edge(0, 1)
 
-        items = [{"key": 0, "attributes": {}}, {"key": 1, "attributes": {}}]
+        table = NodeTable.from_items(
+            [{"key": 0, "attributes": {}}, {"key": 1, "attributes": {}}]
+        )
 
-        name = resolve_variable("node_size", items, g.degree)
+        name = resolve_variable("node_size", table, g.degree)
 
         assert name == "ipysigma_kwarg_node_size"
 
-        assert items == [
+        assert table.to_items() == [
             {"key": 0, "attributes": {"ipysigma_kwarg_node_size": 1}},
             {"key": 1, "attributes": {"ipysigma_kwarg_node_size": 1}},
         ]
@@ -171,61 +210,235 @@ class TestResolveVariable(object):
         g.add_vertex(0)
         g.add_vertex(1)
 
-        items = [{"key": 0, "attributes": {}}, {"key": 1, "attributes": {}}]
+        table = NodeTable.from_items(
+            [{"key": 0, "attributes": {}}, {"key": 1, "attributes": {}}]
+        )
 
-        name = resolve_variable("node_size", items, g.betweenness())
+        name = resolve_variable("node_size", table, g.betweenness())
 
         assert name == "ipysigma_kwarg_node_size"
-        assert items == [
+        assert table.to_items() == [
             {"key": 0, "attributes": {"ipysigma_kwarg_node_size": 0.0}},
             {"key": 1, "attributes": {"ipysigma_kwarg_node_size": 0.0}},
         ]
 
-    # TODO: edges (partitions)
+    def test_numpy_array(self):
+        name, items = self.resolve_variable("node_size", np.array([np.nan, 2.5]))
 
+        assert name == "ipysigma_kwarg_node_size"
+        assert items == [
+            {"key": "one", "attributes": {}},
+            {"key": "two", "attributes": {"ipysigma_kwarg_node_size": 2.5}},
+        ]
 
-class TestSortItemsPerZindex(object):
-    def test_attribute(self):
-        items = [
-            {"key": "one", "attributes": {"z": 2}},
-            {"key": "two", "attributes": {"z": 3}},
-            {"key": "three", "attributes": {"z": 1}},
+    def test_pandas_series(self):
+        name, items = self.resolve_variable("node_size", pd.Series({"two": 3}))
+
+        assert name == "ipysigma_kwarg_node_size"
+        assert items == [
+            {"key": "one", "attributes": {}},
+            {"key": "two", "attributes": {"ipysigma_kwarg_node_size": 3}},
         ]
 
-        sort_items_per_zindex("node_zindex", items, "z")
+        index = pd.MultiIndex.from_tuples([("two", "one")])
+
+        name, items = self.resolve_variable(
+            "edge_size", pd.Series([4], index=index), item_type="edge"
+        )
 
         assert items == [
-            {"key": "three", "attributes": {"z": 1}},
-            {"key": "one", "attributes": {"z": 2}},
-            {"key": "two", "attributes": {"z": 3}},
+            {
+                "source": "one",
+                "target": "two",
+                "attributes": {"ipysigma_kwarg_edge_size": 4},
+            }
         ]
 
-    def test_callable(self):
-        items = [
-            {"key": "one", "attributes": {"age": 2}},
-            {"key": "two", "attributes": {"age": 3}},
-            {"key": "three", "attributes": {"age": 1}},
+    def test_pandas_categorical(self):
+        name, items = self.resolve_variable(
+            "node_color", pd.Categorical([None, "blue"])
+        )
+
+        assert name == "ipysigma_kwarg_node_color"
+        assert items == [
+            {"key": "one", "attributes": {}},
+            {"key": "two", "attributes": {"ipysigma_kwarg_node_color": "blue"}},
         ]
 
-        sort_items_per_zindex("node_zindex", items, lambda n, attr: attr["age"] * 2)
+    def test_batched(self):
+        @batched
+        def getter(keys):
+            assert isinstance(keys, np.ndarray)
+            return np.char.add(keys, "_value")
 
+        name, items = self.resolve_variable("node_value", getter)
+
+        assert name == "ipysigma_kwarg_node_value"
         assert items == [
-            {"key": "three", "attributes": {"age": 1, "ipysigma_kwarg_node_zindex": 2}},
-            {"key": "one", "attributes": {"age": 2, "ipysigma_kwarg_node_zindex": 4}},
-            {"key": "two", "attributes": {"age": 3, "ipysigma_kwarg_node_zindex": 6}},
+            {"key": "one", "attributes": {"ipysigma_kwarg_node_value": "one_value"}},
+            {"key": "two", "attributes": {"ipysigma_kwarg_node_value": "two_value"}},
         ]
 
+        edges = EdgeTable.from_items(
+            [
+                {"source": "one", "target": "two", "attributes": {"weight": 2}},
+                {"source": "two", "target": "three", "attributes": {}},
+            ]
+        )
+
+        @batched
+        def edge_getter(sources, targets, attr):
+            assert sources.tolist() == ["one", "two"]
+            return attr["weight"] * 2
+
+        resolve_variable("edge_size", edges, edge_getter, item_type="edge")
+
+        assert edges.columns["ipysigma_kwarg_edge_size"] == [4.0, MISSING]
+
+        with pytest.raises(TypeError):
+            resolve_variable("edge_size", edges, batched(lambda s, t: [1]), "edge")
+
+    # TODO: edges (partitions)
+
+
+class TestComputeOrderPerAttribute(object):
+    def test_attribute(self):
+        items = NodeTable.from_items(
+            [
+                {"key": "one", "attributes": {"z": 2}},
+                {"key": "two", "attributes": {"z": 3}},
+                {"key": "three", "attributes": {"z": 1}},
+            ]
+        )
+
+        assert compute_order_per_attribute(items, "z") == [2, 0, 1]
+
+    def test_callable(self):
+        items = NodeTable.from_items(
+            [
+                {"key": "one", "attributes": {"age": 2}},
+                {"key": "two", "attributes": {"age": 3}},
+                {"key": "three", "attributes": {"age": 1}},
+            ]
+        )
+
+        attr_name = resolve_variable(
+            "node_zindex", items, lambda n, attr: attr["age"] * 2
+        )
+
+        assert items.columns[attr_name] == [4, 6, 2]
+        assert compute_order_per_attribute(items, attr_name) == [2, 0, 1]
+
     def test_mapping(self):
-        items = [
-            {"key": "one", "attributes": {}},
+        items = NodeTable.from_items(
+            [
+                {"key": "one", "attributes": {}},
+                {"key": "two", "attributes": {}},
+                {"key": "three", "attributes": {}},
+            ]
+        )
+
+        attr_name = resolve_variable(
+            "node_zindex", items, {"one": 2, "two": 3, "three": 1}
+        )
+
+        assert compute_order_per_attribute(items, attr_name) == [2, 0, 1]
+
+        # NOTE: items themselves are left untouched
+        assert items.keys == ["one", "two", "three"]
+
+    def test_order(self):
+        items = NodeTable.from_items(
+            [
+                {"key": "one", "attributes": {"z": 2}},
+                {"key": "two", "attributes": {}},
+                {"key": "three", "attributes": {"z": -1}},
+                {"key": "four", "attributes": {"z": 2}},
+            ]
+        )
+
+        assert compute_order_per_attribute(items, "z") == [2, 1, 0, 3]
+        assert compute_order_per_attribute(items, "unknown") is None
+
+        items.set_column("z", [0.5, MISSING, 10**10, -(10**10)])
+
+        assert compute_order_per_attribute(items, "z") == [3, 1, 0, 2]
+
+
+class TestVisualVariableBuilder(object):
+    def test_single_pass(self):
+        table = GraphTable.from_items(
+            [{"key": "one", "attributes": {"age": 2}}, {"key": "two"}],
+            [{"source": "one", "target": "two"}],
+        )
+
+        builder = VisualVariableBuilder(table)
+
+        builder.build_continuous("nodeSize", None, lambda n, attr: attr.get("age"))
+        builder.build_raw("nodeLabel", None, {"one": "One"})
+        builder.build_continuous("edgeSize", None, lambda s, t: 3)
+
+        # NOTE: nothing is resolved before the builder is built
+        assert table.nodes.columns == {"age": [2, MISSING]}
+
+        variables = builder.build()
+
+        assert variables["nodeSize"]["attribute"] == "ipysigma_kwarg_raw_node_size"
+        assert variables["nodeLabel"]["attribute"] == "ipysigma_kwarg_node_label"
+        assert table.nodes.to_items() == [
+            {
+                "key": "one",
+                "attributes": {
+                    "age": 2,
+                    "ipysigma_kwarg_raw_node_size": 2,
+                    "ipysigma_kwarg_node_label": "One",
+                },
+            },
             {"key": "two", "attributes": {}},
-            {"key": "three", "attributes": {}},
         ]
+        assert table.edges.columns == {"ipysigma_kwarg_raw_edge_size": [3]}
+
+    def test_statistics(self):
+        table = GraphTable.from_items(
+            [
+                {"key": "one", "attributes": {"lang": "fr", "age": 2}},
+                {"key": "two", "attributes": {"lang": "en", "age": float("nan")}},
+                {"key": "three", "attributes": {"lang": "fr", "age": 7}},
+                {"key": "four", "attributes": {}},
+            ],
+            [],
+        )
 
-        sort_items_per_zindex("node_zindex", items, {"one": 2, "two": 3, "three": 1})
+        builder = VisualVariableBuilder(table)
 
-        assert items == [
-            {"key": "three", "attributes": {"ipysigma_kwarg_node_zindex": 1}},
-            {"key": "one", "attributes": {"ipysigma_kwarg_node_zindex": 2}},
-            {"key": "two", "attributes": {"ipysigma_kwarg_node_zindex": 3}},
-        ]
+        builder.build_categorical_or_continuous("nodeColor", "lang", None)
+        builder.build_continuous("nodeSize", "age", None, range=(1, 5))
+
+        variables = builder.build(max_categorical_colors=2)
+
+        assert variables["nodeColor"]["categories"] == [["fr", 2], ["en", 1]]
+        assert variables["nodeColor"]["overflowing"]
+        assert variables["nodeSize"]["extent"] == [2, 7]
+        # NOTE: unknown attributes are left for the widget to scan
+        assert "extent" not in variables["edgeSize"]
+
+    def test_numpy_extent(self):
+        table = GraphTable.from_items(
+            [
+                {"key": "one", "attributes": {"size": np.int64(10), "w": np.nan}},
+                {"key": "two", "attributes": {"size": np.float32(2.5), "w": None}},
+                {"key": "three", "attributes": {"size": np.bool_(True)}},
+            ],
+            [],
+        )
+
+        builder = VisualVariableBuilder(table)
+
+        builder.build_continuous("nodeSize", "size", None, range=(1, 5))
+        builder.build_continuous("nodeColor", "w", None, range=(1, 5))
+
+        variables = builder.build()
+
+        assert variables["nodeSize"]["extent"] == [2.5, 10]
+        # NOTE: the widget falls back to scanning when nothing numeric is found
+        assert "extent" not in variables["nodeColor"]
@@ -1,11 +1,379 @@
 #!/usr/bin/env python
 # coding: utf-8
+import asyncio
+from array import array
+
+import pytest
+import numpy as np
 import networkx as nx
+import pandas as pd
+import pyarrow as pa
 
-from ipysigma import Sigma
+from ipysigma import Sigma, SigmaGrid
+from ipysigma.serialization import GRAPH_CACHE, clear_graph_cache
 
 
 class TestSigmaWidget(object):
     def test_default(self):
         w = Sigma(nx.Graph())
         assert w.height == "500px"
+
+    def test_columnar_data(self):
+        g = nx.Graph()
+        g.add_edge("one", "two", weight=3)
+        g.nodes["one"]["lang"] = "fr"
+
+        w = Sigma(g, columnar_data=True)
+
+        assert w.data["format"] == "columnar"
+        assert w.data["nodes"]["keys"] == ["one", "two"]
+        assert w.data["edges"]["sources"]["data"].tolist() == [0]
+        assert w.data["edges"]["targets"]["data"].tolist() == [1]
+
+    def test_attributes(self):
+        g = nx.Graph()
+        g.add_node("one", lang="fr", abstract="Long text...", x=1, y=2)
+        g.add_node("two", lang="en", abstract="Long text...", x=3, y=4)
+        g.add_edge("one", "two", weight=3, comment="Edge")
+
+        w = Sigma(g, node_color="lang", attributes="minimal")
+
+        assert w.data["nodes"] == [
+            {"key": "one", "attributes": {"lang": "fr", "x": 1, "y": 2}},
+            {"key": "two", "attributes": {"lang": "en", "x": 3, "y": 4}},
+        ]
+        assert w.data["edges"] == [
+            {"source": 0, "target": 1, "attributes": {"weight": 3}}
+        ]
+
+        w = Sigma(g, node_size=g.degree, attributes=["abstract"])
+
+        assert w.data["nodes"][0]["attributes"] == {
+            "abstract": "Long text...",
+            "x": 1,
+            "y": 2,
+            "ipysigma_kwarg_node_size": 1,
+        }
+
+    def test_patches(self, monkeypatch):
+        g = nx.Graph()
+        g.add_edge("one", "two")
+
+        w = Sigma(g)
+
+        sent = []
+        monkeypatch.setattr(w, "send", sent.append)
+
+        w.add_nodes(["three", ("four", {"size": float("nan")})])
+        w.add_edges([("three", "four", {"weight": 2})])
+        w.update_node_attributes({"one": {"color": "red"}})
+        w.remove_edges([("one", "two")])
+        w.remove_nodes(["three"])
+
+        assert [message["patch"] for message in sent] == [
+            {
+                "type": "addNodes",
+                "nodes": [
+                    {"key": "three", "attributes": {}},
+                    {"key": "four", "attributes": {"size": None}},
+                ],
+            },
+            {
+                "type": "addEdges",
+                "edges": [
+                    {"source": "three", "target": "four", "attributes": {"weight": 2}}
+                ],
+            },
+            {
+                "type": "updateNodeAttributes",
+                "nodes": [{"key": "one", "attributes": {"color": "red"}}],
+            },
+            {"type": "dropEdges", "edges": [("one", "two")]},
+            {"type": "dropNodes", "nodes": ["three"]},
+        ]
+
+        with pytest.raises(TypeError):
+            w.add_nodes([1])
+
+    def test_restyle(self, monkeypatch):
+        g = nx.Graph()
+        g.add_node("one", lang="fr", party="a")
+        g.add_node("two", lang="en", party="b")
+        g.add_edge("one", "two")
+
+        w = Sigma(g, node_color="lang", attributes="minimal")
+
+        sent = []
+        monkeypatch.setattr(w, "send", lambda *args: sent.append(args))
+
+        w.restyle(node_color="party", node_size={"one": 1, "two": 2})
+
+        assert w.visual_variables["nodeColor"]["attribute"] == "party"
+        assert w.visual_variables["nodeSize"]["attribute"] == "ipysigma_kwarg_node_size"
+        assert w.visual_variables["nodeSize"]["extent"] == [1, 2]
+
+        message, buffers = sent[0]
+        patch = message["patch"]
+
+        assert message["msg"] == "patch"
+        assert patch["type"] == "updateColumns"
+        assert [column["name"] for column in patch["nodes"]["columns"]] == [
+            "ipysigma_kwarg_node_size",
+            "party",
+        ]
+        assert patch["edges"]["columns"] == []
+        assert len(buffers) == 2
+
+        # NOTE: columns already known to the widget are not sent again
+        w.restyle(node_color="lang")
+
+        assert len(sent) == 1
+        assert w.visual_variables["nodeColor"]["attribute"] == "lang"
+        assert w.visual_variables["nodeSize"]["attribute"] == "ipysigma_kwarg_node_size"
+
+        with pytest.raises(TypeError):
+            w.restyle(height=300)
+
+    def test_chunk_size(self, monkeypatch):
+        g = nx.path_graph(5)
+
+        w = Sigma(g, chunk_size=2)
+
+        assert w.data["format"] == "chunked"
+        assert w.data["chunks"] == 5
+
+        sent = []
+        monkeypatch.setattr(w, "send", lambda *args: sent.append(args))
+
+        w._handle_custom_msg({"msg": "request_chunk", "index": 3}, [])
+
+        message, buffers = sent[0]
+
+        assert message["msg"] == "chunk"
+        assert message["index"] == 3
+        assert message["chunk"] == {
+            "edges": [
+                {"source": 0, "target": 1, "attributes": {}},
+                {"source": 1, "target": 2, "attributes": {}},
+            ]
+        }
+        assert buffers == []
+
+        with pytest.raises(TypeError):
+            Sigma(g, chunk_size=0)
+
+    def test_from_tables(self):
+        nodes = pd.DataFrame({"key": ["one", "two"], "size": [3.0, float("nan")]})
+        edges = pd.DataFrame(
+            {"source": ["one", "two"], "target": ["two", "three"], "weight": [1, 2]}
+        )
+
+        w = Sigma.from_tables(nodes, edges, node_size="size", directed=True)
+
+        assert w.data["options"] == {"type": "directed", "multi": False}
+        assert w.data["nodes"] == [
+            {"key": "one", "attributes": {"size": 3.0}},
+            {"key": "two", "attributes": {}},
+            {"key": "three", "attributes": {}},
+        ]
+        assert w.data["edges"] == [
+            {"source": 0, "target": 1, "attributes": {"weight": 1}},
+            {"source": 1, "target": 2, "attributes": {"weight": 2}},
+        ]
+
+        edges = pa.table({"source": ["one", "two"], "target": ["two", "one"]})
+
+        w = Sigma.from_tables(None, edges, selected_edge=("one", "two"))
+
+        assert w.data["options"] == {"type": "undirected", "multi": True}
+
+        with pytest.raises(TypeError):
+            Sigma.from_tables(None, edges, source="from")
+
+    def test_layout_buffer(self):
+        g = nx.Graph()
+        g.add_edge("one", "two")
+        g.add_node("three")
+
+        w = Sigma(g, stream_layout_interval=0.5)
+        assert w.get_layout() is None
+        assert w.get_layout_array() is None
+
+        # NOTE: the widget sends float32 (x, y) pairs aligned with its nodes
+        positions = array("f", [1, 2, 3, 4, float("nan"), float("nan")])
+        w.set_state({"layout_buffer": memoryview(positions.tobytes())})
+
+        assert w.get_layout() == {"one": {"x": 1, "y": 2}, "two": {"x": 3, "y": 4}}
+
+        layout = w.get_layout_array()
+        assert layout.shape == (3, 2)
+        assert layout[:2].tolist() == [[1, 2], [3, 4]]
+        assert np.shares_memory(layout, np.frombuffer(w.layout_buffer, np.uint8))
+
+        w.set_state({"layout_buffer": None, "layout": {"two": {"x": 5, "y": 6}}})
+
+        assert w.get_layout() == {"two": {"x": 5, "y": 6}}
+        assert w.get_layout_array()[1].tolist() == [5, 6]
+
+        with pytest.raises(TypeError):
+            Sigma(g, stream_layout_interval=0)
+
+    def test_graph_cache(self):
+        clear_graph_cache()
+
+        g = nx.Graph()
+        g.add_edge("one", "two")
+
+        first = Sigma(g, cache_key="g")
+        second = Sigma(g, cache_key="g", node_size={"one": 1, "two": 2})
+
+        assert first.data["key"] == second.data["key"]
+        assert first.shared_data is second.shared_data
+        assert second.data["nodes"] == [
+            {"ipysigma_kwarg_node_size": 1},
+            {"ipysigma_kwarg_node_size": 2},
+        ]
+        assert len(GRAPH_CACHE) == 1
+
+        # NOTE: without an explicit key, the cache must be enabled
+        assert Sigma(g).data["format"] == "json"
+
+        Sigma.set_defaults(graph_cache=True)
+
+        try:
+            first = Sigma(g)
+            assert Sigma(g).data["key"] == first.data["key"]
+
+            g.add_edge("two", "three")
+            assert Sigma(g).data["key"] != first.data["key"]
+            assert len(GRAPH_CACHE) == 3
+
+            # NOTE: in-place attribute edits must not serve stale data
+            g.nodes["one"]["color"] = "red"
+            edited = Sigma(g)
+            assert edited.data["key"] != first.data["key"]
+            assert edited.shared_data["nodes"][0]["attributes"]["color"] == "red"
+            assert len(GRAPH_CACHE) == 4
+        finally:
+            Sigma.set_defaults(graph_cache=False)
+            clear_graph_cache()
+
+    def test_async_requests(self, monkeypatch):
+        g = nx.Graph()
+        g.add_edge("one", "two")
+
+        w = Sigma(g)
+        sent = []
+        monkeypatch.setattr(
+            w, "send", lambda content, buffers=None: sent.append(content)
+        )
+
+        def respond(content, buffers=None):
+            w._handle_custom_msg(content, buffers or [])
+
+        async def snapshot():
+            task = asyncio.create_task(w.snapshot_async())
+            await asyncio.sleep(0)
+
+            request = sent[-1]
+            assert request["msg"] == "request"
+            assert request["kind"] == "snapshot"
+
+            respond({"msg": "response", "id": request["id"]}, [memoryview(b"png")])
+
+            # NOTE: only the first view's response counts
+            respond({"msg": "response", "id": request["id"]}, [memoryview(b"other")])
+
+            return await task
+
+        assert asyncio.run(snapshot()).data == b"png"
+
+        async def metrics():
+            task = asyncio.create_task(w.metrics_async())
+            await asyncio.sleep(0)
+
+            respond(
+                {
+                    "msg": "response",
+                    "id": sent[-1]["id"],
+                    "node_metrics": {
+                        "louvain": {"name": "louvain", "result": {"one": 0, "two": 0}}
+                    },
+                }
+            )
+
+            return await task
+
+        assert asyncio.run(metrics()) == {"louvain": {"one": 0, "two": 0}}
+
+        async def failure():
+            task = asyncio.create_task(w.layout_async(duration=1))
+            await asyncio.sleep(0)
+
+            assert sent[-1]["params"] == {"until_converged": True, "duration": 1}
+
+            respond({"msg": "response", "id": sent[-1]["id"], "error": "nope"})
+
+            return await task
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(failure())
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(w.snapshot_async(timeout=0.01))
+
+        assert sent[-1] == {"msg": "cancel_request", "id": sent[-2]["id"]}
+
+        with pytest.raises(TypeError):
+            asyncio.run(w.layout_async(until_converged=False))
+
+        with pytest.raises(TypeError):
+            asyncio.run(w.layout_async(duration=-1))
+
+
+class TestSigmaGrid(object):
+    def test_shared_graph(self):
+        g = nx.Graph()
+        g.add_edge("one", "two", weight=3)
+
+        grid = SigmaGrid(
+            g,
+            views=[
+                {"node_size": {"one": 1, "two": 2}},
+                {"node_color": "lang"},
+                {"node_zindex": {"one": 2, "two": 1}},
+            ],
+        )
+
+        first, second, third = grid._SigmaGrid__views
+
+        assert first.shared_data["format"] == "json"
+        assert first.shared_data["nodes"] == [
+            {"key": "one", "attributes": {}},
+            {"key": "two", "attributes": {}},
+        ]
+        assert second.shared_data is None
+
+        assert first.data["format"] == "overlay"
+        assert first.data["key"] == second.data["key"]
+        assert first.data["nodes"] == [
+            {"ipysigma_kwarg_node_size": 1},
+            {"ipysigma_kwarg_node_size": 2},
+        ]
+        assert second.data["nodes"] == [{}, {}]
+
+        # Items are sorted per zindex by the widget, using the shared graph
+        assert third.data["format"] == "overlay"
+        assert third.data["nodes"] == [{}, {}]
+        assert third.data["order"]["nodes"]["data"].tolist() == [1, 0]
+
+    def test_kernel_metrics(self):
+        grid = SigmaGrid(
+            nx.path_graph(3),
+            views=[{"node_metrics": {"core": "kcore"}}, {}],
+        )
+
+        first, second = grid._SigmaGrid__views
+
+        assert first.data["nodes"] == [{"core": 1}, {"core": 1}, {"core": 1}]
+        assert second.data["nodes"] == [{}, {}, {}]
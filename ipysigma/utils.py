@@ -1,8 +1,24 @@
+from math import isfinite
 from inspect import signature, Parameter
-from datetime import date, datetime
+from itertools import islice, repeat
+from collections import Counter
 from collections.abc import Mapping, Sequence, Iterable
 
-from ipysigma.shim import is_nan
+from ipysigma.shim import (
+    np,
+    pd,
+    is_numpy_array,
+    is_pandas_series,
+    is_pandas_categorical,
+)
+from ipysigma.table import (
+    MISSING,
+    fit_column,
+    numpy_array_to_column,
+    pandas_categorical_to_column,
+    pandas_series_to_column,
+)
+from ipysigma.serialization import sanitize_column
 from ipysigma.interfaces import is_networkx_degree_view, is_igraph_vertex_clustering
 from ipysigma.constants import (
     SUPPORTED_RANGE_BOUNDS,
@@ -15,21 +31,13 @@ from ipysigma.constants import (
     DEFAULT_EDGE_CURVENESS,
     DEFAULT_EDGE_SIZE_RANGE,
     DEFAULT_NODE_PICTOGRAM_COLOR,
+    DEFAULT_MAX_CATEGORICAL_COLORS,
+    KWARG_ATTRIBUTE_PREFIX,
+    SUPPORTED_KERNEL_SYNC_POLICIES,
+    DEFAULT_KERNEL_SYNC_POLICIES,
 )
 
 
-def fix_items_for_json_serialization(items):
-    for item in items:
-        attr = item["attributes"]
-
-        for k, v in attr.items():
-            if is_nan(v):
-                attr[k] = None
-
-            elif isinstance(v, (date, datetime)):
-                attr[k] = v.isoformat()
-
-
 def count_arity(fn) -> int:
     parameters = signature(fn).parameters
 
@@ -90,7 +98,268 @@ def resolve_palette(name, value):
     return list(value.items())
 
 
-def resolve_variable(name, items, target, item_type="node", is_directed=False):
+def align_pandas_series(series, items, item_type="node", is_directed=False):
+    values = pandas_series_to_column(series)
+    index = series.index
+
+    if item_type == "node":
+        positions = index.get_indexer(items.keys).tolist()
+
+    # NOTE: edges can only be aligned on a (source, target) multi index
+    elif isinstance(index, pd.MultiIndex):
+        positions = index.get_indexer(list(items.iter_keys())).tolist()
+
+        if not is_directed:
+            missing = [i for i, p in enumerate(positions) if p < 0]
+
+            if missing:
+                reversed_positions = index.get_indexer(
+                    [(items.targets[i], items.sources[i]) for i in missing]
+                ).tolist()
+
+                for i, p in zip(missing, reversed_positions):
+                    positions[i] = p
+
+    else:
+        return fit_column(values, len(items))
+
+    return [values[p] if p >= 0 else MISSING for p in positions]
+
+
+def create_mapping_resolver(mapping, item_type="node", is_directed=False):
+    if item_type == "node" or is_directed:
+
+        def resolve(key, _):
+            try:
+                return mapping[key]
+            except KeyError:
+                return None
+
+        return resolve
+
+    def resolve(key, _):
+        try:
+            return mapping[key]
+        except KeyError:
+            try:
+                return mapping[(key[1], key[0])]
+            except KeyError:
+                return None
+
+    return resolve
+
+
+def create_set_resolver(mapping, item_type="node", is_directed=False):
+    if item_type == "edge" and is_directed:
+        return lambda key, _: key in mapping or (key[1], key[0]) in mapping
+
+    return lambda key, _: key in mapping
+
+
+def create_callable_resolver(name, fn, item_type="node"):
+    # NOTE: returns whether the function needs the item's attributes
+    arity = count_arity(fn)
+
+    if item_type == "node" and arity > 2:
+        raise TypeError(
+            "%s is expecting a function taking node or node and attributes as arguments"
+            % name
+        )
+
+    elif item_type == "edge" and arity > 3:
+        raise TypeError(
+            "%s is expecting a function taking source, target or source, target and attributes as arguments"
+            % name
+        )
+
+    if arity == 0:
+        return lambda key, _: fn(), False
+
+    if item_type == "node":
+        if arity == 1:
+            return lambda key, _: fn(key), False
+
+        return fn, True
+
+    if arity == 1:
+        return lambda key, _: fn(key[0]), False
+
+    if arity == 2:
+        return lambda key, _: fn(key[0], key[1]), False
+
+    return lambda key, attr: fn(key[0], key[1], attr), True
+
+
+class BatchedFunction(object):
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __call__(self, *args):
+        return self.fn(*args)
+
+    def __repr__(self):
+        return "<BatchedFunction %r>" % self.fn
+
+
+def batched(fn):
+    """
+    Decorator marking a function used as a visual variable as batched, i.e.
+    called only once with whole columns instead of once per node or edge.
+
+    Batched node functions are given an array of node keys and, optionally,
+    a mapping from attribute names to arrays of attribute values. Batched
+    edge functions are given arrays of source & target keys and, optionally,
+    the same mapping of attribute arrays. Arrays are numpy arrays, or lists
+    if numpy is not installed, and missing attribute values are given as NaN
+    in numerical columns and None in other ones.
+
+    Batched functions must return an array, a list or a pandas Series
+    holding exactly one value per item, in the order of the given keys.
+
+    Args:
+        fn (callable): function to mark as batched.
+
+    Returns:
+        BatchedFunction: the marked function.
+
+    Example:
+        @batched
+        def score(sources, targets, attributes):
+            return np.log1p(attributes["weight"])
+
+        Sigma(g, edge_size=score)
+    """
+    if not callable(fn):
+        raise TypeError("batched is expecting a function")
+
+    return BatchedFunction(fn)
+
+
+def column_to_array(values):
+    if np is None:
+        return values
+
+    array = np.asarray(values)
+
+    # NOTE: tuple keys would otherwise be read as a 2-dimensional array
+    if array.ndim != 1:
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+
+    return array
+
+
+def attribute_column_to_array(column):
+    values = [None if v is MISSING else v for v in column]
+
+    if np is None:
+        return values
+
+    if not any(v is MISSING for v in column):
+        return column_to_array(values)
+
+    # NOTE: numerical columns having missing values are read as floats w/ NaN
+    if all(
+        v is None or (isinstance(v, (int, float)) and not isinstance(v, bool))
+        for v in values
+    ):
+        return np.array(values, dtype=float)
+
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+
+    return array
+
+
+class BatchedAttributes(Mapping):
+    def __init__(self, items):
+        self.items = items
+        self.arrays = {}
+
+    def __getitem__(self, name):
+        array = self.arrays.get(name)
+
+        if array is None:
+            column = self.items.get_column(name)
+
+            if column is None:
+                raise KeyError(name)
+
+            array = attribute_column_to_array(column)
+            self.arrays[name] = array
+
+        return array
+
+    def __iter__(self):
+        return iter(self.items.columns)
+
+    def __len__(self):
+        return len(self.items.columns)
+
+
+def apply_batched_function(name, items, fn, item_type="node"):
+    arity = count_arity(fn.fn)
+
+    if item_type == "node":
+        if arity not in (1, 2):
+            raise TypeError(
+                "%s is expecting a batched function taking keys or keys and attributes as arguments"
+                % name
+            )
+
+        args = [column_to_array(items.keys)]
+
+    else:
+        if arity not in (1, 2, 3):
+            raise TypeError(
+                "%s is expecting a batched function taking sources, targets or sources, targets and attributes as arguments"
+                % name
+            )
+
+        args = [column_to_array(items.sources), column_to_array(items.targets)]
+
+    args = args[:arity]
+
+    if len(args) < arity:
+        args.append(BatchedAttributes(items))
+
+    values = fn(*args)
+
+    if is_pandas_series(values):
+        column = pandas_series_to_column(values)
+
+    elif is_numpy_array(values):
+        column = numpy_array_to_column(values)
+
+    elif isinstance(values, Iterable) and not isinstance(values, (str, bytes)):
+        column = [MISSING if v is None else v for v in values]
+
+    else:
+        raise TypeError(
+            "%s batched function should return an array or a list of values" % name
+        )
+
+    if len(column) != len(items):
+        raise TypeError(
+            "%s batched function returned %i values but there are %i %ss"
+            % (name, len(column), len(items), item_type)
+        )
+
+    return column
+
+
+def prepare_variable(name, items, target, item_type="node", is_directed=False):
+    """
+    Function preparing the given visual variable target (an attribute name,
+    a mapping, a partition, a set, an iterable or a callable) against the
+    given node or edge table.
+
+    Targets that can be read in bulk (iterables, numpy arrays, pandas
+    objects, batched functions) are written right away in a new column of the table, while
+    targets requiring to visit every item (mappings, sets, callables) are
+    returned as a (resolve, needs_attributes) resolver, to be given to
+    `resolve_items`, along with the name of the attribute to read.
+    """
 
     # If we have an igraph.Clustering.VertexClustering, we recast it as a partition
     if is_igraph_vertex_clustering(target):
@@ -113,119 +382,124 @@ def resolve_variable(name, items, target, item_type="node", is_directed=False):
 
     # Attribute name
     if isinstance(target, str):
-        return target
+        return target, None
+
+    target_name = KWARG_ATTRIBUTE_PREFIX + name
+
+    # Batched functions, called once with whole columns
+    if isinstance(target, BatchedFunction):
+        items.set_column(
+            target_name,
+            apply_batched_function(name, items, target, item_type=item_type),
+        )
+
+        return target_name, None
+
+    # NumPy arrays & pandas objects, whose values are read in bulk
+    elif is_pandas_series(target):
+        items.set_column(
+            target_name,
+            align_pandas_series(
+                target, items, item_type=item_type, is_directed=is_directed
+            ),
+        )
+
+        return target_name, None
+
+    elif is_pandas_categorical(target):
+        items.set_column(
+            target_name,
+            fit_column(pandas_categorical_to_column(target), len(items)),
+        )
+
+        return target_name, None
+
+    elif is_numpy_array(target):
+        items.set_column(
+            target_name, fit_column(numpy_array_to_column(target), len(items))
+        )
+
+        return target_name, None
 
     # Arbitrary mapping
     # NOTE: must be used before callable to handle stuff like g.degree
     elif isinstance(target, Mapping) or is_networkx_degree_view(target):
-        mapping = target
-        target = "ipysigma_kwarg_%s" % name
-
-        for item in items:
-            if item_type == "node":
-                try:
-                    v = mapping[item["key"]]
-                except KeyError:
-                    v = None
-            else:
-                try:
-                    v = mapping[(item["source"], item["target"])]
-                except KeyError:
-                    if not is_directed:
-                        try:
-                            v = mapping[(item["target"], item["source"])]
-                        except KeyError:
-                            v = None
-                    else:
-                        v = None
-
-            if v is None:
-                continue
+        resolver = create_mapping_resolver(
+            target, item_type=item_type, is_directed=is_directed
+        )
 
-            item["attributes"][target] = v
-
-        return target
+        return target_name, (resolver, False)
 
     # Sets
     elif isinstance(target, (set, frozenset)):
-        mapping = target
-        target = "ipysigma_kwarg_%s" % name
+        resolver = create_set_resolver(
+            target, item_type=item_type, is_directed=is_directed
+        )
 
-        for item in items:
-            v = False
+        return target_name, (resolver, False)
 
-            if item_type == "node":
-                v = item["key"] in mapping
-            else:
-                v = (item["source"], item["target"]) in mapping
+    # Iterable range
+    elif isinstance(target, Iterable):
+        items.set_column(
+            target_name, fit_column(list(islice(target, len(items))), len(items))
+        )
 
-                if not v and is_directed:
-                    v = (item["target"], item["source"]) in mapping
+        return target_name, None
 
-            item["attributes"][target] = v
+    # Callable
+    elif callable(target):
+        return target_name, create_callable_resolver(name, target, item_type=item_type)
 
-        return target
+    # Fail
+    else:
+        raise TypeError(
+            "%s should be an attribute name, or a mapping, or a partition, or a function"
+            % name
+        )
 
-    # Iterable range
-    elif isinstance(target, Iterable):
-        mapping = target
-        target = "ipysigma_kwarg_%s" % name
 
-        for item, value in zip(items, mapping):
-            item["attributes"][target] = value
+def resolve_items(items, resolvers):
+    """
+    Function applying the given resolvers, as returned by `prepare_variable`,
+    to every item of the given node or edge table in a single pass, and
+    returning one column of values per resolver.
+    """
+    columns = [[] for _ in resolvers]
 
-        return target
+    if not resolvers:
+        return columns
 
-    # Callable
-    elif callable(target):
-        fn = target
-        target = "ipysigma_kwarg_%s" % name
+    if any(needs_attributes for _, needs_attributes in resolvers):
+        attributes = items.iter_attributes()
+    else:
+        attributes = repeat(None)
 
-        arity = count_arity(fn)
+    pairs = [
+        (resolve, column.append) for (resolve, _), column in zip(resolvers, columns)
+    ]
 
-        if item_type == "node" and arity > 2:
-            raise TypeError(
-                "%s is expecting a function taking node or node and attributes as arguments"
-                % name
-            )
+    for key, attr in zip(items.iter_keys(), attributes):
+        for resolve, append in pairs:
+            v = resolve(key, attr)
+            append(MISSING if v is None else v)
 
-        elif item_type == "edge" and arity > 3:
-            raise TypeError(
-                "%s is expecting a function taking source, target or source, target and attributes as arguments"
-                % name
-            )
+    return columns
 
-        for item in items:
-            if item_type == "node":
-                if arity == 0:
-                    v = fn()
-                elif arity == 1:
-                    v = fn(item["key"])
-                else:
-                    v = fn(item["key"], item["attributes"])
-            else:
-                if arity == 0:
-                    v = fn()
-                elif arity == 1:
-                    v = fn(item["source"])
-                elif arity == 2:
-                    v = fn(item["source"], item["target"])
-                else:
-                    v = fn(item["source"], item["target"], item["attributes"])
-
-            if v is None:
-                continue
 
-            item["attributes"][target] = v
+def resolve_variable(name, items, target, item_type="node", is_directed=False):
+    """
+    Function resolving the given visual variable target against the given
+    node or edge table. Computed values are written in a new column of the
+    table and the name of the attribute to read is returned.
+    """
+    target_name, resolver = prepare_variable(
+        name, items, target, item_type=item_type, is_directed=is_directed
+    )
 
-        return target
+    if resolver is not None:
+        items.set_column(target_name, resolve_items(items, [resolver])[0])
 
-    # Fail
-    else:
-        raise TypeError(
-            "%s should be an attribute name, or a mapping, or a partition, or a function"
-            % name
-        )
+    return target_name
 
 
 def resolve_metrics(name, target, supported):
@@ -264,7 +538,7 @@ def resolve_metrics(name, target, supported):
         if metric_name not in supported:
             raise TypeError(
                 'unknown %s "%s", expecting one of %s'
-                % (name, metric_name, ", ".join('"%s"' % m for m in supported))
+                % (name, metric_name, ", ".join('"%s"' % m for m in sorted(supported)))
             )
 
     return metrics
@@ -311,15 +585,132 @@ def check_zindex_int_return(fn):
     return wrapper
 
 
-def sort_items_per_zindex(name, items, sorter, item_type="node", is_directed=True):
-    zindex_attr_name = resolve_variable(
-        name, items, sorter, item_type=item_type, is_directed=is_directed
+def compute_order_per_attribute(items, name):
+    """
+    Function returning the permutation sorting the items of the given table
+    per the values of the given attribute, items without a value being
+    considered to have a value of 0, or None if the table has no such column.
+    """
+    column = items.get_column(name)
+
+    if column is None:
+        return None
+
+    values = [0 if v is MISSING else v for v in column]
+
+    if np is not None:
+        array = np.asarray(values)
+
+        if array.dtype.kind in "iuf" and array.ndim == 1:
+            # NOTE: numpy stable sort is a radix sort for integers of 16 bits
+            # or less, which is typically the case of small zindex ranges
+            if array.dtype.kind in "iu" and len(array) > 0:
+                low = array.min()
+
+                if array.max() - low < 2**15:
+                    array = (array - low).astype(np.int16)
+
+            return np.argsort(array, kind="stable").tolist()
+
+    return sorted(range(len(values)), key=values.__getitem__)
+
+
+def compute_extent(column):
+    """
+    Function returning the [min, max] extent of the finite numbers found in
+    the given column, or None if it does not contain any.
+    """
+    # NOTE: numpy scalars are converted to their python counterpart first
+    numbers = [
+        v
+        for v in sanitize_column(column, keep_missing=False)
+        if isinstance(v, (int, float)) and not isinstance(v, bool) and isfinite(v)
+    ]
+
+    if not numbers:
+        return None
+
+    return [min(numbers), max(numbers)]
+
+
+def compute_top_categories(column, max_count=DEFAULT_MAX_CATEGORICAL_COLORS):
+    """
+    Function returning the at most `max_count` most frequent values of the
+    given column, as a list of [value, count] pairs sorted by decreasing
+    frequency (ties being kept in order of first appearance), along with
+    whether some values were cut off. Missing values are counted as None.
+
+    Returns None if the column contains unhashable values.
+    """
+    try:
+        frequencies = Counter(sanitize_column(column, keep_missing=False))
+    except TypeError:
+        return None
+
+    top = [[v, count] for v, count in frequencies.most_common(max_count)]
+
+    return top, len(frequencies) > len(top)
+
+
+def resolve_attributes(name, target):
+    if target is None:
+        return None
+
+    if target == "minimal":
+        return set()
+
+    if isinstance(target, Iterable) and not isinstance(target, (str, bytes)):
+        return set(target)
+
+    raise TypeError(
+        name + ' should be "minimal" or an iterable of attribute names to keep'
     )
 
-    def item_key(item):
-        return item["attributes"].get(zindex_attr_name, 0)
 
-    items.sort(key=item_key)
+def resolve_kernel_sync(policy, interval):
+    """
+    Function resolving the policies used by the widget to sync its camera,
+    selection & hover state back to the kernel, returning a dict mapping
+    each target to a {policy, interval} dict.
+    """
+    policies = dict(DEFAULT_KERNEL_SYNC_POLICIES)
+
+    if isinstance(policy, str):
+        policies = {target: policy for target in policies}
+
+    elif isinstance(policy, Mapping):
+        for target, target_policy in policy.items():
+            if target not in policies:
+                raise TypeError(
+                    'unsupported kernel sync target "%s", expecting one of %s'
+                    % (target, ", ".join(sorted(policies)))
+                )
+
+            policies[target] = target_policy
+
+    elif policy is not None:
+        raise TypeError(
+            "kernel_sync_policy should be a policy name or a dict mapping targets to policy names"
+        )
+
+    for target_policy in policies.values():
+        if target_policy not in SUPPORTED_KERNEL_SYNC_POLICIES:
+            raise TypeError(
+                'unsupported kernel sync policy "%s", expecting one of %s'
+                % (target_policy, ", ".join(sorted(SUPPORTED_KERNEL_SYNC_POLICIES)))
+            )
+
+    if (
+        isinstance(interval, bool)
+        or not isinstance(interval, (int, float))
+        or interval < 0
+    ):
+        raise TypeError("kernel_sync_interval should be a positive number")
+
+    return {
+        target: {"policy": target_policy, "interval": float(interval)}
+        for target, target_policy in policies.items()
+    }
 
 
 class VisualVariableBuilder(object):
@@ -357,15 +748,102 @@ class VisualVariableBuilder(object):
             "edgeCurveness": {"type": "constant", "default": DEFAULT_EDGE_CURVENESS},
         }
 
-    def __init__(self, nodes, edges, is_directed):
-        self.nodes = nodes
-        self.edges = edges
-        self.is_directed = is_directed
+    def __init__(self, table):
+        self.nodes = table.nodes
+        self.edges = table.edges
+        self.is_directed = table.is_directed
         self.variables = VisualVariableBuilder.get_default()
+        self.pending = {"node": [], "edge": []}
 
-    def build(self):
+    def build(
+        self, max_categorical_colors=DEFAULT_MAX_CATEGORICAL_COLORS, skip_statistics=()
+    ):
+        self.resolve_pending()
+        self.compute_statistics(max_categorical_colors, skip=skip_statistics)
         return self.variables
 
+    def resolve(self, name, target, item_type="node"):
+        """
+        Method resolving the given visual variable target. Targets requiring
+        to visit every item are only recorded, so that they can all be
+        resolved in a single pass over the items by `#.resolve_pending`.
+        """
+        items = self.nodes if item_type == "node" else self.edges
+
+        target_name, resolver = prepare_variable(
+            name, items, target, item_type=item_type, is_directed=self.is_directed
+        )
+
+        if resolver is not None:
+            self.pending[item_type].append((target_name, resolver))
+
+        return target_name
+
+    def resolve_pending(self):
+        for item_type, pending in self.pending.items():
+            items = self.nodes if item_type == "node" else self.edges
+
+            columns = resolve_items(items, [resolver for _, resolver in pending])
+
+            for (target_name, _), column in zip(pending, columns):
+                items.set_column(target_name, column)
+
+            pending.clear()
+
+    def compute_statistics(
+        self, max_categorical_colors=DEFAULT_MAX_CATEGORICAL_COLORS, skip=()
+    ):
+        """
+        Method computing the statistics the widget needs to build its scales
+        & legends, i.e. the extent of continuous variables and the most
+        frequent categories of categorical variables without explicit
+        palette, so that the widget does not need to scan the whole graph.
+
+        Attributes unknown to the table, or found in `skip` (e.g. computed
+        by the widget itself, such as node metrics), are left for the widget
+        to scan.
+        """
+        for name, variable in self.variables.items():
+            attr_name = variable.get("attribute")
+
+            if attr_name is None or attr_name in skip:
+                continue
+
+            items = self.nodes if name.startswith("node") else self.edges
+            column = items.get_column(attr_name)
+
+            if column is None:
+                continue
+
+            if variable["type"] == "continuous" or (
+                name == "nodeSize" and variable["type"] != "category"
+            ):
+                extent = compute_extent(column)
+
+                # NOTE: the widget scans the graph itself when no extent is given
+                if extent is not None:
+                    variable["extent"] = extent
+
+            elif variable["type"] == "category" and not isinstance(
+                variable.get("palette"), list
+            ):
+                top = compute_top_categories(column, max_categorical_colors)
+
+                if top is not None:
+                    variable["categories"], variable["overflowing"] = top
+
+    def get_attributes(self, item_type="node"):
+        attributes = set()
+
+        for name, variable in self.variables.items():
+            if not name.startswith(item_type):
+                continue
+
+            if "attribute" in variable:
+                attributes.add(variable["attribute"])
+
+        return attributes
+
     def template(self, name, prefix=None, suffix=None, item_type="node", raw=False):
         return "{}{}_{}{}{}".format(
             "raw_" if raw else "",
@@ -380,17 +858,14 @@ class VisualVariableBuilder(object):
     ):
         raw = mapped or raw
         item_type = "node" if name.startswith("node") else "edge"
-        items = self.nodes if item_type == "node" else self.edges
 
         if raw is not None:
             variable = {"type": "raw"}
 
-            variable["attribute"] = resolve_variable(
+            variable["attribute"] = self.resolve(
                 self.template(kind, prefix=variable_prefix, item_type=item_type),
-                items,
                 raw,
                 item_type=item_type,
-                is_directed=self.is_directed,
             )
 
             self.variables[name] = variable
@@ -415,19 +890,16 @@ class VisualVariableBuilder(object):
         scale=None,
     ):
         item_type = "node" if name.startswith("node") else "edge"
-        items = self.nodes if item_type == "node" else self.edges
 
         if raw is not None:
             variable = {"type": "raw"}
 
-            variable["attribute"] = resolve_variable(
+            variable["attribute"] = self.resolve(
                 self.template(
                     kind, prefix=variable_prefix, raw=True, item_type=item_type
                 ),
-                items,
                 raw,
                 item_type=item_type,
-                is_directed=self.is_directed,
             )
 
             self.variables[name] = variable
@@ -448,12 +920,10 @@ class VisualVariableBuilder(object):
             if default is None:
                 default = range[0]
 
-            variable["attribute"] = resolve_variable(
+            variable["attribute"] = self.resolve(
                 self.template(kind, prefix=variable_prefix, item_type=item_type),
-                items,
                 mapped,
                 item_type=item_type,
-                is_directed=self.is_directed,
             )
 
             self.variables[name] = variable
@@ -480,17 +950,14 @@ class VisualVariableBuilder(object):
         scale=None,
     ):
         item_type = "node" if name.startswith("node") else "edge"
-        items = self.nodes if item_type == "node" else self.edges
 
         if mapped is not None:
             variable = {"type": "category"}
 
-            variable["attribute"] = resolve_variable(
+            variable["attribute"] = self.resolve(
                 self.template(kind, prefix=variable_prefix, item_type=item_type),
-                items,
                 mapped,
                 item_type=item_type,
-                is_directed=self.is_directed,
             )
 
             self.variables[name] = variable
@@ -542,14 +1009,12 @@ class VisualVariableBuilder(object):
         elif raw is not None:
             variable = {"type": "raw"}
 
-            variable["attribute"] = resolve_variable(
+            variable["attribute"] = self.resolve(
                 self.template(
                     kind, prefix=variable_prefix, raw=True, item_type=item_type
                 ),
-                items,
                 raw,
                 item_type=item_type,
-                is_directed=self.is_directed,
             )
 
             self.variables[name] = variable
@@ -0,0 +1,170 @@
+import Graph from 'graphology';
+import louvain from 'graphology-communities-louvain';
+
+import { graphToCSR, louvainCSR } from '../metrics';
+
+function createRng(seed: number): () => number {
+  let state = seed;
+
+  return () => {
+    state = (state * 16807) % 2147483647;
+    return (state - 1) / 2147483646;
+  };
+}
+
+// NOTE: cliques linked as a ring by a single edge, whose partition is obvious
+function createCliques(type: 'directed' | 'undirected'): Graph {
+  const graph = new Graph({ type });
+
+  for (let c = 0; c < 4; c++) {
+    for (let i = 0; i < 5; i++) {
+      for (let j = i + 1; j < 5; j++) graph.mergeEdge(`${c}-${i}`, `${c}-${j}`);
+    }
+
+    graph.mergeEdge(`${c}-0`, `${(c + 1) % 4}-1`);
+  }
+
+  return graph;
+}
+
+// NOTE: random graph with planted communities, whose edges are more likely
+// to be found within communities
+function createPlantedPartition(type: 'directed' | 'undirected'): Graph {
+  const graph = new Graph({ type });
+  const rng = createRng(42);
+
+  for (let i = 0; i < 200; i++) graph.addNode(String(i));
+
+  for (let i = 0; i < 200; i++) {
+    for (let j = 0; j < 200; j++) {
+      if (i === j || (type === 'undirected' && j < i)) continue;
+
+      const p = i % 8 === j % 8 ? 0.15 : 0.01;
+
+      if (rng() < p) graph.addEdge(String(i), String(j));
+    }
+  }
+
+  return graph;
+}
+
+function computeLouvain(graph: Graph): Record<string, number> {
+  const { nodes, offsets, neighbors, weights, outDegrees, inDegrees } =
+    graphToCSR(graph, null);
+
+  const membership = louvainCSR(
+    nodes.length,
+    offsets,
+    neighbors,
+    weights,
+    outDegrees,
+    inDegrees,
+    1,
+    0
+  );
+
+  const communities: Record<string, number> = {};
+  nodes.forEach((node, i) => (communities[node] = membership[i]));
+
+  return communities;
+}
+
+// NOTE: directed modularity, as defined by Leicht & Newman, which is the
+// undirected one when every edge is counted in both directions
+function computeModularity(
+  graph: Graph,
+  communities: Record<string, number>
+): number {
+  const outDegrees: Record<string, number> = {};
+  const inDegrees: Record<string, number> = {};
+  const internal: Record<number, number> = {};
+  const totalsOut: Record<number, number> = {};
+  const totalsIn: Record<number, number> = {};
+
+  let m = 0;
+
+  const addArc = (source: string, target: string) => {
+    m++;
+    outDegrees[source] = (outDegrees[source] || 0) + 1;
+    inDegrees[target] = (inDegrees[target] || 0) + 1;
+
+    if (communities[source] === communities[target]) {
+      const c = communities[source];
+      internal[c] = (internal[c] || 0) + 1;
+    }
+  };
+
+  graph.forEachEdge((edge, attr, source, target) => {
+    addArc(source, target);
+    if (graph.type === 'undirected') addArc(target, source);
+  });
+
+  graph.forEachNode((node) => {
+    const c = communities[node];
+    totalsOut[c] = (totalsOut[c] || 0) + (outDegrees[node] || 0);
+    totalsIn[c] = (totalsIn[c] || 0) + (inDegrees[node] || 0);
+  });
+
+  let modularity = 0;
+
+  for (const c in totalsOut) {
+    modularity +=
+      (internal[c] || 0) / m - (totalsOut[c] * totalsIn[c]) / (m * m);
+  }
+
+  return modularity;
+}
+
+function getPartition(communities: Record<string, number>): Array<string> {
+  const groups: Record<number, Array<string>> = {};
+
+  for (const node in communities) {
+    const c = communities[node];
+    (groups[c] = groups[c] || []).push(node);
+  }
+
+  return Object.values(groups)
+    .map((group) => group.sort().join(','))
+    .sort();
+}
+
+describe('metrics', () => {
+  describe('louvainCSR', () => {
+    it('should find the same obvious communities as graphology', () => {
+      (['undirected', 'directed'] as const).forEach((type) => {
+        const graph = createCliques(type);
+
+        expect(getPartition(computeLouvain(graph))).toEqual(
+          getPartition(louvain(graph, { rng: createRng(1) }))
+        );
+      });
+    });
+
+    it('should optimize the same modularity as graphology', () => {
+      (['undirected', 'directed'] as const).forEach((type) => {
+        const graph = createPlantedPartition(type);
+
+        const modularity = computeModularity(graph, computeLouvain(graph));
+        const reference = louvain.detailed(graph, { rng: createRng(1) });
+
+        expect(computeModularity(graph, reference.communities)).toBeCloseTo(
+          reference.modularity,
+          4
+        );
+        expect(modularity).toBeGreaterThan(reference.modularity - 0.02);
+      });
+    });
+
+    it('should deal with self loops & empty graphs', () => {
+      const graph = new Graph({ type: 'directed' });
+      graph.addNode('isolate');
+      graph.mergeEdge('one', 'one');
+      graph.mergeEdge('one', 'two');
+      graph.mergeEdge('two', 'one');
+
+      expect(computeLouvain(graph)).toEqual({ isolate: 0, one: 1, two: 1 });
+
+      expect(computeLouvain(new Graph())).toEqual({});
+    });
+  });
+});
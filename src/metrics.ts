@@ -0,0 +1,440 @@
+/**
+ * Code related to the node metrics computed by the widget itself.
+ *
+ * Metrics are computed in a web worker, so that large graphs do not freeze
+ * the page. Much like graphology's layout workers, the worker is created from
+ * the source code of self-contained functions, which means those functions
+ * cannot rely on anything imported nor declared elsewhere in this module.
+ *
+ * The graph is sent to the worker as a compact adjacency (CSR) of node
+ * indices, in which edges are stored in both directions, along with the out &
+ * in degrees of the nodes. Modularity is computed from those degrees, so that
+ * directed graphs get directed modularity, like graphology's own Louvain
+ * implementation, which cannot be loaded in such a worker.
+ */
+import Graph from 'graphology';
+
+/**
+ * Types.
+ */
+export type NodeMetricSpec = { name: string; [key: string]: any };
+export type NodeMetricsResults = Record<string, Record<string, number>>;
+
+type MetricsWorkerRequest = {
+  order: number;
+  offsets: Int32Array;
+  neighbors: Int32Array;
+  weights: Float64Array;
+  outDegrees: Float64Array;
+  inDegrees: Float64Array;
+  metrics: Array<{ target: string; spec: NodeMetricSpec }>;
+};
+
+type MetricsWorkerResponse = {
+  results?: Record<string, Int32Array>;
+  error?: string;
+};
+
+/**
+ * Worker code.
+ */
+
+// NOTE: multilevel Louvain modularity optimization, over a weighted CSR
+// adjacency where edges are stored in both directions and self loops are
+// stored once with twice their weight, returning the community index of each
+// node. Undirected edges count for half their weight in both the out & in
+// degrees of their extremities, which makes directed modularity, as defined
+// by Leicht & Newman, fall back to the undirected one.
+export function louvainCSR(
+  order: number,
+  offsets: Int32Array,
+  neighbors: Int32Array,
+  weights: Float64Array,
+  outDegrees: Float64Array,
+  inDegrees: Float64Array,
+  resolution: number,
+  seed: number
+): Int32Array {
+  // Mulberry32 seeded rng
+  let state = seed >>> 0;
+
+  function rng(): number {
+    state = (state + 0x6d2b79f5) >>> 0;
+    let t = state;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  }
+
+  const membership = new Int32Array(order);
+  for (let i = 0; i < order; i++) membership[i] = i;
+
+  let m2 = 0;
+  for (let i = 0; i < weights.length; i++) m2 += weights[i];
+
+  if (m2 === 0) return membership;
+
+  const penalty = (2 * resolution) / m2;
+
+  let n = order;
+
+  while (true) {
+    const totalsOut = new Float64Array(n);
+    const totalsIn = new Float64Array(n);
+    const communities = new Int32Array(n);
+
+    for (let i = 0; i < n; i++) {
+      totalsOut[i] = outDegrees[i];
+      totalsIn[i] = inDegrees[i];
+      communities[i] = i;
+    }
+
+    // Local moving phase, visiting nodes in a random order
+    const nodes = new Int32Array(n);
+    for (let i = 0; i < n; i++) nodes[i] = i;
+
+    for (let i = n - 1; i > 0; i--) {
+      const j = Math.floor(rng() * (i + 1));
+      const tmp = nodes[i];
+      nodes[i] = nodes[j];
+      nodes[j] = tmp;
+    }
+
+    const neighborWeights = new Float64Array(n);
+    const touched: Array<number> = [];
+
+    let moved = false;
+    let improved = true;
+
+    while (improved) {
+      improved = false;
+
+      for (let k = 0; k < n; k++) {
+        const i = nodes[k];
+        const current = communities[i];
+        const outDegree = outDegrees[i];
+        const inDegree = inDegrees[i];
+
+        for (let j = offsets[i]; j < offsets[i + 1]; j++) {
+          const neighbor = neighbors[j];
+
+          if (neighbor === i) continue;
+
+          const c = communities[neighbor];
+
+          if (neighborWeights[c] === 0) touched.push(c);
+          neighborWeights[c] += weights[j];
+        }
+
+        totalsOut[current] -= outDegree;
+        totalsIn[current] -= inDegree;
+
+        let best = current;
+        let bestGain =
+          neighborWeights[current] -
+          penalty *
+            (outDegree * totalsIn[current] + inDegree * totalsOut[current]);
+
+        for (let t = 0; t < touched.length; t++) {
+          const c = touched[t];
+          const gain =
+            neighborWeights[c] -
+            penalty * (outDegree * totalsIn[c] + inDegree * totalsOut[c]);
+
+          if (gain > bestGain) {
+            bestGain = gain;
+            best = c;
+          }
+        }
+
+        totalsOut[best] += outDegree;
+        totalsIn[best] += inDegree;
+
+        if (best !== current) {
+          communities[i] = best;
+          improved = true;
+          moved = true;
+        }
+
+        for (let t = 0; t < touched.length; t++)
+          neighborWeights[touched[t]] = 0;
+        neighborWeights[current] = 0;
+        touched.length = 0;
+      }
+    }
+
+    if (!moved) break;
+
+    // Renumbering communities
+    const index = new Int32Array(n).fill(-1);
+    let count = 0;
+
+    for (let i = 0; i < n; i++) {
+      const c = communities[i];
+
+      if (index[c] === -1) index[c] = count++;
+      communities[i] = index[c];
+    }
+
+    for (let i = 0; i < order; i++) membership[i] = communities[membership[i]];
+
+    if (count === n) break;
+
+    // Aggregation phase, communities becoming the nodes of the next level
+    const aggregated: Array<Map<number, number>> = new Array(count);
+    for (let c = 0; c < count; c++) aggregated[c] = new Map();
+
+    const aggregatedOutDegrees = new Float64Array(count);
+    const aggregatedInDegrees = new Float64Array(count);
+
+    for (let i = 0; i < n; i++) {
+      const row = aggregated[communities[i]];
+
+      aggregatedOutDegrees[communities[i]] += outDegrees[i];
+      aggregatedInDegrees[communities[i]] += inDegrees[i];
+
+      for (let j = offsets[i]; j < offsets[i + 1]; j++) {
+        const c = communities[neighbors[j]];
+        row.set(c, (row.get(c) || 0) + weights[j]);
+      }
+    }
+
+    let size = 0;
+    for (let c = 0; c < count; c++) size += aggregated[c].size;
+
+    offsets = new Int32Array(count + 1);
+    neighbors = new Int32Array(size);
+    weights = new Float64Array(size);
+
+    let j = 0;
+
+    for (let c = 0; c < count; c++) {
+      offsets[c] = j;
+
+      aggregated[c].forEach((w, neighbor) => {
+        neighbors[j] = neighbor;
+        weights[j++] = w;
+      });
+    }
+
+    offsets[count] = j;
+    outDegrees = aggregatedOutDegrees;
+    inDegrees = aggregatedInDegrees;
+    n = count;
+  }
+
+  return membership;
+}
+
+function metricsWorker() {
+  const context = self as any;
+
+  context.addEventListener('message', (event: MessageEvent) => {
+    const {
+      order,
+      offsets,
+      neighbors,
+      weights,
+      outDegrees,
+      inDegrees,
+      metrics,
+    } = event.data as MetricsWorkerRequest;
+
+    const results: Record<string, Int32Array> = {};
+
+    try {
+      metrics.forEach(({ target, spec }) => {
+        if (spec.name === 'louvain') {
+          results[target] = louvainCSR(
+            order,
+            offsets,
+            neighbors,
+            weights,
+            outDegrees,
+            inDegrees,
+            spec.resolution || 1,
+            spec.seed || 0
+          );
+        } else {
+          throw new Error(`unknown metric "${spec.name}"`);
+        }
+      });
+    } catch (error) {
+      context.postMessage({ error: String(error) });
+      return;
+    }
+
+    context.postMessage(
+      { results },
+      Object.keys(results).map((target) => results[target].buffer)
+    );
+  });
+}
+
+/**
+ * Helpers.
+ */
+function createWorker(): Worker {
+  const code =
+    louvainCSR.toString() + '\n(' + metricsWorker.toString() + ').call(this);';
+
+  const url = URL.createObjectURL(
+    new Blob([code], { type: 'text/javascript' })
+  );
+  const worker = new Worker(url);
+  URL.revokeObjectURL(url);
+
+  return worker;
+}
+
+function getEdgeWeight(
+  attr: Record<string, any>,
+  attribute: string | null
+): number {
+  if (!attribute) return 1;
+
+  const weight = attr[attribute];
+
+  return typeof weight === 'number' && isFinite(weight) ? weight : 1;
+}
+
+// NOTE: parallel edges are kept as distinct entries of the adjacency
+export function graphToCSR(
+  graph: Graph,
+  edgeWeightAttribute: string | null
+): {
+  nodes: Array<string>;
+  offsets: Int32Array;
+  neighbors: Int32Array;
+  weights: Float64Array;
+  outDegrees: Float64Array;
+  inDegrees: Float64Array;
+} {
+  const nodes = graph.nodes();
+  const index: Record<string, number> = {};
+  nodes.forEach((node, i) => (index[node] = i));
+
+  const offsets = new Int32Array(nodes.length + 1);
+
+  graph.forEachEdge((edge, attr, source, target) => {
+    offsets[index[source] + 1]++;
+    if (source !== target) offsets[index[target] + 1]++;
+  });
+
+  for (let i = 0; i < nodes.length; i++) offsets[i + 1] += offsets[i];
+
+  const size = offsets[nodes.length];
+  const neighbors = new Int32Array(size);
+  const weights = new Float64Array(size);
+  const cursors = offsets.slice(0, nodes.length);
+  const outDegrees = new Float64Array(nodes.length);
+  const inDegrees = new Float64Array(nodes.length);
+
+  graph.forEachEdge((edge, attr, source, target, _s, _t, undirected) => {
+    const s = index[source];
+    const t = index[target];
+    const weight = getEdgeWeight(attr, edgeWeightAttribute);
+
+    if (undirected) {
+      outDegrees[s] += weight / 2;
+      inDegrees[s] += weight / 2;
+      outDegrees[t] += weight / 2;
+      inDegrees[t] += weight / 2;
+    } else {
+      outDegrees[s] += weight;
+      inDegrees[t] += weight;
+    }
+
+    if (s === t) {
+      neighbors[cursors[s]] = s;
+      weights[cursors[s]++] = 2 * weight;
+      return;
+    }
+
+    neighbors[cursors[s]] = t;
+    weights[cursors[s]++] = weight;
+    neighbors[cursors[t]] = s;
+    weights[cursors[t]++] = weight;
+  });
+
+  return { nodes, offsets, neighbors, weights, outDegrees, inDegrees };
+}
+
+/**
+ * Main class.
+ */
+export class NodeMetricsWorker {
+  worker: Worker | null = null;
+
+  compute(
+    graph: Graph,
+    metrics: Record<string, NodeMetricSpec>,
+    edgeWeightAttribute: string | null
+  ): Promise<NodeMetricsResults> {
+    this.kill();
+
+    const { nodes, offsets, neighbors, weights, outDegrees, inDegrees } =
+      graphToCSR(graph, edgeWeightAttribute);
+
+    const worker = createWorker();
+    this.worker = worker;
+
+    return new Promise((resolve, reject) => {
+      worker.addEventListener('message', (event: MessageEvent) => {
+        const response = event.data as MetricsWorkerResponse;
+
+        this.kill();
+
+        if (response.error) {
+          reject(new Error(response.error));
+          return;
+        }
+
+        const results: NodeMetricsResults = {};
+
+        for (const target in response.results) {
+          const values = response.results[target];
+          const result: Record<string, number> = {};
+
+          nodes.forEach((node, i) => (result[node] = values[i]));
+          results[target] = result;
+        }
+
+        resolve(results);
+      });
+
+      worker.addEventListener('error', (event) => {
+        this.kill();
+        reject(new Error(event.message));
+      });
+
+      const request: MetricsWorkerRequest = {
+        order: nodes.length,
+        offsets,
+        neighbors,
+        weights,
+        outDegrees,
+        inDegrees,
+        metrics: Object.keys(metrics).map((target) => ({
+          target,
+          spec: metrics[target],
+        })),
+      };
+
+      worker.postMessage(request, [
+        offsets.buffer,
+        neighbors.buffer,
+        weights.buffer,
+        outDegrees.buffer,
+        inDegrees.buffer,
+      ]);
+    });
+  }
+
+  kill() {
+    if (!this.worker) return;
+
+    this.worker.terminate();
+    this.worker = null;
+  }
+}
@@ -0,0 +1,179 @@
+/**
+ * Code related to incremental updates of the widget's graph.
+ */
+import Graph from 'graphology';
+import { Attributes } from 'graphology-types';
+
+import { SerializedColumn, createAttributesUpdater } from './serialization';
+
+/**
+ * Types.
+ */
+type SerializedPatchNode = { key: string; attributes?: Attributes };
+type SerializedPatchEdge = {
+  source: string;
+  target: string;
+  attributes?: Attributes;
+};
+
+export type GraphPatch =
+  | { type: 'addNodes'; nodes: Array<SerializedPatchNode> }
+  | { type: 'dropNodes'; nodes: Array<string> }
+  | { type: 'addEdges'; edges: Array<SerializedPatchEdge> }
+  | { type: 'dropEdges'; edges: Array<[source: string, target: string]> }
+  | { type: 'updateNodeAttributes'; nodes: Array<SerializedPatchNode> }
+  | {
+      type: 'updateColumns';
+      nodes: { columns: Array<SerializedColumn> };
+      edges: { columns: Array<SerializedColumn> };
+    };
+
+// NOTE: columns are aligned with the items as they were serialized by the
+// python side, whose keys must therefore be known to apply them.
+export type SerializedItemKeys = {
+  nodes: Array<string>;
+  edges: Array<string>;
+};
+
+// NOTE: added items can be read incrementally to update visual variables
+// scales, while changed items require the scales to be computed again
+// from scratch.
+export type GraphPatchEffects = {
+  addedNodes: Array<string>;
+  addedEdges: Array<string>;
+  nodesChanged: boolean;
+  edgesChanged: boolean;
+};
+
+/**
+ * Helpers.
+ */
+function isValidNumber(value: any): boolean {
+  return typeof value === 'number' && !isNaN(value);
+}
+
+function addNode(
+  graph: Graph,
+  key: string,
+  attributes: Attributes | undefined,
+  rng: () => number,
+  effects: GraphPatchEffects
+): void {
+  const attr = Object.assign({}, attributes);
+
+  if (graph.hasNode(key)) {
+    graph.mergeNodeAttributes(key, attr);
+    effects.nodesChanged = true;
+    return;
+  }
+
+  // Random position for nodes without positions
+  if (!isValidNumber(attr.x)) attr.x = rng();
+  if (!isValidNumber(attr.y)) attr.y = rng();
+
+  graph.addNode(key, attr);
+  effects.addedNodes.push(key);
+}
+
+function updateColumns(
+  graph: Graph,
+  itemType: 'node' | 'edge',
+  keys: Array<string>,
+  columns: Array<SerializedColumn>
+): void {
+  if (columns.length === 0) return;
+
+  const update = createAttributesUpdater(columns);
+
+  keys.forEach((key, i) => {
+    if (itemType === 'node') {
+      if (!graph.hasNode(key)) return;
+
+      update(i, graph.getNodeAttributes(key));
+    } else {
+      if (!graph.hasEdge(key)) return;
+
+      update(i, graph.getEdgeAttributes(key));
+    }
+  });
+}
+
+/**
+ * Main functions.
+ */
+export function createGraphPatchEffects(): GraphPatchEffects {
+  return {
+    addedNodes: [],
+    addedEdges: [],
+    nodesChanged: false,
+    edgesChanged: false,
+  };
+}
+
+export function hasGraphPatchEffects(effects: GraphPatchEffects): boolean {
+  return (
+    effects.addedNodes.length > 0 ||
+    effects.addedEdges.length > 0 ||
+    effects.nodesChanged ||
+    effects.edgesChanged
+  );
+}
+
+export function applyGraphPatch(
+  graph: Graph,
+  patch: GraphPatch,
+  rng: () => number,
+  effects: GraphPatchEffects,
+  keys: SerializedItemKeys
+): void {
+  if (patch.type === 'addNodes') {
+    patch.nodes.forEach(({ key, attributes }) => {
+      addNode(graph, key, attributes, rng, effects);
+    });
+  } else if (patch.type === 'dropNodes') {
+    patch.nodes.forEach((key) => {
+      if (!graph.hasNode(key)) return;
+
+      graph.dropNode(key);
+      effects.nodesChanged = true;
+      effects.edgesChanged = true;
+    });
+  } else if (patch.type === 'addEdges') {
+    patch.edges.forEach(({ source, target, attributes }) => {
+      if (!graph.hasNode(source)) addNode(graph, source, {}, rng, effects);
+      if (!graph.hasNode(target)) addNode(graph, target, {}, rng, effects);
+
+      const attr = Object.assign({}, attributes);
+
+      if (graph.multi) {
+        effects.addedEdges.push(graph.addEdge(source, target, attr));
+        return;
+      }
+
+      const [edge, edgeWasAdded] = graph.mergeEdge(source, target, attr);
+
+      if (edgeWasAdded) effects.addedEdges.push(edge);
+      else effects.edgesChanged = true;
+    });
+  } else if (patch.type === 'dropEdges') {
+    patch.edges.forEach(([source, target]) => {
+      if (!graph.hasNode(source) || !graph.hasNode(target)) return;
+
+      graph.edges(source, target).forEach((edge) => {
+        graph.dropEdge(edge);
+        effects.edgesChanged = true;
+      });
+    });
+  } else if (patch.type === 'updateNodeAttributes') {
+    patch.nodes.forEach(({ key, attributes }) => {
+      if (!graph.hasNode(key)) return;
+
+      graph.mergeNodeAttributes(key, attributes || {});
+      effects.nodesChanged = true;
+    });
+  } else if (patch.type === 'updateColumns') {
+    // NOTE: the widget is restyled right after, so no effects are recorded
+    updateColumns(graph, 'node', keys.nodes, patch.nodes.columns);
+    updateColumns(graph, 'edge', keys.edges, patch.edges.columns);
+  }
+}
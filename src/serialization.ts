@@ -0,0 +1,504 @@
+/**
+ * Code related to the decoding of the graph's serialized data.
+ */
+import Graph from 'graphology';
+import {
+  Attributes,
+  GraphOptions,
+  SerializedGraph,
+  SerializedNode,
+} from 'graphology-types';
+
+/**
+ * Types.
+ */
+type DType = 'float64' | 'float32' | 'int32' | 'int16' | 'int8';
+type TypedArray =
+  | Float64Array
+  | Float32Array
+  | Int32Array
+  | Int16Array
+  | Int8Array;
+type ColumnReader = (index: number) => any;
+
+export type SerializedNumberColumn = {
+  name: string;
+  type: 'number';
+  dtype: DType;
+  data: DataView;
+};
+
+export type SerializedBooleanColumn = {
+  name: string;
+  type: 'boolean';
+  dtype: DType;
+  data: DataView;
+};
+
+export type SerializedStringColumn = {
+  name: string;
+  type: 'string';
+  dtype: DType;
+  categories: Array<string>;
+  data: DataView;
+};
+
+export type SerializedJSONColumn = {
+  name: string;
+  type: 'json';
+  data: Array<any>;
+};
+
+export type SerializedColumn =
+  | SerializedNumberColumn
+  | SerializedBooleanColumn
+  | SerializedStringColumn
+  | SerializedJSONColumn;
+
+export type SerializedEndpoints = {
+  dtype: DType;
+  data: DataView;
+};
+
+// NOTE: permutations in which the serialized nodes & edges should be added to
+// the graph, e.g. to follow their zindex.
+export type SerializedOrder = {
+  nodes?: SerializedEndpoints;
+  edges?: SerializedEndpoints;
+};
+
+type JSONSerializedNodes = Array<SerializedNode>;
+type JSONSerializedEdges = Array<{
+  source: number;
+  target: number;
+  attributes?: Attributes;
+}>;
+
+type ColumnarSerializedNodes = {
+  keys: Array<string>;
+  columns: Array<SerializedColumn>;
+};
+type ColumnarSerializedEdges = {
+  sources: SerializedEndpoints;
+  targets: SerializedEndpoints;
+  columns: Array<SerializedColumn>;
+};
+
+export type JSONSerializedGraph = {
+  format: 'json';
+  options: Partial<GraphOptions>;
+  nodes: JSONSerializedNodes;
+  edges: JSONSerializedEdges;
+  order?: SerializedOrder;
+};
+
+export type ColumnarSerializedGraph = {
+  format: 'columnar';
+  options: Partial<GraphOptions>;
+  nodes: ColumnarSerializedNodes;
+  edges: ColumnarSerializedEdges;
+  order?: SerializedOrder;
+};
+
+// NOTE: chunked graphs are only described by a header, their nodes, then
+// their edges, being sent later on in chunks requested by the widget.
+export type ChunkedSerializedGraph = {
+  format: 'chunked';
+  encoding: 'json' | 'columnar';
+  options: Partial<GraphOptions>;
+  chunks: number;
+  order: number;
+  size: number;
+};
+
+// NOTE: overlays only hold the attributes of a widget computed from its
+// kwargs, for the nodes & edges of a shared graph, in the same order.
+export type OverlaySerializedGraph =
+  | {
+      format: 'overlay';
+      key: string;
+      encoding: 'json';
+      nodes: Array<Attributes>;
+      edges: Array<Attributes>;
+      order?: SerializedOrder;
+    }
+  | {
+      format: 'overlay';
+      key: string;
+      encoding: 'columnar';
+      nodes: { columns: Array<SerializedColumn> };
+      edges: { columns: Array<SerializedColumn> };
+      order?: SerializedOrder;
+    };
+
+export type SerializedGraphChunk =
+  | { nodes: JSONSerializedNodes | ColumnarSerializedNodes }
+  | { edges: JSONSerializedEdges | ColumnarSerializedEdges };
+
+export type AnySerializedGraph =
+  | SerializedGraph
+  | JSONSerializedGraph
+  | ColumnarSerializedGraph
+  | ChunkedSerializedGraph;
+
+/**
+ * Constants.
+ */
+const TYPED_ARRAYS = {
+  float64: Float64Array,
+  float32: Float32Array,
+  int32: Int32Array,
+  int16: Int16Array,
+  int8: Int8Array,
+};
+
+/**
+ * Helpers.
+ */
+function isJSONSerializedGraph(data: any): data is JSONSerializedGraph {
+  return !!data && data.format === 'json';
+}
+
+function isColumnarSerializedGraph(
+  data: any
+): data is ColumnarSerializedGraph {
+  return !!data && data.format === 'columnar';
+}
+
+export function isOverlaySerializedGraph(
+  data: any
+): data is OverlaySerializedGraph {
+  return !!data && data.format === 'overlay';
+}
+
+export function isChunkedSerializedGraph(
+  data: any
+): data is ChunkedSerializedGraph {
+  return !!data && data.format === 'chunked';
+}
+
+function readTypedArray(view: DataView, dtype: DType): TypedArray {
+  const TypedArrayClass = TYPED_ARRAYS[dtype];
+  const bytesPerElement = TypedArrayClass.BYTES_PER_ELEMENT;
+
+  let buffer = view.buffer;
+  let offset = view.byteOffset;
+
+  // NOTE: typed arrays cannot be created from misaligned offsets
+  if (offset % bytesPerElement !== 0) {
+    buffer = buffer.slice(offset, offset + view.byteLength);
+    offset = 0;
+  }
+
+  return new TypedArrayClass(buffer, offset, view.byteLength / bytesPerElement);
+}
+
+function createColumnReader(column: SerializedColumn): ColumnReader {
+  if (column.type === 'json') {
+    const values = column.data;
+
+    return (i) => {
+      const value = values[i];
+      return value === null ? undefined : value;
+    };
+  }
+
+  const array = readTypedArray(column.data, column.dtype);
+
+  if (column.type === 'number') {
+    return (i) => {
+      const value = array[i];
+      return Number.isNaN(value) ? undefined : value;
+    };
+  }
+
+  if (column.type === 'boolean') {
+    return (i) => {
+      const value = array[i];
+      return value === -1 ? undefined : value === 1;
+    };
+  }
+
+  const categories = column.categories;
+
+  return (i) => {
+    const code = array[i];
+    return code === -1 ? undefined : categories[code];
+  };
+}
+
+function createAttributesReader(
+  columns: Array<SerializedColumn>
+): (index: number) => Attributes {
+  const names = columns.map((column) => column.name);
+  const readers = columns.map(createColumnReader);
+
+  return (i) => {
+    const attr: Attributes = {};
+
+    for (let j = 0; j < readers.length; j++) {
+      const value = readers[j](i);
+
+      if (value !== undefined) attr[names[j]] = value;
+    }
+
+    return attr;
+  };
+}
+
+// NOTE: contrary to attributes readers, missing values are removed from the
+// updated attributes, since the given columns replace whole attributes.
+export function createAttributesUpdater(
+  columns: Array<SerializedColumn>
+): (index: number, attr: Attributes) => void {
+  const names = columns.map((column) => column.name);
+  const readers = columns.map(createColumnReader);
+
+  return (i, attr) => {
+    for (let j = 0; j < readers.length; j++) {
+      const value = readers[j](i);
+
+      if (value === undefined) delete attr[names[j]];
+      else attr[names[j]] = value;
+    }
+  };
+}
+
+// NOTE: the following functions return the keys of the added items, and
+// edges reference their extremities through the index of the related node
+// in the serialized nodes. Attributes are copied because graphology does not
+// copy them and serialized data may be shared by multiple widgets.
+function addJSONNodes(graph: Graph, nodes: JSONSerializedNodes): Array<string> {
+  return nodes.map((node) => {
+    graph.addNode(node.key, Object.assign({}, node.attributes));
+    return node.key;
+  });
+}
+
+function addJSONEdges(
+  graph: Graph,
+  nodeKeys: Array<string>,
+  edges: JSONSerializedEdges
+): Array<string> {
+  return edges.map((edge) =>
+    graph.addEdge(
+      nodeKeys[edge.source],
+      nodeKeys[edge.target],
+      Object.assign({}, edge.attributes)
+    )
+  );
+}
+
+function addColumnarNodes(
+  graph: Graph,
+  nodes: ColumnarSerializedNodes
+): Array<string> {
+  const keys = nodes.keys;
+  const readNodeAttributes = createAttributesReader(nodes.columns);
+
+  for (let i = 0; i < keys.length; i++) {
+    graph.addNode(keys[i], readNodeAttributes(i));
+  }
+
+  return keys;
+}
+
+function addColumnarEdges(
+  graph: Graph,
+  nodeKeys: Array<string>,
+  edges: ColumnarSerializedEdges
+): Array<string> {
+  const sources = readTypedArray(edges.sources.data, edges.sources.dtype);
+  const targets = readTypedArray(edges.targets.data, edges.targets.dtype);
+  const readEdgeAttributes = createAttributesReader(edges.columns);
+
+  const keys: Array<string> = new Array(sources.length);
+
+  for (let i = 0; i < sources.length; i++) {
+    keys[i] = graph.addEdge(
+      nodeKeys[sources[i]],
+      nodeKeys[targets[i]],
+      readEdgeAttributes(i)
+    );
+  }
+
+  return keys;
+}
+
+/**
+ * Main functions.
+ */
+export function deserializeJSONGraph(data: JSONSerializedGraph): Graph {
+  const graph = new Graph(data.options);
+
+  const nodeKeys = addJSONNodes(graph, data.nodes);
+  addJSONEdges(graph, nodeKeys, data.edges);
+
+  return graph;
+}
+
+export function deserializeColumnarGraph(data: ColumnarSerializedGraph): Graph {
+  const graph = new Graph(data.options);
+
+  const nodeKeys = addColumnarNodes(graph, data.nodes);
+  addColumnarEdges(graph, nodeKeys, data.edges);
+
+  return graph;
+}
+
+export function deserializeGraph(data: AnySerializedGraph): Graph {
+  if (isColumnarSerializedGraph(data)) return deserializeColumnarGraph(data);
+  if (isJSONSerializedGraph(data)) return deserializeJSONGraph(data);
+
+  // NOTE: the chunks will be added to the graph later on
+  if (isChunkedSerializedGraph(data)) return new Graph(data.options);
+
+  return Graph.from(data);
+}
+
+// NOTE: `nodeKeys` must hold the keys of the nodes added by the previous
+// chunks, and will be updated with the keys of the nodes of this chunk.
+export function deserializeGraphChunk(
+  graph: Graph,
+  encoding: ChunkedSerializedGraph['encoding'],
+  nodeKeys: Array<string>,
+  chunk: SerializedGraphChunk
+): { addedNodes: Array<string>; addedEdges: Array<string> } {
+  if ('nodes' in chunk) {
+    const addedNodes =
+      encoding === 'columnar'
+        ? addColumnarNodes(graph, chunk.nodes as ColumnarSerializedNodes)
+        : addJSONNodes(graph, chunk.nodes as JSONSerializedNodes);
+
+    addedNodes.forEach((key) => nodeKeys.push(key));
+
+    return { addedNodes, addedEdges: [] };
+  }
+
+  const addedEdges =
+    encoding === 'columnar'
+      ? addColumnarEdges(
+          graph,
+          nodeKeys,
+          chunk.edges as ColumnarSerializedEdges
+        )
+      : addJSONEdges(graph, nodeKeys, chunk.edges as JSONSerializedEdges);
+
+  return { addedNodes: [], addedEdges };
+}
+
+export function applyGraphOverlay(
+  graph: Graph,
+  overlay: OverlaySerializedGraph
+): void {
+  let readNodeAttributes: (index: number) => Attributes;
+  let readEdgeAttributes: (index: number) => Attributes;
+
+  if (overlay.encoding === 'columnar') {
+    readNodeAttributes = createAttributesReader(overlay.nodes.columns);
+    readEdgeAttributes = createAttributesReader(overlay.edges.columns);
+  } else {
+    const nodes = overlay.nodes;
+    const edges = overlay.edges;
+
+    readNodeAttributes = (i) => nodes[i];
+    readEdgeAttributes = (i) => edges[i];
+  }
+
+  let i = 0;
+
+  graph.forEachNode((node, attr) => {
+    Object.assign(attr, readNodeAttributes(i++));
+  });
+
+  i = 0;
+
+  graph.forEachEdge((edge, attr) => {
+    Object.assign(attr, readEdgeAttributes(i++));
+  });
+}
+
+// NOTE: returns a copy of the given graph whose nodes & edges were added
+// following the given order, since rendering follows the graph's order.
+export function reorderGraph(graph: Graph, order: SerializedOrder): Graph {
+  const reordered = graph.emptyCopy();
+
+  let nodes = graph.nodes();
+
+  if (order.nodes) {
+    const permutation = readTypedArray(order.nodes.data, order.nodes.dtype);
+    nodes = Array.from(permutation, (i) => nodes[i]);
+  }
+
+  nodes.forEach((node) => {
+    reordered.addNode(node, graph.getNodeAttributes(node));
+  });
+
+  let edges = graph.edges();
+
+  if (order.edges) {
+    const permutation = readTypedArray(order.edges.data, order.edges.dtype);
+    edges = Array.from(permutation, (i) => edges[i]);
+  }
+
+  edges.forEach((edge) => {
+    reordered.addEdgeWithKey(
+      edge,
+      graph.source(edge),
+      graph.target(edge),
+      graph.getEdgeAttributes(edge)
+    );
+  });
+
+  return reordered;
+}
+
+// NOTE: layouts are synced with the kernel as float32 (x, y) pairs aligned
+// with the nodes in the order they were serialized, rather than as a large
+// JSON object. Returns null if the graph has nodes that were not serialized
+// (e.g. nodes added by patches), since the kernel could not reference them.
+export function serializeLayout(
+  graph: Graph,
+  nodes: Array<string>,
+  layout?: Record<string, { x: number; y: number }>
+): Float32Array | null {
+  const positions = new Float32Array(nodes.length * 2).fill(NaN);
+  let count = 0;
+
+  nodes.forEach((node, i) => {
+    if (!graph.hasNode(node)) return;
+
+    count++;
+
+    const position = layout ? layout[node] : graph.getNodeAttributes(node);
+
+    if (!position) return;
+
+    positions[i * 2] = position.x;
+    positions[i * 2 + 1] = position.y;
+  });
+
+  return count === graph.order ? positions : null;
+}
+
+export function assignSerializedLayout(
+  graph: Graph,
+  nodes: Array<string>,
+  data: DataView | Float32Array
+): boolean {
+  const positions =
+    data instanceof Float32Array ? data : readTypedArray(data, 'float32');
+
+  if (positions.length !== nodes.length * 2) return false;
+
+  nodes.forEach((node, i) => {
+    const x = positions[i * 2];
+    const y = positions[i * 2 + 1];
+
+    if (!graph.hasNode(node) || isNaN(x) || isNaN(y)) return;
+
+    graph.mergeNodeAttributes(node, { x, y });
+  });
+
+  return true;
+}
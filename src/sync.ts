@@ -0,0 +1,205 @@
+/**
+ * Code related to the rate at which the widget syncs its state, either with
+ * the kernel, or with the other views it is linked to.
+ *
+ * Updates are always coalesced per animation frame, so that a single frame
+ * never sends more than one message to the kernel, nor emits more than one
+ * event of a same kind to the linked views.
+ */
+
+/**
+ * Types.
+ */
+export type KernelSyncTarget = 'camera' | 'selection' | 'hover';
+export type KernelSyncPolicy = 'throttle' | 'debounce' | 'idle';
+export type KernelSyncSettings = Record<
+  KernelSyncTarget,
+  { policy: KernelSyncPolicy; interval: number }
+>;
+
+type RateLimiter = {
+  call: () => void;
+  cancel: () => void;
+};
+
+/**
+ * Helpers.
+ */
+function requestIdle(callback: () => void): () => void {
+  // NOTE: some browsers, e.g. Safari, do not support idle callbacks
+  if ('requestIdleCallback' in window) {
+    const id = window.requestIdleCallback(callback, { timeout: 2000 });
+    return () => window.cancelIdleCallback(id);
+  }
+
+  const id = setTimeout(callback, 0);
+  return () => clearTimeout(id);
+}
+
+function createThrottle(interval: number, callback: () => void): RateLimiter {
+  let lastCall = -Infinity;
+  let timeout: ReturnType<typeof setTimeout> | null = null;
+
+  const fire = () => {
+    timeout = null;
+    lastCall = Date.now();
+    callback();
+  };
+
+  return {
+    call() {
+      if (timeout !== null) return;
+
+      const remaining = lastCall + interval - Date.now();
+
+      if (remaining <= 0) fire();
+      else timeout = setTimeout(fire, remaining);
+    },
+    cancel() {
+      if (timeout !== null) clearTimeout(timeout);
+      timeout = null;
+    },
+  };
+}
+
+function createDebounce(
+  interval: number,
+  callback: () => void,
+  idle: boolean
+): RateLimiter {
+  let timeout: ReturnType<typeof setTimeout> | null = null;
+  let cancelIdle: (() => void) | null = null;
+
+  const cancel = () => {
+    if (timeout !== null) clearTimeout(timeout);
+    if (cancelIdle) cancelIdle();
+
+    timeout = null;
+    cancelIdle = null;
+  };
+
+  return {
+    call() {
+      cancel();
+
+      timeout = setTimeout(() => {
+        timeout = null;
+
+        if (!idle) {
+          callback();
+          return;
+        }
+
+        cancelIdle = requestIdle(() => {
+          cancelIdle = null;
+          callback();
+        });
+      }, interval);
+    },
+    cancel,
+  };
+}
+
+function createRateLimiter(
+  policy: KernelSyncPolicy,
+  interval: number,
+  callback: () => void
+): RateLimiter {
+  if (policy === 'throttle') return createThrottle(interval, callback);
+
+  return createDebounce(interval, callback, policy === 'idle');
+}
+
+/**
+ * Classes.
+ */
+
+// NOTE: callbacks scheduled under a same key before the next animation frame
+// are coalesced, only the last one being called when the frame is flushed.
+export class FrameBatcher {
+  callbacks: Map<string, () => void> = new Map();
+  frame: number | null = null;
+
+  schedule(key: string, callback: () => void): void {
+    // NOTE: deleting the key first so callbacks are called in order
+    this.callbacks.delete(key);
+    this.callbacks.set(key, callback);
+
+    if (this.frame === null)
+      this.frame = requestAnimationFrame(() => this.flush());
+  }
+
+  flush(): void {
+    if (this.frame !== null) cancelAnimationFrame(this.frame);
+    this.frame = null;
+
+    const callbacks = Array.from(this.callbacks.values());
+    this.callbacks.clear();
+
+    callbacks.forEach((callback) => callback());
+  }
+
+  kill(): void {
+    if (this.frame !== null) cancelAnimationFrame(this.frame);
+    this.frame = null;
+    this.callbacks.clear();
+  }
+}
+
+// NOTE: state updates of each target are rate limited according to their
+// own policy, then committed to the model all at once on the next frame.
+export class KernelStateSync {
+  commit: (state: Record<string, any>) => void;
+  limiters: Record<KernelSyncTarget, RateLimiter>;
+  pending: Partial<Record<KernelSyncTarget, Record<string, any>>> = {};
+  ready: Record<string, any> = {};
+  batcher: FrameBatcher = new FrameBatcher();
+
+  constructor(
+    settings: KernelSyncSettings,
+    commit: (state: Record<string, any>) => void
+  ) {
+    this.commit = commit;
+
+    const createLimiter = (target: KernelSyncTarget) => {
+      const { policy, interval } = settings[target];
+
+      return createRateLimiter(policy, interval * 1000, () =>
+        this.release(target)
+      );
+    };
+
+    this.limiters = {
+      camera: createLimiter('camera'),
+      selection: createLimiter('selection'),
+      hover: createLimiter('hover'),
+    };
+  }
+
+  set(target: KernelSyncTarget, state: Record<string, any>): void {
+    this.pending[target] = Object.assign(this.pending[target] || {}, state);
+    this.limiters[target].call();
+  }
+
+  release(target: KernelSyncTarget): void {
+    const state = this.pending[target];
+
+    if (!state) return;
+
+    delete this.pending[target];
+    Object.assign(this.ready, state);
+
+    this.batcher.schedule('commit', () => {
+      const ready = this.ready;
+      this.ready = {};
+      this.commit(ready);
+    });
+  }
+
+  kill(): void {
+    for (const target in this.limiters)
+      this.limiters[target as KernelSyncTarget].cancel();
+
+    this.batcher.kill();
+  }
+}
@@ -113,14 +113,21 @@ function copyGraphForGexf(renderer: Sigma): Graph {
   return copy;
 }
 
-export function renderAsDataURL(renderer: Sigma): string {
+export function renderAsPNG(renderer: Sigma): Promise<ArrayBuffer> {
   const [canvas, cleanup] = renderToAuxiliaryCanvas(renderer);
 
-  const dataURL = canvas.toDataURL();
+  return new Promise((resolve, reject) => {
+    canvas.toBlob((blob) => {
+      cleanup();
 
-  cleanup();
+      if (!blob) {
+        reject(new Error('could not render the snapshot'));
+        return;
+      }
 
-  return dataURL;
+      blob.arrayBuffer().then(resolve, reject);
+    }, 'image/png');
+  });
 }
 
 export function saveAsPNG(renderer: Sigma): void {
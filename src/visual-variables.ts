@@ -42,12 +42,16 @@ export type RawVisualVariable = {
   default?: string;
 };
 
+// NOTE: the following statistics are precomputed by the kernel and may be
+// missing, in which case they must be computed by scanning the graph.
 export type CategoryVisualVariable = {
   type: 'category';
   attribute: string;
   palette?: Entries<string> | string;
   default?: string;
   kind?: PaletteKind;
+  categories?: Array<[value: any, count: number]>;
+  overflowing?: boolean;
 };
 
 export type ContinuousVisualVariable = {
@@ -56,6 +60,7 @@ export type ContinuousVisualVariable = {
   range: Range | string;
   default?: number;
   scale?: ScaleDefinition;
+  extent?: [min: number, max: number] | null;
 };
 
 export type DependentVisualVariable = {
@@ -214,6 +219,17 @@ export class Extent {
   min = Infinity;
   max = -Infinity;
 
+  static fromBounds(bounds: [number, number] | null): Extent {
+    const extent = new Extent();
+
+    if (bounds) {
+      extent.min = bounds[0];
+      extent.max = bounds[1];
+    }
+
+    return extent;
+  }
+
   add(value: number) {
     if (value < this.min) this.min = value;
     if (value > this.max) this.max = value;
@@ -290,6 +306,25 @@ export class CategorySummary {
 
     const values = topValues.map((item) => item[0]);
 
+    return CategorySummary.fromValues(
+      name,
+      kind,
+      values,
+      defaultValue,
+      scheme,
+      overflowing
+    );
+  }
+
+  // NOTE: values must be sorted by decreasing frequency
+  static fromValues(
+    name: string,
+    kind: PaletteKind,
+    values: Array<any>,
+    defaultValue: string | undefined,
+    scheme?: string,
+    overflowing = false
+  ) {
     const palette =
       !scheme || scheme === 'IWantHue'
         ? Palette.generateFromValues(name, kind, values, defaultValue)
@@ -321,6 +356,7 @@ export class VisualVariableScalesBuilder {
   nodeCategories: AttributeCategories;
   edgeCategories: AttributeCategories;
   maxCategories: number;
+  usesPrecomputedStatistics = true;
 
   constructor(
     visualVariables: VisualVariables,
@@ -329,6 +365,14 @@ export class VisualVariableScalesBuilder {
     this.variables = visualVariables;
     this.maxCategories = maxCategories;
 
+    this.registerAttributes();
+  }
+
+  // NOTE: attributes whose statistics were precomputed by the kernel do not
+  // need to be read, unless those statistics were discarded.
+  registerAttributes(): void {
+    const visualVariables = this.variables;
+
     const nodeExtentAttributes: Array<string> = [];
     const nodeCategoryAttributes: Array<string> = [];
     const edgeExtentAttributes: Array<string> = [];
@@ -337,6 +381,8 @@ export class VisualVariableScalesBuilder {
     for (const variableName in visualVariables) {
       const variable = visualVariables[variableName];
 
+      if (this.hasPrecomputedStatistics(variable)) continue;
+
       if (variableName.startsWith('node')) {
         if (variable.type === 'category') {
           if (!variable.palette || typeof variable.palette === 'string')
@@ -365,16 +411,56 @@ export class VisualVariableScalesBuilder {
     this.edgeCategories = new AttributeCategories(edgeCategoryAttributes);
   }
 
+  hasPrecomputedStatistics(variable: VisualVariable): boolean {
+    if (!this.usesPrecomputedStatistics) return false;
+
+    if (variable.type === 'category') return Array.isArray(variable.categories);
+    if (variable.type === 'continuous') return variable.extent != null;
+
+    return false;
+  }
+
+  // NOTE: precomputed statistics become stale as soon as the graph is patched
+  discardPrecomputedStatistics(): void {
+    this.usesPrecomputedStatistics = false;
+    this.registerAttributes();
+  }
+
+  readNode(attr: Attributes): void {
+    this.nodeExtents.add(attr);
+    this.nodeCategories.add(attr);
+  }
+
+  readEdge(attr: Attributes): void {
+    this.edgeExtents.add(attr);
+    this.edgeCategories.add(attr);
+  }
+
+  readNodes(graph: Graph): void {
+    this.nodeExtents = new AttributeExtents(
+      Object.keys(this.nodeExtents.attributes)
+    );
+    this.nodeCategories = new AttributeCategories(
+      Object.keys(this.nodeCategories.attributes)
+    );
+
+    graph.forEachNode((node, attr) => this.readNode(attr));
+  }
+
+  readEdges(graph: Graph): void {
+    this.edgeExtents = new AttributeExtents(
+      Object.keys(this.edgeExtents.attributes)
+    );
+    this.edgeCategories = new AttributeCategories(
+      Object.keys(this.edgeCategories.attributes)
+    );
+
+    graph.forEachEdge((edge, attr) => this.readEdge(attr));
+  }
+
   readGraph(graph: Graph): void {
-    graph.forEachNode((node, attr) => {
-      this.nodeExtents.add(attr);
-      this.nodeCategories.add(attr);
-    });
-
-    graph.forEachEdge((edge, attr) => {
-      this.edgeExtents.add(attr);
-      this.edgeCategories.add(attr);
-    });
+    this.readNodes(graph);
+    this.readEdges(graph);
   }
 
   build(): VisualVariableScales {
@@ -400,22 +486,37 @@ export class VisualVariableScalesBuilder {
           ? this.nodeCategories
           : this.edgeCategories;
 
-        const summary =
-          variable.palette && typeof variable.palette !== 'string'
-            ? CategorySummary.fromEntries(
-                variable.attribute,
-                variable.kind || 'color',
-                variable.palette,
-                variable.default
-              )
-            : CategorySummary.fromTopValues(
-                variable.attribute,
-                variable.kind || 'color',
-                categories.attributes[variable.attribute],
-                variable.default,
-                variable.palette,
-                this.maxCategories
-              );
+        let summary: CategorySummary;
+
+        if (variable.palette && typeof variable.palette !== 'string') {
+          summary = CategorySummary.fromEntries(
+            variable.attribute,
+            variable.kind || 'color',
+            variable.palette,
+            variable.default
+          );
+        } else if (this.hasPrecomputedStatistics(variable)) {
+          // NOTE: missing values are serialized as null
+          summary = CategorySummary.fromValues(
+            variable.attribute,
+            variable.kind || 'color',
+            (variable.categories || []).map((item) =>
+              item[0] === null ? undefined : item[0]
+            ),
+            variable.default,
+            variable.palette,
+            variable.overflowing
+          );
+        } else {
+          summary = CategorySummary.fromTopValues(
+            variable.attribute,
+            variable.kind || 'color',
+            categories.attributes[variable.attribute],
+            variable.default,
+            variable.palette,
+            this.maxCategories
+          );
+        }
 
         const palette = summary.palette;
 
@@ -429,7 +530,9 @@ export class VisualVariableScalesBuilder {
           ? this.nodeExtents
           : this.edgeExtents;
 
-        const extent = extents.attributes[variable.attribute];
+        const extent = this.hasPrecomputedStatistics(variable)
+          ? Extent.fromBounds(variable.extent || null)
+          : extents.attributes[variable.attribute];
 
         scale = createContinuousScale(variable, extent);
       }
@@ -2,15 +2,15 @@ import {
   DOMWidgetModel,
   DOMWidgetView,
   ISerializers,
+  put_buffers,
 } from '@jupyter-widgets/base';
 
 import Graph from 'graphology';
-import { SerializedGraph } from 'graphology-types';
+import { Attributes } from 'graphology-types';
 import LayoutSupervisor from 'graphology-layout-forceatlas2/worker';
 import NoverlapSupervisor from 'graphology-layout-noverlap/worker';
 import forceAtlas2 from 'graphology-layout-forceatlas2';
 import type { ForceAtlas2Settings } from 'graphology-layout-forceatlas2';
-import louvain from 'graphology-communities-louvain';
 import { collectLayout, assignLayout } from 'graphology-layout/utils';
 import chroma from 'chroma-js';
 
@@ -34,19 +34,19 @@ import type { Properties as CSSProperties } from 'csstype';
 import comma from 'comma-number';
 import Choices from 'choices.js';
 import screenfull from 'screenfull';
-import debounce from 'debounce';
 
 import { MODULE_NAME, MODULE_VERSION } from './version';
 import drawHover from './custom-hover';
 import drawLabel from './custom-label';
 import {
   CategorySummary,
+  VisualVariableScales,
   VisualVariableScalesBuilder,
   VisualVariable,
   VisualVariables,
 } from './visual-variables';
 import {
-  renderAsDataURL,
+  renderAsPNG,
   saveAsPNG,
   saveAsGEXF,
   saveAsJSON,
@@ -54,6 +54,29 @@ import {
   pictogramToUrl,
 } from './utils';
 import { shapeToPicto } from './shapes';
+import { NodeMetricsWorker, NodeMetricSpec } from './metrics';
+import { FrameBatcher, KernelStateSync, KernelSyncSettings } from './sync';
+import {
+  AnySerializedGraph,
+  OverlaySerializedGraph,
+  SerializedGraphChunk,
+  applyGraphOverlay,
+  assignSerializedLayout,
+  deserializeGraph,
+  deserializeGraphChunk,
+  isChunkedSerializedGraph,
+  isOverlaySerializedGraph,
+  reorderGraph,
+  serializeLayout,
+} from './serialization';
+import {
+  GraphPatch,
+  GraphPatchEffects,
+  SerializedItemKeys,
+  applyGraphPatch,
+  createGraphPatchEffects,
+  hasGraphPatchEffects,
+} from './patches';
 import {
   zoomIcon,
   unzoomIcon,
@@ -77,6 +100,11 @@ const EDGE_VIZ_ATTRIBUTES = new Set(['label', 'size', 'color']);
 const MUTED_NODE_COLOR = '#ccc';
 const IPYSIGMA_KWARG_PREFIX = 'ipysigma_kwarg_';
 
+// NOTE: a running layout is deemed converged when nodes moved, on average,
+// less than this fraction of the layout's extent between two checks
+const LAYOUT_CONVERGENCE_THRESHOLD = 0.001;
+const LAYOUT_CONVERGENCE_CHECK_INTERVAL = 500;
+
 /**
  * Types.
  */
@@ -186,6 +214,84 @@ const TEMPLATE = `
  * Model declaration.
  */
 export class SigmaModel extends DOMWidgetModel {
+  // NOTE: patches & chunks are kept on the model so that any view can
+  // replay them
+  patches: Array<GraphPatch>;
+  chunks: Array<SerializedGraphChunk>;
+  requestedChunkCount: number;
+
+  initialize(attributes: any, options: any) {
+    super.initialize(attributes, options);
+
+    this.patches = [];
+    this.chunks = [];
+    this.requestedChunkCount = 0;
+
+    this.registerSharedGraph();
+
+    this.on('msg:custom', (content, buffers) => {
+      if (content.msg === 'patch') {
+        if (content.buffer_paths)
+          put_buffers(content.patch, content.buffer_paths, buffers);
+
+        this.patches.push(content.patch as GraphPatch);
+      } else if (content.msg === 'chunk') {
+        put_buffers(content.chunk, content.buffer_paths, buffers);
+        this.chunks[content.index] = content.chunk as SerializedGraphChunk;
+        this.requestChunks();
+      }
+    });
+  }
+
+  // NOTE: shared graphs are registered globally, so that widgets displaying
+  // the same graph only need to send it once
+  registerSharedGraph() {
+    const data = this.get('data');
+
+    if (!isOverlaySerializedGraph(data)) return;
+
+    const key = data.key;
+
+    let entry = SHARED_GRAPH_REGISTRY.get(key);
+
+    if (!entry) {
+      entry = { data: null, models: new Set() };
+      SHARED_GRAPH_REGISTRY.set(key, entry);
+    }
+
+    entry.models.add(this);
+
+    const sharedData = this.get('shared_data') as AnySerializedGraph | null;
+
+    if (sharedData) entry.data = sharedData;
+
+    this.on('destroy', () => {
+      const currentEntry = SHARED_GRAPH_REGISTRY.get(key);
+
+      if (!currentEntry) return;
+
+      currentEntry.models.delete(this);
+
+      if (currentEntry.models.size === 0) SHARED_GRAPH_REGISTRY.delete(key);
+    });
+  }
+
+  // NOTE: chunks are requested one at a time, so that the kernel is never
+  // flooded with messages and the widget can render in between.
+  requestChunks() {
+    const data = this.get('data');
+
+    if (!isChunkedSerializedGraph(data)) return;
+
+    if (
+      this.requestedChunkCount > this.chunks.length ||
+      this.requestedChunkCount >= data.chunks
+    )
+      return;
+
+    this.send({ msg: 'request_chunk', index: this.requestedChunkCount++ }, {});
+  }
+
   defaults() {
     return {
       ...super.defaults(),
@@ -198,8 +304,10 @@ export class SigmaModel extends DOMWidgetModel {
       data: { nodes: [], edges: [] },
       height: 500,
       start_layout: false,
-      snapshot: null,
       layout: null,
+      layout_buffer: null,
+      stream_layout_interval: null,
+      shared_data: null,
       clickableEdges: false,
       visual_variables: {},
     };
@@ -258,19 +366,122 @@ function renderTypedValue(value: any): string {
   return `<span class="ipysigma-${type}" title="${type}">${safe}</span>`;
 }
 
-function buildGraph(data: SerializedGraph, rng: RNGFunction): Graph {
-  const graph = Graph.from(data);
+function assignRandomPosition(attr: Attributes, rng: RNGFunction) {
+  // Random position for nodes without positions
+  if (!isValidNumber(attr.x)) attr.x = rng();
+  if (!isValidNumber(attr.y)) attr.y = rng();
+
+  return attr;
+}
+
+type ReducerState = {
+  nodeColorSaturationEnabled: boolean;
+  nodeBordersEnabled: boolean;
+  nodeBorderRatioEnabled: boolean;
+  nodePictogramsEnabled: boolean;
+  nodeShapeEnabled: boolean;
+  nodeHaloEnabled: boolean;
+  nodeCategoryAttribute: string | null;
+  edgeCategoryAttribute: string | null;
+  edgeColorFrom: string | null;
+  nodeBorderColorFrom: string | undefined;
+};
+
+// NOTE: gathering info about the visual variables once, so that reducers
+// do not have to, and can be updated in place when the widget is restyled
+function getReducerState(visualVariables: VisualVariables): ReducerState {
+  return {
+    nodeColorSaturationEnabled:
+      visualVariables.nodeColorSaturation.type !== 'disabled',
+    nodeBordersEnabled:
+      visualVariables.nodeBorderColor.type !== 'disabled' &&
+      (visualVariables.nodeBorderSize.type !== 'disabled' ||
+        visualVariables.nodeBorderRatio.type !== 'disabled'),
+    nodeBorderRatioEnabled: visualVariables.nodeBorderRatio.type !== 'disabled',
+    nodePictogramsEnabled: visualVariables.nodePictogram.type !== 'disabled',
+    nodeShapeEnabled: visualVariables.nodeShape.type !== 'disabled',
+    nodeHaloEnabled:
+      visualVariables.nodeHaloSize.type !== 'disabled' &&
+      visualVariables.nodeHaloColor.type !== 'disabled',
+    nodeCategoryAttribute:
+      visualVariables.nodeColor.type === 'category'
+        ? visualVariables.nodeColor.attribute
+        : null,
+    edgeCategoryAttribute:
+      visualVariables.edgeColor.type === 'category'
+        ? visualVariables.edgeColor.attribute
+        : null,
+    edgeColorFrom:
+      visualVariables.edgeColor.type === 'dependent'
+        ? visualVariables.edgeColor.value
+        : null,
+    nodeBorderColorFrom:
+      visualVariables.nodeBorderColor.type === 'dependent'
+        ? visualVariables.nodeBorderColor.value
+        : undefined,
+  };
+}
+
+// NOTE: also returns the keys of the items in the order in which they were
+// serialized, so that columns sent later on can be applied to them
+function buildGraph(
+  data: AnySerializedGraph | OverlaySerializedGraph,
+  rng: RNGFunction
+): { graph: Graph; keys: SerializedItemKeys } {
+  let graph: Graph;
+
+  if (isOverlaySerializedGraph(data)) {
+    const sharedData = SHARED_GRAPH_REGISTRY.get(data.key)?.data;
+
+    if (!sharedData)
+      throw new Error('shared graph data not found. this should not happen!');
+
+    graph = deserializeGraph(sharedData);
+    applyGraphOverlay(graph, data);
+  } else {
+    graph = deserializeGraph(data);
+  }
+
+  const keys = { nodes: graph.nodes(), edges: graph.edges() };
+
+  if ('order' in data && data.order) graph = reorderGraph(graph, data.order);
 
   // Rectifications
-  graph.updateEachNodeAttributes((key, attr) => {
-    // Random position for nodes without positions
-    if (!isValidNumber(attr.x)) attr.x = rng();
-    if (!isValidNumber(attr.y)) attr.y = rng();
+  graph.updateEachNodeAttributes((key, attr) =>
+    assignRandomPosition(attr, rng)
+  );
 
-    return attr;
+  return { graph, keys };
+}
+
+// NOTE: returns the mean displacement of the nodes since the given layout,
+// relative to the extent of the current one
+function getRelativeLayoutDisplacement(
+  graph: Graph,
+  previous: LayoutMapping
+): number {
+  let displacement = 0;
+  let minX = Infinity;
+  let maxX = -Infinity;
+  let minY = Infinity;
+  let maxY = -Infinity;
+
+  graph.forEachNode((node, attr) => {
+    const pos = previous[node];
+
+    if (pos) displacement += Math.hypot(attr.x - pos.x, attr.y - pos.y);
+
+    if (attr.x < minX) minX = attr.x;
+    if (attr.x > maxX) maxX = attr.x;
+    if (attr.y < minY) minY = attr.y;
+    if (attr.y > maxY) maxY = attr.y;
   });
 
-  return graph;
+  const extent = Math.max(maxX - minX, maxY - minY);
+
+  if (graph.order === 0 || !extent) return 0;
+
+  return displacement / graph.order / extent;
 }
 
 function createElement(
@@ -341,7 +552,11 @@ function createSpinner(): [HTMLElement, () => void] {
   return [span, () => frame !== null && clearTimeout(frame)];
 }
 
-function getGraphDescription(name: string | undefined, graph: Graph): string {
+function getGraphDescription(
+  name: string | undefined,
+  graph: Graph,
+  progress: number | null = null
+): string {
   let html = '';
 
   if (name) {
@@ -356,6 +571,10 @@ function getGraphDescription(name: string | undefined, graph: Graph): string {
     graph.size
   )}</b> edges`;
 
+  if (progress !== null) {
+    html += `<br><i>loading... ${Math.floor(progress * 100)}%</i>`;
+  }
+
   return html;
 }
 
@@ -364,11 +583,19 @@ function getGraphDescription(name: string | undefined, graph: Graph): string {
  */
 type SyncRegistryEntry = {
   emitter: EventEmitter;
+  batcher: FrameBatcher;
   renderers: Set<Sigma>;
 };
 
 const SYNC_REGISTRY: Map<string, SyncRegistryEntry> = new Map();
 
+type SharedGraphRegistryEntry = {
+  data: AnySerializedGraph | null;
+  models: Set<SigmaModel>;
+};
+
+const SHARED_GRAPH_REGISTRY: Map<string, SharedGraphRegistryEntry> = new Map();
+
 /**
  * View declaration.
  */
@@ -376,22 +603,37 @@ export class SigmaView extends DOMWidgetView {
   container: HTMLElement;
   renderer: Sigma;
   graph: Graph;
+  rng: RNGFunction;
+  serializedKeys: SerializedItemKeys;
+  appliedPatchCount: number = 0;
+  appliedChunkCount: number = 0;
+  chunkNodeKeys: Array<string> = [];
+  graphWasPatched: boolean = false;
+  scaleBuilder: VisualVariableScalesBuilder;
+  scales: VisualVariableScales;
+  reducerState: ReducerState;
   emitter: EventEmitter = new EventEmitter();
   edgeWeightAttribute: string | null = null;
   backgroundColor: string;
 
   syncKey: string | undefined;
   syncHoveredNode: string | null = null;
+  kernelSync: KernelStateSync;
   syncListeners: Record<string, (...args: any) => void> = {};
 
   originalLayoutPositions: LayoutMapping;
   layout: LayoutSupervisor;
   noverlap: NoverlapSupervisor;
+  nodeMetricsWorker: NodeMetricsWorker = new NodeMetricsWorker();
   layoutButton: HTMLButtonElement;
   noverlapButton: HTMLButtonElement;
   resetLayoutButton: HTMLButtonElement;
   layoutSpinner: [HTMLElement, () => void] | null = null;
   layoutControls: HTMLElement;
+  layoutStreamingInterval: ReturnType<typeof setInterval> | null = null;
+  layoutHandlers: { start: () => void; stop: () => void } | null = null;
+  nodeMetricsPromise: Promise<Record<string, NodeMetricSpec>> | null = null;
+  requestCancellers: Map<string, () => void> = new Map();
 
   zoomButton: HTMLElement;
   unzoomButton: HTMLElement;
@@ -399,6 +641,7 @@ export class SigmaView extends DOMWidgetView {
 
   fullscreenButton: HTMLElement;
 
+  descriptionElement: HTMLElement;
   choices: Choices;
   currentTab: InformationDisplayTab = 'legend';
   informationDisplayElement: HTMLElement;
@@ -434,24 +677,35 @@ export class SigmaView extends DOMWidgetView {
       backgroundColor = "rgb(255, 255, 255)"
     }
 
-    const name = this.model.get('name');
     const data = this.model.get('data');
 
     this.el.style.backgroundColor = backgroundColor;
     this.backgroundColor = backgroundColor;
 
-    const graph = buildGraph(data, createRng());
+    this.rng = createRng();
+
+    this.kernelSync = new KernelStateSync(
+      this.model.get('kernel_sync') as KernelSyncSettings,
+      (state) => {
+        this.model.set(state);
+        this.touch();
+      }
+    );
+
+    this.edgeWeightAttribute = this.model.get('edge_weight') as string | null;
+
+    const { graph, keys } = buildGraph(data, this.rng);
     this.graph = graph;
+    this.serializedKeys = keys;
 
-    // Preexisting layout?
-    const preexistingLayout = this.model.get('layout');
+    // Chunks sent before the view was rendered
+    if (this.isGraphComplete()) this.initializeGraphState();
+    else this.applyPendingChunks();
 
-    if (preexistingLayout) {
-      assignLayout(graph, preexistingLayout);
-    } else {
-      this.saveLayout();
-    }
-    this.originalLayoutPositions = collectLayout(graph);
+    (this.model as SigmaModel).requestChunks();
+
+    // Patches sent before the view was rendered
+    this.applyPendingPatches();
 
     // Selection state
     const selectedNodeCategoryValues = this.model.get(
@@ -466,43 +720,6 @@ export class SigmaView extends DOMWidgetView {
     if (selectedEdgeCategoryValues)
       this.selectedEdgeCategoryValues = new Set(selectedEdgeCategoryValues);
 
-    // Widget-side metrics
-    this.edgeWeightAttribute = this.model.get('edge_weight') as string | null;
-
-    let nodeMetrics =
-      (this.model.get('node_metrics') as Record<string, any>) || {};
-
-    // NOTE: for some untractable reason, I need a completly new deep object
-    nodeMetrics = JSON.parse(JSON.stringify(nodeMetrics));
-
-    for (const attrName in nodeMetrics) {
-      const metricSpec = nodeMetrics[attrName];
-      const metric = metricSpec.name;
-
-      if (metric === 'louvain') {
-        const communities = louvain(graph, {
-          getEdgeWeight: this.edgeWeightAttribute,
-          rng: createRng(),
-          resolution: metricSpec.resolution || 1,
-        });
-
-        metricSpec.result = communities;
-
-        graph.updateEachNodeAttributes(
-          (node, attr) => {
-            attr[attrName] = communities[node];
-            return attr;
-          },
-          { attributes: [attrName] }
-        );
-      } else {
-        throw new Error(`unkown metric "${metric}"` + metric);
-      }
-    }
-
-    this.model.set('node_metrics', nodeMetrics);
-    this.touch();
-
     this.el.insertAdjacentHTML('beforeend', TEMPLATE);
     this.el.style.width = '100%';
     this.el.style.height = height;
@@ -514,10 +731,10 @@ export class SigmaView extends DOMWidgetView {
     this.container.style.height = height;
 
     // Description
-    const description = this.el.querySelector(
+    this.descriptionElement = this.el.querySelector(
       '.ipysigma-graph-description'
     ) as HTMLElement;
-    description.innerHTML = getGraphDescription(name, graph);
+    this.updateDescription();
 
     // Camera controls
     this.zoomButton = this.el.querySelector(
@@ -554,28 +771,11 @@ export class SigmaView extends DOMWidgetView {
       '.ipysigma-search'
     ) as HTMLElement;
 
-    const nodeLabelAttribute =
-      this.model.get('visual_variables').nodeLabel.attribute;
-
-    const options = graph.mapNodes((key, attr) => {
-      let labelParts = [escapeHtml(key)];
-
-      const label = attr[nodeLabelAttribute];
-
-      if (label && label !== key) {
-        labelParts.push(
-          ` <small style="font-size: 75%;">${escapeHtml(label)}</small>`
-        );
-      }
-
-      return { value: key, label: labelParts.join(' ') };
-    });
-
     this.choices = new Choices(searchContainer, {
       allowHTML: true,
       removeItemButton: true,
       renderChoiceLimit: 10,
-      choices: options,
+      choices: this.getSearchOptions(),
       itemSelectText: '',
       position: 'bottom',
     });
@@ -632,19 +832,6 @@ export class SigmaView extends DOMWidgetView {
         'visual_variables'
       ) as VisualVariables;
 
-      const nodeColorSaturationEnabled =
-        visualVariables.nodeColorSaturation.type !== 'disabled';
-      const nodeBordersEnabled =
-        visualVariables.nodeBorderColor.type !== 'disabled' &&
-        (visualVariables.nodeBorderSize.type !== 'disabled' ||
-          visualVariables.nodeBorderRatio.type !== 'disabled');
-      const nodePictogramsEnabled =
-        visualVariables.nodePictogram.type !== 'disabled';
-      const nodeShapeEnabled = visualVariables.nodeShape.type !== 'disabled';
-      const nodeHaloEnabled =
-        visualVariables.nodeHaloSize.type !== 'disabled' &&
-        visualVariables.nodeHaloColor.type !== 'disabled';
-
       const edgeProgramClasses = {
         rectangle: EdgeRectangleProgram,
         line: EdgeLineProgram,
@@ -731,47 +918,44 @@ export class SigmaView extends DOMWidgetView {
         maxCategoricalColors
       );
 
+      // Chunks & patches sent before the view was displayed
+      this.applyPendingChunks();
+      this.applyPendingPatches();
+
+      // NOTE: statistics precomputed by the kernel do not account for patches
+      if (this.graphWasPatched) scaleBuilder.discardPrecomputedStatistics();
+
       scaleBuilder.readGraph(graph);
 
       if (!('labelRenderedSizeThreshold' in rendererSettings))
         rendererSettings.labelRenderedSizeThreshold =
           scaleBuilder.inferLabelRenderedSizeThreshold();
 
-      const scales = scaleBuilder.build();
+      this.scaleBuilder = scaleBuilder;
+      this.scales = scaleBuilder.build();
 
-      this.updateLegend(visualVariables, {
-        nodeColor: scales.nodeColor?.summary,
-        nodeBorderColor: scales.nodeBorderColor?.summary,
-        edgeColor: scales.edgeColor?.summary,
-      });
+      this.reducerState = getReducerState(visualVariables);
+
+      this.updateLegend(visualVariables, this.getCategorySummaries());
 
       const nodeDisplayDataRegister: Record<
         string,
         Partial<IPysigmaNodeDisplayData>
       > = {};
 
-      const nodeCategoryAttribute =
-        visualVariables.nodeColor.type === 'category'
-          ? visualVariables.nodeColor.attribute
-          : null;
-
-      const edgeCategoryAttribute =
-        visualVariables.edgeColor.type === 'category'
-          ? visualVariables.edgeColor.attribute
-          : null;
-
-      const edgeColorFrom =
-        visualVariables.edgeColor.type === 'dependent'
-          ? visualVariables.edgeColor.value
-          : null;
-
-      const nodeBorderColorFrom =
-        visualVariables.nodeBorderColor.type === 'dependent'
-          ? visualVariables.nodeBorderColor.value
-          : undefined;
-
       // Node reducer
       rendererSettings.nodeReducer = (node, data) => {
+        const scales = this.scales;
+        const {
+          nodeCategoryAttribute,
+          nodeColorSaturationEnabled,
+          nodeBordersEnabled,
+          nodeBorderRatioEnabled,
+          nodeBorderColorFrom,
+          nodePictogramsEnabled,
+          nodeShapeEnabled,
+          nodeHaloEnabled,
+        } = this.reducerState;
         const displayData: Partial<IPysigmaNodeDisplayData> = {
           x: data.x,
           y: data.y,
@@ -804,7 +988,7 @@ export class SigmaView extends DOMWidgetView {
         }
 
         if (nodeBordersEnabled) {
-          if (visualVariables.nodeBorderRatio.type !== 'disabled')
+          if (nodeBorderRatioEnabled)
             displayData.borderRatio = scales.nodeBorderRatio(data) as number;
           else {
             displayData.borderSize = scales.nodeBorderSize(data) as number;
@@ -880,6 +1064,8 @@ export class SigmaView extends DOMWidgetView {
 
       // Edge reducer
       rendererSettings.edgeReducer = (edge, data) => {
+        const scales = this.scales;
+        const { edgeCategoryAttribute, edgeColorFrom } = this.reducerState;
         const displayData: Partial<IPysigmaEdgeDisplayData> = {};
 
         const [source, target] = graph.extremities(edge);
@@ -954,7 +1140,8 @@ export class SigmaView extends DOMWidgetView {
         | string
         | undefined;
 
-      if (selectedNode) this.selectItem('node', selectedNode);
+      if (!this.isGraphComplete()) this.clearSelectedItem();
+      else if (selectedNode) this.selectItem('node', selectedNode);
       else if (selectedEdge)
         this.selectItem(
           'edge',
@@ -976,7 +1163,10 @@ export class SigmaView extends DOMWidgetView {
       this.bindDownloadHandlers();
       this.bindCameraHandlers();
       this.bindFullscreenHandlers();
-      this.bindLayoutHandlers();
+
+      // NOTE: layout is only available once the graph is complete
+      if (this.isGraphComplete()) this.bindLayoutHandlers();
+      else hide(this.layoutControls);
 
       this.syncKey = this.model.get('sync_key') as string | undefined;
 
@@ -985,40 +1175,460 @@ export class SigmaView extends DOMWidgetView {
 
         if (!currentSyncEntry) {
           const emitter = new EventEmitter();
+          const batcher = new FrameBatcher();
 
           SYNC_REGISTRY.set(this.syncKey, {
             emitter,
+            batcher,
             renderers: new Set([this.renderer]),
           });
 
-          this.bindSyncEvents(emitter);
+          this.bindSyncEvents(emitter, batcher);
         } else {
           currentSyncEntry.renderers.add(this.renderer);
-          this.bindSyncEvents(currentSyncEntry.emitter);
+          this.bindSyncEvents(
+            currentSyncEntry.emitter,
+            currentSyncEntry.batcher
+          );
         }
       }
     });
   }
 
-  renderSnapshot() {
-    this.model.set('snapshot', renderAsDataURL(this.renderer));
+  isGraphComplete(): boolean {
+    const data = this.model.get('data');
+
+    return (
+      !isChunkedSerializedGraph(data) || this.appliedChunkCount >= data.chunks
+    );
+  }
+
+  initializeGraphState() {
+    const graph = this.graph;
+
+    // Preexisting layout?
+    const preexistingLayoutBuffer = this.model.get('layout_buffer') as
+      | DataView
+      | Float32Array
+      | null;
+    const preexistingLayout = this.model.get('layout');
+
+    const assignedLayoutBuffer =
+      !!preexistingLayoutBuffer &&
+      assignSerializedLayout(
+        graph,
+        this.serializedKeys.nodes,
+        preexistingLayoutBuffer
+      );
+
+    if (!assignedLayoutBuffer) {
+      if (preexistingLayout) {
+        assignLayout(graph, preexistingLayout);
+      } else {
+        this.saveLayout();
+      }
+    }
+    this.originalLayoutPositions = collectLayout(graph);
+
+    this.computeNodeMetrics();
+  }
+
+  // NOTE: widget-side metrics are computed in a worker, so the graph is
+  // rendered right away, and restyled once the results are known
+  computeNodeMetrics() {
+    // NOTE: for some untractable reason, I need a completly new deep object
+    const nodeMetrics = JSON.parse(
+      JSON.stringify(this.model.get('node_metrics') || {})
+    ) as Record<string, NodeMetricSpec>;
+
+    if (Object.keys(nodeMetrics).length === 0) {
+      this.nodeMetricsPromise = Promise.resolve(nodeMetrics);
+      return;
+    }
+
+    const graph = this.graph;
+
+    this.nodeMetricsPromise = this.nodeMetricsWorker
+      .compute(graph, nodeMetrics, this.edgeWeightAttribute)
+      .then((results) => {
+        for (const attrName in results) {
+          const result = results[attrName];
+
+          nodeMetrics[attrName].result = result;
+
+          graph.updateEachNodeAttributes(
+            (node, attr) => {
+              if (node in result) attr[attrName] = result[node];
+              return attr;
+            },
+            { attributes: [attrName] }
+          );
+        }
+
+        this.model.set('node_metrics', nodeMetrics);
+        this.touch();
+
+        // NOTE: if the renderer does not exist yet, scales will be computed
+        // from the graph when it is created.
+        if (this.renderer) {
+          const effects = createGraphPatchEffects();
+          effects.nodesChanged = true;
+
+          this.updateScales(effects);
+        }
+
+        return nodeMetrics;
+      });
+  }
+
+  getSearchOptions(): Array<{ value: string; label: string }> {
+    const nodeLabelAttribute =
+      this.model.get('visual_variables').nodeLabel.attribute;
+
+    return this.graph.mapNodes((key, attr) => {
+      let labelParts = [escapeHtml(key)];
+
+      const label = attr[nodeLabelAttribute];
+
+      if (label && label !== key) {
+        labelParts.push(
+          ` <small style="font-size: 75%;">${escapeHtml(label)}</small>`
+        );
+      }
+
+      return { value: key, label: labelParts.join(' ') };
+    });
+  }
+
+  getCategorySummaries() {
+    return {
+      nodeColor: this.scales.nodeColor?.summary,
+      nodeBorderColor: this.scales.nodeBorderColor?.summary,
+      edgeColor: this.scales.edgeColor?.summary,
+    };
+  }
+
+  updateSearchOptions() {
+    const uiSettings = this.model.get('ui_settings') as IPysigmaUISettings;
+
+    if (this.choices && !uiSettings.hideSearch)
+      this.choices.setChoices(this.getSearchOptions(), 'value', 'label', true);
+  }
+
+  updateDescription() {
+    if (!this.descriptionElement) return;
+
+    const data = this.model.get('data');
+
+    const progress = isChunkedSerializedGraph(data)
+      ? this.appliedChunkCount / data.chunks
+      : 1;
+
+    this.descriptionElement.innerHTML = getGraphDescription(
+      this.model.get('name'),
+      this.graph,
+      progress < 1 ? progress : null
+    );
+  }
+
+  applyPendingChunks() {
+    const data = this.model.get('data');
+
+    if (!isChunkedSerializedGraph(data)) return;
+
+    const chunks = (this.model as SigmaModel).chunks;
+
+    if (
+      this.appliedChunkCount >= data.chunks ||
+      !chunks[this.appliedChunkCount]
+    )
+      return;
+
+    const effects = createGraphPatchEffects();
+
+    while (
+      this.appliedChunkCount < data.chunks &&
+      chunks[this.appliedChunkCount]
+    ) {
+      const { addedNodes, addedEdges } = deserializeGraphChunk(
+        this.graph,
+        data.encoding,
+        this.chunkNodeKeys,
+        chunks[this.appliedChunkCount++]
+      );
+
+      addedNodes.forEach((node) => {
+        this.graph.updateNodeAttributes(node, (attr) =>
+          assignRandomPosition(attr, this.rng)
+        );
+        effects.addedNodes.push(node);
+      });
+
+      addedEdges.forEach((edge) => effects.addedEdges.push(edge));
+
+      addedNodes.forEach((node) => this.serializedKeys.nodes.push(node));
+      addedEdges.forEach((edge) => this.serializedKeys.edges.push(edge));
+    }
+
+    const isComplete = this.isGraphComplete();
+
+    if (isComplete) {
+      this.initializeGraphState();
+    }
+
+    // NOTE: if the renderer does not exist yet, everything will be set up
+    // from the graph when it is created.
+    if (this.renderer) {
+      this.updateScales(effects);
+
+      if (isComplete) {
+        this.bindLayoutHandlers();
+        show(this.layoutControls);
+      }
+    }
+
+    if (isComplete) this.updateSearchOptions();
+
+    this.updateDescription();
+  }
+
+  applyPendingPatches() {
+    // NOTE: patches are only applied to a complete graph
+    if (!this.isGraphComplete()) return;
+
+    const patches = (this.model as SigmaModel).patches;
+
+    if (this.appliedPatchCount >= patches.length) return;
+
+    const effects = createGraphPatchEffects();
+
+    while (this.appliedPatchCount < patches.length) {
+      applyGraphPatch(
+        this.graph,
+        patches[this.appliedPatchCount++],
+        this.rng,
+        effects,
+        this.serializedKeys
+      );
+    }
+
+    if (!hasGraphPatchEffects(effects)) return;
+
+    this.graphWasPatched = true;
+
+    // NOTE: if the renderer does not exist yet, scales will be computed
+    // from the patched graph when it is created.
+    if (this.renderer) this.updateScales(effects);
+
+    if (effects.addedNodes.length !== 0 || effects.nodesChanged)
+      this.updateSearchOptions();
+
+    this.updateDescription();
+  }
+
+  updateScales(effects: GraphPatchEffects) {
+    const graph = this.graph;
+    const scaleBuilder = this.scaleBuilder;
+
+    if (scaleBuilder.usesPrecomputedStatistics) {
+      scaleBuilder.discardPrecomputedStatistics();
+      scaleBuilder.readGraph(graph);
+    } else {
+      if (effects.nodesChanged) scaleBuilder.readNodes(graph);
+      else
+        effects.addedNodes.forEach((node) =>
+          scaleBuilder.readNode(graph.getNodeAttributes(node))
+        );
+
+      if (effects.edgesChanged) scaleBuilder.readEdges(graph);
+      else
+        effects.addedEdges.forEach((edge) =>
+          scaleBuilder.readEdge(graph.getEdgeAttributes(edge))
+        );
+    }
+
+    this.scales = scaleBuilder.build();
+
+    this.updateLegend(
+      this.model.get('visual_variables') as VisualVariables,
+      this.getCategorySummaries()
+    );
+
+    if (
+      (this.selectedNode && !graph.hasNode(this.selectedNode)) ||
+      (this.selectedEdge && !graph.hasEdge(this.selectedEdge))
+    ) {
+      this.clearSelectedItem();
+    } else {
+      this.renderer.refresh();
+    }
+  }
+
+  // NOTE: columns required by the new visual variables were sent as a patch
+  // beforehand, so scales can be computed from the graph again right away
+  restyle() {
+    if (!this.renderer) return;
+
+    const visualVariables = this.model.get(
+      'visual_variables'
+    ) as VisualVariables;
+    const rendererSettings = this.model.get(
+      'renderer_settings'
+    ) as Partial<SigmaSettings>;
+
+    this.applyPendingPatches();
+
+    const scaleBuilder = new VisualVariableScalesBuilder(
+      visualVariables,
+      this.model.get('max_categorical_colors') as number
+    );
+
+    if (this.graphWasPatched) scaleBuilder.discardPrecomputedStatistics();
+
+    scaleBuilder.readGraph(this.graph);
+
+    this.scaleBuilder = scaleBuilder;
+    this.scales = scaleBuilder.build();
+    this.reducerState = getReducerState(visualVariables);
+
+    // NOTE: selected categories may not exist anymore
+    this.selectedNodeCategoryValues = null;
+    this.selectedEdgeCategoryValues = null;
+    this.model.set('selected_node_category_values', null);
+    this.model.set('selected_edge_category_values', null);
     this.touch();
+
+    this.updateLegend(visualVariables, this.getCategorySummaries());
+
+    if (rendererSettings.defaultNodeType)
+      this.renderer.setSetting(
+        'defaultNodeType',
+        rendererSettings.defaultNodeType
+      );
+
+    this.renderer.refresh();
+  }
+
+  // NOTE: requests are answered with a message bearing the same id, so that
+  // the kernel is able to resolve the matching future
+  handleRequest(id: string, kind: string, params: Record<string, any>) {
+    let promise: Promise<[Record<string, any>, Array<ArrayBuffer>]>;
+
+    if (kind === 'snapshot') {
+      promise = renderAsPNG(this.renderer).then((png) => [{}, [png]]);
+    } else if (kind === 'layout') {
+      promise = this.runLayout(id, params).then(() => [{}, []]);
+    } else if (kind === 'metrics') {
+      promise = (this.nodeMetricsPromise || Promise.resolve({})).then(
+        (nodeMetrics) => [{ node_metrics: nodeMetrics }, []]
+      );
+    } else {
+      promise = Promise.reject(new Error(`unknown request "${kind}"`));
+    }
+
+    promise.then(
+      ([content, buffers]) => {
+        this.send({ msg: 'response', id, ...content }, buffers);
+      },
+      (error) => {
+        this.send({
+          msg: 'response',
+          id,
+          error: String(error.message || error),
+        });
+      }
+    );
+  }
+
+  // NOTE: the layout runs until it converges or for the given duration, and
+  // is then stopped, which syncs it with the kernel before the response
+  runLayout(
+    id: string,
+    params: { until_converged?: boolean; duration?: number | null }
+  ): Promise<void> {
+    const handlers = this.layoutHandlers;
+
+    if (!handlers || this.noverlap.isRunning())
+      return Promise.reject(new Error('layout cannot be run right now'));
+
+    const graph = this.graph;
+    const startTime = Date.now();
+    const duration = params.duration ? params.duration * 1000 : Infinity;
+
+    if (!this.layout.isRunning()) handlers.start();
+
+    return new Promise((resolve, reject) => {
+      let previous = collectLayout(graph);
+
+      const cleanup = () => {
+        clearInterval(interval);
+        this.requestCancellers.delete(id);
+      };
+
+      const interval = setInterval(() => {
+        // NOTE: the layout was stopped by the user in the meantime
+        if (!this.layout.isRunning()) {
+          cleanup();
+          resolve();
+          return;
+        }
+
+        const converged =
+          params.until_converged &&
+          getRelativeLayoutDisplacement(graph, previous) <
+            LAYOUT_CONVERGENCE_THRESHOLD;
+
+        if (converged || Date.now() - startTime >= duration) {
+          cleanup();
+          handlers.stop();
+          resolve();
+          return;
+        }
+
+        previous = collectLayout(graph);
+      }, LAYOUT_CONVERGENCE_CHECK_INTERVAL);
+
+      this.requestCancellers.set(id, () => {
+        cleanup();
+        if (this.layout.isRunning()) handlers.stop();
+        reject(new Error('request was cancelled'));
+      });
+    });
   }
 
   saveCameraState(state: CameraState) {
-    this.model.set('camera_state', state);
-    this.touch();
+    this.kernelSync.set('camera', { camera_state: state });
   }
 
-  saveLayout() {
-    const mapping = collectLayout(this.graph);
-    this.model.set('layout', mapping);
+  // NOTE: layouts are sent as binary buffers whenever possible, and only
+  // fall back to JSON when the graph has nodes unknown to the kernel
+  saveLayout(mapping?: LayoutMapping) {
+    const buffer = serializeLayout(
+      this.graph,
+      this.serializedKeys.nodes,
+      mapping
+    );
+
+    if (buffer) {
+      this.model.set('layout_buffer', buffer);
+      this.model.set('layout', null);
+    } else {
+      this.model.set('layout', mapping || collectLayout(this.graph));
+      this.model.set('layout_buffer', null);
+    }
+
     this.touch();
   }
 
   resetLayout() {
-    this.model.set('layout', this.originalLayoutPositions);
-    this.touch();
+    this.saveLayout(this.originalLayoutPositions);
+  }
+
+  stopLayoutStreaming() {
+    if (this.layoutStreamingInterval === null) return;
+
+    clearInterval(this.layoutStreamingInterval);
+    this.layoutStreamingInterval = null;
   }
 
   changeInformationDisplayTab(tab: InformationDisplayTab) {
@@ -1249,9 +1859,10 @@ export class SigmaView extends DOMWidgetView {
 
     this.changeInformationDisplayTab('legend');
 
-    this.model.set('selected_node', null);
-    this.model.set('selected_edge', null);
-    this.touch();
+    this.kernelSync.set('selection', {
+      selected_node: null,
+      selected_edge: null,
+    });
 
     this.renderer.refresh();
     this.emitter.emit('clearSelectedItem');
@@ -1306,20 +1917,22 @@ export class SigmaView extends DOMWidgetView {
 
       this.focusedNodes = focusedNodes;
       this.choices.setChoiceByValue(key);
-      this.model.set('selected_node', key);
-      this.model.set('selected_edge', null);
+      this.kernelSync.set('selection', {
+        selected_node: key,
+        selected_edge: null,
+      });
     } else {
       const extremities = graph.extremities(key);
       this.selectedEdge = key;
       this.selectedNode = null;
       this.focusedNodes = new Set(extremities);
       this.choices.setChoiceByValue('');
-      this.model.set('selected_edge', extremities);
-      this.model.set('selected_node', null);
+      this.kernelSync.set('selection', {
+        selected_node: null,
+        selected_edge: extremities,
+      });
     }
 
-    this.touch();
-
     const attr =
       type === 'node'
         ? graph.getNodeAttributes(key)
@@ -1402,30 +2015,38 @@ export class SigmaView extends DOMWidgetView {
 
   bindMessageHandlers() {
     this.model.on('msg:custom', (content) => {
-      if (content.msg === 'render_snapshot') {
-        this.renderSnapshot();
+      if (content.msg === 'request') {
+        this.handleRequest(content.id, content.kind, content.params || {});
+      } else if (content.msg === 'cancel_request') {
+        const cancel = this.requestCancellers.get(content.id);
+
+        if (cancel) cancel();
+      } else if (content.msg === 'patch') {
+        this.applyPendingPatches();
+      } else if (content.msg === 'chunk') {
+        this.applyPendingChunks();
+        this.applyPendingPatches();
       }
     });
+
+    this.model.on('change:visual_variables', () => this.restyle());
   }
 
   bindRendererHandlers() {
-    const debouncedSaveCameraState = debounce(
-      this.saveCameraState.bind(this),
-      500
-    );
-
     this.renderer.getCamera().on('updated', (state) => {
-      debouncedSaveCameraState(state);
+      this.saveCameraState(state);
     });
 
     let hoveredCount = 0;
 
-    this.renderer.on('enterNode', () => {
+    this.renderer.on('enterNode', ({ node }) => {
+      this.kernelSync.set('hover', { hovered_node: node });
       hoveredCount++;
       this.container.style.cursor = 'pointer';
     });
 
     this.renderer.on('leaveNode', () => {
+      this.kernelSync.set('hover', { hovered_node: null });
       hoveredCount--;
       if (hoveredCount === 0) this.container.style.cursor = 'default';
     });
@@ -1616,6 +2237,7 @@ export class SigmaView extends DOMWidgetView {
       this.layoutButton.innerHTML = playIcon;
       this.layoutButton.setAttribute('title', 'start layout');
       this.layout.stop();
+      this.stopLayoutStreaming();
       this.saveLayout();
       enable(this.noverlapButton);
       show(this.resetLayoutButton);
@@ -1629,6 +2251,19 @@ export class SigmaView extends DOMWidgetView {
       this.layout.start();
       disable(this.noverlapButton);
       hide(this.resetLayoutButton);
+
+      // NOTE: the layout can be streamed to the kernel while it is running
+      const streamingInterval = this.model.get('stream_layout_interval') as
+        | number
+        | null;
+
+      if (streamingInterval) {
+        this.stopLayoutStreaming();
+        this.layoutStreamingInterval = setInterval(
+          () => this.saveLayout(),
+          streamingInterval * 1000
+        );
+      }
     };
 
     const stopNoverlap = (disableButton: boolean = false) => {
@@ -1657,6 +2292,8 @@ export class SigmaView extends DOMWidgetView {
       hide(this.resetLayoutButton);
     };
 
+    this.layoutHandlers = { start: startLayout, stop: stopLayout };
+
     const resetLayout = () => {
       enable(this.noverlapButton);
       hide(this.resetLayoutButton);
@@ -1699,7 +2336,7 @@ export class SigmaView extends DOMWidgetView {
     };
   }
 
-  bindSyncEvents(syncEmitter: EventEmitter) {
+  bindSyncEvents(syncEmitter: EventEmitter, batcher: FrameBatcher) {
     let locks = {
       camera: false,
       nodeAttributesUpdated: false,
@@ -1734,6 +2371,14 @@ export class SigmaView extends DOMWidgetView {
       scheduleResetLocks();
     };
 
+    // NOTE: events are batched per frame, only the last event of a same key
+    // emitted by this view during the frame being actually emitted
+    const emit = (key: string, eventName: string, getPayload: () => any) => {
+      batcher.schedule(this.cid + ':' + key, () =>
+        syncEmitter.emit(eventName, getPayload())
+      );
+    };
+
     const camera = this.renderer.getCamera();
     const graph = this.renderer.getGraph();
 
@@ -1745,7 +2390,7 @@ export class SigmaView extends DOMWidgetView {
           return;
         }
 
-        syncEmitter.emit('camera', { state, renderer: this.renderer });
+        emit('camera', 'camera', () => ({ state, renderer: this.renderer }));
       });
 
       this.syncListeners.camera = ({ state, renderer }) => {
@@ -1764,11 +2409,13 @@ export class SigmaView extends DOMWidgetView {
           return;
         }
 
-        syncEmitter.emit('nodePosition', {
+        const position = { x: attributes.x, y: attributes.y };
+
+        emit('nodePosition:' + key, 'nodePosition', () => ({
           node: key,
-          position: { x: attributes.x, y: attributes.y },
+          position,
           renderer: this.renderer,
-        });
+        }));
       });
 
       graph.on('eachNodeAttributesUpdated', () => {
@@ -1777,10 +2424,11 @@ export class SigmaView extends DOMWidgetView {
           return;
         }
 
-        syncEmitter.emit('layout', {
+        // NOTE: the layout is only collected once per frame
+        emit('layout', 'layout', () => ({
           layout: collectLayout(graph),
           renderer: this.renderer,
-        });
+        }));
       });
 
       this.syncListeners.layout = ({ layout, renderer }) => {
@@ -1813,7 +2461,11 @@ export class SigmaView extends DOMWidgetView {
           key = this.graph.extremities(key);
         }
 
-        syncEmitter.emit('selectItem', { type, key, renderer: this.renderer });
+        emit('selection', 'selectItem', () => ({
+          type,
+          key,
+          renderer: this.renderer,
+        }));
       });
 
       this.emitter.on('clearSelectedItem', () => {
@@ -1822,7 +2474,9 @@ export class SigmaView extends DOMWidgetView {
           return;
         }
 
-        syncEmitter.emit('clearSelectedItem', { renderer: this.renderer });
+        emit('selection', 'clearSelectedItem', () => ({
+          renderer: this.renderer,
+        }));
       });
 
       this.syncListeners.selectItem = ({ renderer, key, type }) => {
@@ -1846,11 +2500,11 @@ export class SigmaView extends DOMWidgetView {
     // Hover
     if (syncTargets.has('hover')) {
       this.renderer.on('enterNode', ({ node }) => {
-        syncEmitter.emit('enterNode', { node, renderer: this.renderer });
+        emit('hover', 'enterNode', () => ({ node, renderer: this.renderer }));
       });
 
       this.renderer.on('leaveNode', ({ node }) => {
-        syncEmitter.emit('leaveNode', { node, renderer: this.renderer });
+        emit('hover', 'leaveNode', () => ({ node, renderer: this.renderer }));
       });
 
       this.syncListeners.enterNode = ({ node, renderer }) => {
@@ -1875,10 +2529,15 @@ export class SigmaView extends DOMWidgetView {
   }
 
   remove() {
+    this.requestCancellers.forEach((cancel) => cancel());
+
     // Cleanup to avoid leaks and free GPU slots
     if (this.renderer) this.renderer.kill();
     if (this.layout) this.layout.kill();
     if (this.noverlap) this.noverlap.kill();
+    this.nodeMetricsWorker.kill();
+    this.stopLayoutStreaming();
+    this.kernelSync.kill();
 
     if (this.syncKey) {
       const syncEntry = SYNC_REGISTRY.get(this.syncKey);
@@ -1900,6 +2559,7 @@ export class SigmaView extends DOMWidgetView {
         }
       } else {
         syncEntry.emitter.removeAllListeners();
+        syncEntry.batcher.kill();
         SYNC_REGISTRY.delete(this.syncKey);
       }
     }